@@ -0,0 +1,111 @@
+"""Reproducible synthetic corpora for the benchmarks.
+
+Words are drawn from a Zipf-like distribution over a generated vocabulary, so
+the frequency profile resembles natural text: a few stopwords dominate and a
+long tail of words occurs once or twice. Vietnamese words are built from
+common syllables (most Vietnamese words have one or two), English words from
+stems and suffixes. The same language, size and seed always give the same text.
+"""
+
+import os
+import random
+from src.config.constant import BENCHMARK_CORPUS_DIR, BENCHMARK_SEED
+
+LANGUAGES = ("en", "vi", "mixed")
+
+VI_STOPWORDS = ("là", "của", "và", "có", "được", "những", "các", "một", "trong", "cho", "với", "này",
+                "đã", "không", "người", "để", "khi", "từ", "thì", "cũng", "như", "đến", "vào", "ra")
+VI_SYLLABLES = ("học", "tập", "phát", "triển", "công", "nghệ", "giáo", "dục", "kinh", "tế", "xã", "hội",
+                "văn", "hóa", "chính", "sách", "thông", "tin", "dữ", "liệu", "nghiên", "cứu", "khoa",
+                "sinh", "viên", "trường", "đại", "quốc", "gia", "thế", "giới", "thành", "phố", "nhà",
+                "nước", "doanh", "nghiệp", "thị", "trường", "sản", "xuất", "môi", "sức", "khỏe", "bệnh",
+                "viện", "giao", "thông", "điện", "thoại", "máy", "tính", "mạng", "lưới", "ngôn", "ngữ",
+                "lịch", "sử", "địa", "lý", "nông", "thôn", "gia", "đình", "trẻ", "em", "thời", "gian",
+                "hệ", "thống", "quản", "lý", "dự", "án", "kết", "quả", "chất", "lượng", "tiêu", "chuẩn")
+EN_STOPWORDS = ("the", "of", "and", "to", "a", "in", "is", "that", "for", "it", "as", "was", "with",
+                "on", "be", "by", "this", "are", "from", "at", "or", "an", "not", "have")
+EN_STEMS = ("learn", "develop", "technolog", "educat", "econom", "societ", "cultur", "polic", "inform",
+            "research", "scien", "student", "school", "nation", "world", "city", "govern", "market",
+            "produc", "environment", "health", "hospital", "transport", "comput", "network", "languag",
+            "histor", "geograph", "famil", "child", "system", "manag", "project", "result", "qualit",
+            "standard", "analy", "model", "process", "communit", "energ", "industr", "servic")
+EN_SUFFIXES = ("", "s", "ed", "ing", "er", "ers", "ion", "ions", "al", "ally", "ment", "ments", "ity", "ive")
+
+SIZE_UNITS = {"KB": 1_000, "MB": 1_000_000, "GB": 1_000_000_000}
+
+
+def parse_size(size):
+    """Return the number of bytes of a size like ``100KB`` or ``1MB``."""
+    text = str(size).strip().upper()
+    for unit, factor in SIZE_UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+
+def vocabulary(language, rng, size=5_000):
+    """Return the words of ``language``, most frequent first."""
+    if language == "vi":
+        words = [*dict.fromkeys(f"{rng.choice(VI_SYLLABLES)} {rng.choice(VI_SYLLABLES)}" for _ in range(size))]
+        return [*dict.fromkeys((*VI_STOPWORDS, *VI_SYLLABLES, *words))]
+    if language == "en":
+        words = [*dict.fromkeys(rng.choice(EN_STEMS) + rng.choice(EN_SUFFIXES) for _ in range(size))]
+        return [*dict.fromkeys((*EN_STOPWORDS, *words))]
+    raise ValueError(f"Unknown corpus language '{language}'.")
+
+
+class SentenceSource:
+    """Draw sentences of Zipf-distributed words of one language."""
+
+    def __init__(self, language, rng, exponent=1.1):
+        self.rng = rng
+        self.words = vocabulary(language, rng)
+        self.weights = [1 / (rank + 1) ** exponent for rank in range(len(self.words))]
+
+    def sentences(self, count):
+        lengths = [self.rng.randint(5, 20) for _ in range(count)]
+        words = self.rng.choices(self.words, self.weights, k=sum(lengths))
+        start = 0
+        for length in lengths:
+            sentence = " ".join(words[start:start + length])
+            start += length
+            yield sentence[0].upper() + sentence[1:] + self.rng.choice(".....?!")
+
+
+def iter_corpus(language, size, seed=BENCHMARK_SEED):
+    """Yield the paragraphs of a ``language`` ("en", "vi" or "mixed") text of at most ``size`` UTF-8 bytes."""
+    size = parse_size(size)
+    rng = random.Random(f"{language}-{size}-{seed}")
+    if language == "mixed":
+        sources = [SentenceSource("vi", rng), SentenceSource("en", rng)]
+    else:
+        sources = [SentenceSource(language, rng)]
+
+    remaining = size
+    while remaining > 0:
+        source = rng.choice(sources)
+        paragraph = " ".join(source.sentences(rng.randint(2, 8))) + "\n"
+        encoded = paragraph.encode("utf-8")
+        if len(encoded) > remaining:
+            # Cut the last paragraph at a space so neither a word nor a UTF-8 sequence is split
+            encoded = encoded[:remaining]
+            paragraph = encoded[:max(encoded.rfind(b" "), 0)].decode("utf-8")
+        remaining -= len(encoded)
+        yield paragraph
+
+
+def generate_corpus(language, size, seed=BENCHMARK_SEED):
+    """Return the text of :func:`iter_corpus`."""
+    return "".join(iter_corpus(language, size, seed))
+
+
+def corpus_path(language, size, seed=BENCHMARK_SEED, rootpath=BENCHMARK_CORPUS_DIR):
+    """Return the path of the generated corpus file, generating it on first use."""
+    path = os.path.join(rootpath, f"{language}-{parse_size(size)}-{seed}.txt")
+    if not os.path.exists(path):
+        os.makedirs(rootpath, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(iter_corpus(language, size, seed))
+        os.replace(tmp_path, path)
+    return path
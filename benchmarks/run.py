@@ -0,0 +1,89 @@
+"""Run the benchmarks and check them against a baseline.
+
+    python -m benchmarks.run                       # compare with output/benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline       # record a new baseline on this machine
+    python -m benchmarks.run --sizes 10MB 100MB --cases preprocessing statistics
+
+Exits with status 1 when any case's throughput falls more than the tolerance
+below the baseline. A baseline recorded on a different environment is not
+compared unless ``--force`` is given.
+"""
+
+import argparse
+import json
+import os
+import time
+from src.config.constant import (
+    BENCHMARK_BASELINE_PATH,
+    BENCHMARK_CORPUS_DIR,
+    BENCHMARK_LANGUAGES,
+    BENCHMARK_REPEAT,
+    BENCHMARK_SIZES,
+    BENCHMARK_TOLERANCE,
+)
+from benchmarks import corpora
+from benchmarks import suite
+
+
+def load_report(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_report(report, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Time and memory-profile the pipeline on generated corpora.")
+    parser.add_argument("--languages", nargs="+", default=list(BENCHMARK_LANGUAGES), choices=corpora.LANGUAGES)
+    parser.add_argument("--sizes", nargs="+", default=list(BENCHMARK_SIZES), help="Corpus sizes, e.g. 1KB 10MB.")
+    parser.add_argument("--cases", nargs="+", default=list(suite.CASES), choices=suite.CASES)
+    parser.add_argument("--repeat", type=int, default=BENCHMARK_REPEAT)
+    parser.add_argument("--baseline", default=BENCHMARK_BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--force", action="store_true",
+                        help="Compare with a baseline recorded on a different environment.")
+    parser.add_argument("--tolerance", type=float, default=BENCHMARK_TOLERANCE,
+                        help="Allowed throughput drop below the baseline, as a fraction.")
+    parser.add_argument("--output", default=os.path.join(BENCHMARK_CORPUS_DIR, "results.json"),
+                        help="Where to write the results of this run.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    results = suite.run_suite(args.languages, args.sizes, args.cases, args.repeat)
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "environment": suite.environment(),
+              "results": results}
+    save_report(report, args.output)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        save_report(report, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+
+    baseline = load_report(args.baseline)
+    changes = suite.environment_changes(baseline.get("environment", {}), report["environment"])
+    if changes and not args.force:
+        print(f"The baseline was recorded on a different environment ({', '.join(changes)}); skipping the "
+              f"comparison. Record a baseline here with --save-baseline, or compare anyway with --force.")
+        return
+    regressions = suite.compare(results, baseline["results"], args.tolerance)
+    for key, reference, current in regressions:
+        print(f"REGRESSION {key}: {current:.3f} MB/s vs baseline {reference:.3f} MB/s "
+              f"({current / reference - 1:+.0%})")
+    if regressions:
+        raise SystemExit(1)
+    print(f"No regressions beyond {args.tolerance:.0%} of the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark cases and measurement.
+
+Every case runs once untimed to load models and fill lazy caches, then
+:mod:`timeit` picks a loop count of at least 0.2 s and takes the best of
+``repeat`` loops. Peak memory is measured with :mod:`tracemalloc` in one more
+call, kept apart from the timed loops since tracing slows allocation down.
+It covers allocations of every thread in the process, but not of the
+parallel tokenization worker processes.
+"""
+
+import asyncio
+import os
+import platform
+import tempfile
+import timeit
+import tracemalloc
+from src.config.constant import BENCHMARK_REPEAT, MAX_UPLOAD_SIZE
+from src.pipeline import text_stats as ts
+from benchmarks import corpora
+
+CASES = ("preprocessing", "statistics", "export_results", "visualize_results", "endpoint_text", "endpoint_file")
+ENDPOINT_CASES = ("endpoint_text", "endpoint_file")
+
+
+def environment():
+    """Describe the machine, so results from different machines are not compared unawares."""
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "machine": platform.machine(), "cpu_count": os.cpu_count()}
+
+
+def environment_changes(baseline, current):
+    """Return the sorted keys whose values differ between two :func:`environment` descriptions."""
+    return sorted(key for key in baseline.keys() | current.keys() if baseline.get(key) != current.get(key))
+
+
+def measure(fn, size, repeat=BENCHMARK_REPEAT):
+    """Time ``fn`` and return its best time, throughput in MB/s of ``size`` input bytes and peak memory."""
+    fn()
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(repeat, number)) / number
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": seconds, "throughput_mb_s": size / 1e6 / seconds, "peak_bytes": peak, "loops": number}
+
+
+class EndpointClient:
+    """Call the app in process through httpx's ASGI transport, with the result cache emptied before each call."""
+
+    def __init__(self):
+        import httpx
+        from src.app.cache import result_cache
+        from src.app.main import app
+
+        self.cache = result_cache
+        # Measure the analysis, not the disk tier
+        self.cache.disk_dir = None
+        self.loop = asyncio.new_event_loop()
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark")
+
+    def post(self, url, **kwargs):
+        self.cache.clear()
+        response = self.loop.run_until_complete(self.client.post(url, **kwargs))
+        if response.status_code != 200:
+            raise RuntimeError(f"POST {url} answered {response.status_code}: {response.text[:200]}")
+        return response
+
+    def close(self):
+        self.loop.run_until_complete(self.client.aclose())
+        self.loop.close()
+
+
+def run_corpus_cases(text, size, cases=CASES, repeat=BENCHMARK_REPEAT, client=None):
+    """Yield ``(case, measurement)`` for each case over one corpus; endpoint cases need ``client``."""
+    tokens = ts.preprocessing(text)
+    word_stats = ts.statistics(tokens)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        functions = {
+            "preprocessing": lambda: ts.preprocessing(text),
+            "statistics": lambda: ts.statistics(tokens),
+            "export_results": lambda: ts.export_results(word_stats, "benchmark.csv", tmpdir),
+            "visualize_results": lambda: ts.visualize_results(word_stats, "benchmark.png", tmpdir),
+        }
+        if client is not None:
+            data = text.encode("utf-8")
+            functions["endpoint_text"] = lambda: client.post(
+                "/analyses/text", json={"text": text, "output_format": "json"})
+            functions["endpoint_file"] = lambda: client.post(
+                "/analyses/file", files={"file": ("benchmark.txt", data, "text/plain")}, data={"output_format": "json"})
+        for case in cases:
+            if case in ENDPOINT_CASES and (client is None or size > MAX_UPLOAD_SIZE):
+                continue
+            yield case, measure(functions[case], size, repeat)
+
+
+def run_suite(languages, sizes, cases=CASES, repeat=BENCHMARK_REPEAT, progress=print):
+    """Run the cases over every generated corpus and return results keyed by ``case/language/size``."""
+    client = EndpointClient() if any(case in ENDPOINT_CASES for case in cases) else None
+    results = {}
+    try:
+        for language in languages:
+            for size in sizes:
+                with open(corpora.corpus_path(language, size), encoding="utf-8") as f:
+                    text = f.read()
+                byte_size = len(text.encode("utf-8"))
+                for case, result in run_corpus_cases(text, byte_size, cases, repeat, client):
+                    key = f"{case}/{language}/{size}"
+                    results[key] = result
+                    progress(f"{key:<36} {result['seconds'] * 1000:>10.2f} ms {result['throughput_mb_s']:>9.3f} MB/s "
+                             f"{result['peak_bytes'] / 1e6:>9.2f} MB peak")
+    finally:
+        if client is not None:
+            client.close()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return ``(key, baseline MB/s, current MB/s)`` for every case slower than the baseline by more than ``tolerance``."""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        if result["throughput_mb_s"] < reference["throughput_mb_s"] * (1 - tolerance):
+            regressions.append((key, reference["throughput_mb_s"], result["throughput_mb_s"]))
+    return regressions
@@ -0,0 +1,182 @@
+"""Content-addressed cache for analysis results.
+
+Results are keyed by a hash of the normalized input text and the stopword
+index version, so editing a stopword file invalidates earlier entries.
+Callers normalize the text once and pass it both here and to the analysis. The
+in-memory tier keeps word statistics in LRU order bounded by bytes. The
+optional on-disk tier keeps the rendered json/csv/png files.
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict
+from src.config.constant import (
+    CACHE_DISK_DIR,
+    CACHE_DISK_ENABLED,
+    CACHE_DISK_MAX_BYTES,
+    CACHE_MAX_BYTES,
+    CACHE_TTL_SECONDS,
+)
+
+
+def estimate_size(value):
+    """Return an approximate size in bytes of a cached value."""
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL_SECONDS,
+                 disk_dir=CACHE_DISK_DIR if CACHE_DISK_ENABLED else None,
+                 disk_max_bytes=CACHE_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.disk_misses = 0
+
+    @staticmethod
+    def make_key(text, version, *params):
+        """Return the cache key of normalized ``text`` analyzed with stopword index ``version``."""
+        digest = hashlib.sha256()
+        for part in (version, *params):
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached value for ``key`` or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, value, size=None):
+        """Store ``value`` under ``key``, evicting least recently used entries."""
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def _discard(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def file_path(self, key, extension):
+        """Return where the rendering of ``key`` in format ``extension`` lives on disk."""
+        return os.path.join(self.disk_dir, f"{key}.{extension}")
+
+    def get_file(self, key, extension):
+        """Return the path of a fresh cached rendering, or None."""
+        if self.disk_dir is None:
+            return None
+        path = self.file_path(key, extension)
+        try:
+            fresh = time.time() - os.stat(path).st_mtime <= self.ttl
+        except OSError:
+            fresh = False
+        with self._lock:
+            if fresh:
+                self.disk_hits += 1
+            else:
+                self.disk_misses += 1
+        return path if fresh else None
+
+    def put_file(self, key, extension, content):
+        """Write a rendering (bytes or a readable buffer) to the disk tier and return its path."""
+        os.makedirs(self.disk_dir, exist_ok=True)
+        path = self.file_path(key, extension)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            if isinstance(content, bytes):
+                f.write(content)
+            else:
+                shutil.copyfileobj(content, f)
+        os.replace(tmp_path, path)
+        self.evict_files()
+        return path
+
+    def evict_files(self):
+        """Delete expired renderings, then the oldest ones until the disk tier fits its budget."""
+        if self.disk_dir is None or not os.path.isdir(self.disk_dir):
+            return
+        now = time.time()
+        files = []
+        total = 0
+        for entry in os.scandir(self.disk_dir):
+            if not entry.is_file() or entry.name.endswith(".tmp"):
+                continue
+            stat = entry.stat()
+            if now - stat.st_mtime > self.ttl:
+                self._remove(entry.path)
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self.evictions += 1
+
+    def stats(self):
+        """Return hit/miss counters and the memory tier usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "disk_hits": self.disk_hits,
+                "disk_misses": self.disk_misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "disk_enabled": self.disk_dir is not None,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+result_cache = ResultCache()
@@ -0,0 +1,34 @@
+"""JSON encoding of large reports.
+
+Building ``{word: count}`` objects and validating them through a response
+model costs more than counting a large upload, so reports are encoded
+straight from plain lists and dicts. orjson is used when it is installed,
+the standard library otherwise.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def dumps(payload) -> bytes:
+    """Return ``payload`` as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def columns(data: dict, words_column: str, counts_column: str) -> dict:
+    """Turn the per-word objects of report ``data`` into arrays aligned with a ``words_column`` array.
+
+    Every object keyed by the words of ``data[counts_column]`` becomes the
+    list of its values; other entries (totals, bounds) are kept as they are.
+    """
+    words = list(data[counts_column])
+    result = {words_column: words}
+    for name, value in data.items():
+        result[name] = list(value.values()) if isinstance(value, dict) else value
+    return result
@@ -0,0 +1,131 @@
+"""Bounded executor that keeps CPU-bound analysis off the event loop."""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.config.constant import (
+    ANALYSIS_MAX_QUEUE,
+    ANALYSIS_MAX_WORKERS,
+    ANALYSIS_RETRY_AFTER_SECONDS,
+)
+from src.pipeline import timing
+
+
+class QueueFullError(Exception):
+    """Raised when the executor already holds as many tasks as it may queue."""
+
+    def __init__(self, retry_after):
+        super().__init__("Analysis queue is full.")
+        self.retry_after = retry_after
+
+
+class AnalysisExecutor:
+    """Thread pool with admission control.
+
+    At most ``max_workers`` tasks run at once and at most ``max_queue`` more
+    wait for a worker; anything beyond that is rejected immediately with
+    :class:`QueueFullError`. Queue-wait and execution times are recorded
+    separately.
+    """
+
+    def __init__(self, max_workers=ANALYSIS_MAX_WORKERS, max_queue=ANALYSIS_MAX_QUEUE,
+                 retry_after=ANALYSIS_RETRY_AFTER_SECONDS):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._pool = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._exec_total = 0.0
+        self._exec_max = 0.0
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in the pool and return its result."""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise QueueFullError(self.retry_after)
+            self._pending += 1
+
+        submitted = time.perf_counter()
+        # Copy the caller's context so context variables set by the request
+        # are visible inside the worker thread.
+        context = contextvars.copy_context()
+
+        def call(queue_wait):
+            timing.record("queue", queue_wait)
+            timing.track_thread()
+            return fn(*args, **kwargs)
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+            try:
+                return context.run(call, started - submitted)
+            finally:
+                finished = time.perf_counter()
+                self._record(started - submitted, finished - started)
+
+        try:
+            future = self._get_pool().submit(task)
+        except BaseException:
+            self._release()
+            raise
+        # Free the slot when the task itself is done (or cancelled before it started),
+        # not when the awaiter goes away: a cancelled awaiter leaves the thread running.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="analysis")
+            return self._pool
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def _record(self, queue_wait, exec_time):
+        with self._lock:
+            self._running -= 1
+            self._completed += 1
+            self._queue_wait_total += queue_wait
+            self._queue_wait_max = max(self._queue_wait_max, queue_wait)
+            self._exec_total += exec_time
+            self._exec_max = max(self._exec_max, exec_time)
+
+    def stats(self):
+        """Return a snapshot of the executor counters (times in seconds)."""
+        with self._lock:
+            completed = self._completed or 1
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "queue_wait_avg": self._queue_wait_total / completed,
+                "queue_wait_max": self._queue_wait_max,
+                "exec_avg": self._exec_total / completed,
+                "exec_max": self._exec_max,
+            }
+
+    def shutdown(self):
+        """Stop the worker threads. A new pool is created on the next :meth:`run`."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+analysis_executor = AnalysisExecutor()
@@ -0,0 +1,91 @@
+"""Startup warm-up and readiness tracking.
+
+Heavy dependencies are imported lazily, so a fresh worker is cheap to start
+but not ready to serve quickly. :func:`warm_up` loads the stopword index, the
+tokenizer model and the rendering backend ahead of the first request and
+records how long each step took; ``/health/ready`` reports 503 until it has
+finished.
+"""
+
+import threading
+import time
+from src.config.constant import PARALLEL_MAX_WORKERS, WARMUP_PROCESS_POOL
+from src.pipeline import parallel
+from src.pipeline import rendering
+from src.pipeline import text_stats as ts
+from src.pipeline.counting import FrequencyTable
+from src.pipeline.stopwords import get_stopword_index
+
+# Reference point for the cold-start measurement: when the app modules were imported
+STARTED_AT = time.perf_counter()
+
+
+class WarmupState:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.status = "starting"
+        self.steps = {}
+        self.error = None
+        self.cold_start_seconds = None
+
+    @property
+    def ready(self):
+        return self.status == "ready"
+
+    def record(self, step, seconds):
+        with self._lock:
+            self.steps[step] = round(seconds, 4)
+
+    def finish(self, error=None):
+        with self._lock:
+            self.cold_start_seconds = round(time.perf_counter() - STARTED_AT, 4)
+            self.status = "failed" if error else "ready"
+            self.error = error
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "status": self.status,
+                "cold_start_seconds": self.cold_start_seconds,
+                "steps": dict(self.steps),
+                "error": self.error,
+            }
+
+
+warmup_state = WarmupState()
+
+
+def _check_nltk():
+    missing = ts.ensure_nltk_resources(resources={"stopwords": ts.NLTK_RESOURCES["stopwords"]})
+    if missing:
+        raise RuntimeError(f"Missing NLTK resources: {', '.join(missing)}")
+
+
+def _warm_rendering():
+    rendering.render_chart(FrequencyTable.from_tokens(["khởi động"]), output_format="png").close()
+
+
+def warm_up(state=warmup_state):
+    """Load everything the analysis path needs, recording per-step timings in ``state``."""
+    steps = [
+        ("nltk", _check_nltk),
+        ("stopwords", get_stopword_index),
+        ("tokenizer", lambda: ts.preprocessing("Khởi động mô hình tách từ.")),
+        ("rendering", _warm_rendering),
+    ]
+    if WARMUP_PROCESS_POOL and PARALLEL_MAX_WORKERS > 1:
+        steps.append(("process_pool", parallel.warm_up))
+
+    state.status = "warming_up"
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"Warm-up step '{name}' failed: {e}")
+            state.finish(error=f"{name}: {e}")
+            return state
+        state.record(name, time.perf_counter() - started)
+    state.finish()
+    print(f"Worker ready after {state.cold_start_seconds:.2f}s (warm-up steps: {state.steps})")
+    return state
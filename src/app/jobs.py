@@ -0,0 +1,350 @@
+"""Asynchronous analysis jobs backed by an on-disk queue.
+
+Each job lives in its own directory under ``JOBS_DIR``: the uploaded input,
+a ``job.json`` state file and the exported results. Jobs still queued or
+running when the process stops are queued again by :meth:`JobManager.start`,
+so they survive a restart. Finished jobs are deleted ``ttl`` seconds after
+they end.
+"""
+
+import io
+import json
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+import uuid
+from src.config.constant import (
+    ANALYSIS_RETRY_AFTER_SECONDS,
+    COUNTS_COLUMN,
+    JOB_CLEANUP_INTERVAL,
+    JOB_MAX_PENDING,
+    JOB_MAX_WORKERS,
+    JOB_TTL_SECONDS,
+    JOBS_DIR,
+    PARALLEL_MAX_WORKERS,
+    WORDS_COLUMN,
+)
+from src.pipeline import parallel
+from src.pipeline import rendering
+from src.pipeline import streaming
+from src.pipeline import text_stats as ts
+from src.pipeline.counting import FrequencyTable
+from .encoding import dumps
+from .executor import QueueFullError
+from .models import TableOptions, TextStatsResponse
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+INPUT_FILE = "input.txt"
+STATE_FILE = "job.json"
+RESULT_NAME = "result"
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class JobStopped(Exception):
+    """Raised inside a running job when it is cancelled or the manager stops."""
+
+
+class JobManager:
+    """Run analyses in background worker threads, tracking them on disk.
+
+    :param root: Directory holding one subdirectory per job.
+    :param max_workers: Number of jobs analyzed at once.
+    :param max_pending: Queued jobs accepted before :meth:`submit` raises :class:`QueueFullError`.
+    :param ttl: Seconds a finished job is kept.
+    :param cleanup_interval: Seconds between expiry sweeps while a worker is idle.
+    """
+
+    def __init__(self, root=JOBS_DIR, max_workers=JOB_MAX_WORKERS, max_pending=JOB_MAX_PENDING,
+                 ttl=JOB_TTL_SECONDS, cleanup_interval=JOB_CLEANUP_INTERVAL):
+        self.root = root
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.cleanup_interval = cleanup_interval
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._cancel_events = {}
+        self._queue = queue.Queue()
+        self._workers = []
+        self._stopping = threading.Event()
+
+    def job_dir(self, job_id):
+        return os.path.join(self.root, job_id)
+
+    def start(self):
+        """Load the jobs left on disk, queue the unfinished ones and start the workers."""
+        if self._workers:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        self._stopping.clear()
+        self._load()
+        self.cleanup()
+        for i in range(self.max_workers):
+            worker = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, timeout=None):
+        """Stop the workers. A job interrupted mid-run is queued again on the next :meth:`start`."""
+        self._stopping.set()
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def submit(self, source, filename=None):
+        """Store ``source`` (text, bytes or a binary file object) as a new job and queue it."""
+        with self._lock:
+            pending = sum(job["status"] in (QUEUED, RUNNING) for job in self._jobs.values())
+            if pending >= self.max_pending:
+                raise QueueFullError(ANALYSIS_RETRY_AFTER_SECONDS)
+
+        job_id = uuid.uuid4().hex
+        job_dir = self.job_dir(job_id)
+        os.makedirs(job_dir)
+        input_path = os.path.join(job_dir, INPUT_FILE)
+        with open(input_path, "wb") as f:
+            if isinstance(source, str):
+                f.write(source.encode("utf-8"))
+            elif isinstance(source, bytes):
+                f.write(source)
+            else:
+                shutil.copyfileobj(source, f)
+
+        job = {
+            "id": job_id,
+            "status": QUEUED,
+            "filename": filename,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "total_bytes": os.path.getsize(input_path),
+            "processed_bytes": 0,
+            "progress": 0.0,
+            "words": None,
+            "error": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._save(job)
+        self._queue.put(job_id)
+        return dict(job)
+
+    def get(self, job_id):
+        """Return a snapshot of the job state, or None for an unknown or expired job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job and return its state, or None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] in (QUEUED, RUNNING):
+                event = self._cancel_events.get(job_id)
+                if event is not None:
+                    event.set()
+                self._finish(job, CANCELLED)
+            return dict(job)
+
+    def result_path(self, job_id, output_format, chart=None, table=None):
+        """Return the path of a finished job's result in ``output_format``, or None if it has none.
+
+        json and csv are exported with every word when the job finishes. Other
+        ``table`` selections and charts are rendered from the json counts on
+        first request and kept per variant.
+        """
+        job = self.get(job_id)
+        if job is None or job["status"] != SUCCEEDED:
+            return None
+        job_dir = self.job_dir(job_id)
+        if output_format in ("json", "csv"):
+            if table is None or table == TableOptions():
+                return os.path.join(job_dir, f"{RESULT_NAME}.{output_format}")
+            path = os.path.join(job_dir, f"{RESULT_NAME}-{table.variant}.{output_format}")
+            if not os.path.exists(path):
+                selected = self._read_counts(job_dir).select(table.top_n, table.offset, table.min_count)
+                if output_format == "csv":
+                    buffer = ts.render_csv(selected)
+                else:
+                    data = ({WORDS_COLUMN: selected.words.tolist(), COUNTS_COLUMN: selected.counts.tolist()}
+                            if table.columnar else {COUNTS_COLUMN: selected.to_dict()})
+                    buffer = io.BytesIO(dumps({"status": "success",
+                                               "message": "Text analysis completed successfully.",
+                                               "data": data}))
+                self._write_result(buffer, path)
+            return path
+
+        variant = chart.variant if chart is not None else "default"
+        path = os.path.join(job_dir, f"{RESULT_NAME}-{variant}.{output_format}")
+        if not os.path.exists(path):
+            options = {} if chart is None else {
+                "top_n": chart.top_n, "width": chart.width, "height": chart.height, "dpi": chart.dpi,
+            }
+            buffer = rendering.render_chart(self._read_counts(job_dir), output_format=output_format, **options)
+            self._write_result(buffer, path)
+        return path
+
+    @staticmethod
+    def _read_counts(job_dir):
+        """Return the exported counts of a job as a sorted FrequencyTable."""
+        with open(os.path.join(job_dir, f"{RESULT_NAME}.json"), encoding="utf-8") as f:
+            counts = json.load(f)["data"][COUNTS_COLUMN]
+        return FrequencyTable(list(counts), list(counts.values()), is_sorted=True)
+
+    @staticmethod
+    def _write_result(buffer, path):
+        """Write a rendered buffer to ``path`` atomically and close it."""
+        tmp_name = f"{os.path.basename(path)}.{threading.get_ident()}.tmp"
+        os.replace(ts.save_buffer(buffer, tmp_name, os.path.dirname(path)), path)
+        buffer.close()
+
+    def cleanup(self, now=None):
+        """Delete jobs that finished more than ``ttl`` seconds ago. Return how many were removed."""
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job["status"] in FINISHED_STATES and now - job["finished_at"] > self.ttl]
+            for job_id in expired:
+                del self._jobs[job_id]
+        for job_id in expired:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+        return len(expired)
+
+    def stats(self):
+        """Return the number of known jobs per status."""
+        with self._lock:
+            counts = {status: 0 for status in (QUEUED, RUNNING, *FINISHED_STATES)}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+            return counts
+
+    def _load(self):
+        queued = []
+        for entry in os.scandir(self.root):
+            if not (entry.is_dir() and _JOB_ID.match(entry.name)):
+                continue
+            try:
+                with open(os.path.join(entry.path, STATE_FILE), encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Skipping unreadable job '{entry.name}': {e}")
+                continue
+            if job["status"] == RUNNING:
+                job.update(status=QUEUED, started_at=None, processed_bytes=0, progress=0.0)
+                self._save(job)
+            with self._lock:
+                self._jobs[job["id"]] = job
+            if job["status"] == QUEUED:
+                queued.append(job)
+        for job in sorted(queued, key=lambda job: job["created_at"]):
+            self._queue.put(job["id"])
+
+    def _save(self, job):
+        # Called with the lock held
+        path = os.path.join(self.job_dir(job["id"]), STATE_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, path)
+
+    def _finish(self, job, status, **fields):
+        # Called with the lock held
+        job.update(status=status, finished_at=time.time(), **fields)
+        self._save(job)
+
+    def _work(self):
+        while True:
+            try:
+                job_id = self._queue.get(timeout=self.cleanup_interval)
+            except queue.Empty:
+                self.cleanup()
+                continue
+            if job_id is None or self._stopping.is_set():
+                return
+            self._run(job_id)
+
+    def _run(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != QUEUED:
+                return
+            job.update(status=RUNNING, started_at=time.time())
+            self._save(job)
+            cancelled = self._cancel_events[job_id] = threading.Event()
+
+        try:
+            word_stats = self._analyze(job_id, cancelled)
+            if word_stats.empty:
+                raise ValueError("No words found after processing data.")
+            self._export(job_id, word_stats)
+        except JobStopped:
+            if not cancelled.is_set():
+                with self._lock:
+                    # Interrupted by stop(): leave it queued for the next start()
+                    job.update(status=QUEUED, started_at=None, processed_bytes=0, progress=0.0)
+                    self._save(job)
+        except UnicodeDecodeError:
+            with self._lock:
+                if job["status"] == RUNNING:
+                    self._finish(job, FAILED, error="The uploaded file must be UTF-8 encoded text.")
+        except Exception as e:
+            print(f"Error raised while running job '{job_id}': {e}")
+            with self._lock:
+                if job["status"] == RUNNING:
+                    self._finish(job, FAILED, error=str(e))
+        else:
+            with self._lock:
+                if job["status"] == RUNNING:
+                    self._finish(job, SUCCEEDED, progress=1.0, processed_bytes=job["total_bytes"],
+                                 words=len(word_stats))
+        finally:
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+
+    def _analyze(self, job_id, cancelled):
+        """Preprocess the job input chunk by chunk and return its word statistics."""
+        job = self._jobs[job_id]
+
+        def tracked(chunks):
+            for chunk in chunks:
+                if cancelled.is_set() or self._stopping.is_set():
+                    raise JobStopped(job_id)
+                yield chunk
+                with self._lock:
+                    job["processed_bytes"] += len(chunk.encode("utf-8"))
+                    job["progress"] = job["processed_bytes"] / (job["total_bytes"] or 1)
+                    self._save(job)
+
+        chunks = tracked(streaming.iter_file_chunks(INPUT_FILE, self.job_dir(job_id)))
+        if PARALLEL_MAX_WORKERS > 1:
+            counts = parallel.count_chunks_parallel(chunks)
+        else:
+            counts = streaming.count_chunks(chunks)
+        return streaming.counts_to_table(counts)
+
+    def _export(self, job_id, word_stats):
+        """Write the json and csv results next to the job input."""
+        job_dir = self.job_dir(job_id)
+        ts.export_results(word_stats, f"{RESULT_NAME}.csv", job_dir)
+        content = TextStatsResponse(status="success",
+                                    message="Text analysis completed successfully.",
+                                    data={COUNTS_COLUMN: word_stats.to_dict()}).model_dump_json()
+        with open(os.path.join(job_dir, f"{RESULT_NAME}.json"), "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+job_manager = JobManager()
@@ -1,30 +1,362 @@
 import uvicorn
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Query, Request
+from fastapi import Path as FastAPIPath
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from typing import Annotated
-import time, os
+from contextlib import asynccontextmanager
+from collections import Counter
+from pydantic import ValidationError
+import asyncio, time, os, threading
+from src.pipeline import batch
+from src.pipeline import collection
+from src.pipeline import parallel
+from src.pipeline import partials
+from src.pipeline import rendering
+from src.pipeline import sketch
+from src.pipeline import streaming
 from src.pipeline import text_stats as ts
+from src.pipeline.corpus import check_name, get_corpus_index
+from src.pipeline.counting import FrequencyTable
+from src.pipeline.ngrams import NgramCounter
+from src.pipeline.stopwords import get_stopword_index
+from src.pipeline.timing import stage
+from src.pipeline.token_cache import get_token_cache
 from src.config.constant import (
     ALLOWED_CONTENT_TYPE_HEADERS,
     ALLOWED_FILE_CONTENT_TYPES,
+    PATH_FILE_CONTENT_TYPES,
     APP_IMPORT_PATH,
+    BATCH_MAX_CHARS,
+    BATCH_MAX_DOCUMENTS,
+    CHART_DPI,
+    CHART_FORMATS,
+    CHART_HEIGHT,
+    CHART_MAX_DPI,
+    CHART_MAX_SIZE,
+    CHART_MAX_TOP_N,
+    CHART_WIDTH,
+    COMPRESSION_ENABLED,
+    CORPUS_MAX_RESULTS,
+    CORPUS_NAME_PATTERN,
+    COUNTS_COLUMN,
     DEFAULT_HOST,
     DEFAULT_LOG_LEVEL,
     DEFAULT_OUTPUT_FORMAT,
     DEFAULT_PORT,
+    DECODE_ERROR_POLICIES,
+    DEFAULT_TOP_N_WORDS,
+    LOCAL_DECODE_ERRORS,
+    NGRAM_MAX_N,
     OUTPUT_DIR,
     OUTPUT_FILE_PREFIX,
+    OUTPUT_MEDIA_TYPES,
+    PARALLEL_SHARD_SIZE,
+    PARTIAL_FILE_EXTENSION,
+    PERSIST_OUTPUT_FILES,
+    SKETCH_DEFAULT_ERROR,
+    SKETCH_MIN_ERROR,
+    STREAM_SNAPSHOT_INTERVAL,
+    STREAM_SNAPSHOT_MIN_INTERVAL,
     SUPPORTED_OUTPUT_FORMATS,
     WORDS_COLUMN,
 )
-from .models import TextStatsRequest, TextStatsResponse
-from .middleware import LimitUploadSize, LimitUploadContentType
+from .cache import result_cache
+from .encoding import columns, dumps
+from .health import warm_up, warmup_state
+from .executor import QueueFullError, analysis_executor
+from .jobs import CANCELLED, SUCCEEDED, job_manager
+from .models import (
+    BatchDocument,
+    BatchRequest,
+    ChartOptions,
+    CollectionRequest,
+    CorpusDocument,
+    CountingOptions,
+    LocalFileRequest,
+    TableOptions,
+    TextStatsRequest,
+    TextStatsResponse,
+    document_ids,
+)
+from .metrics import METRICS_MEDIA_TYPE, Instrumentation, render_metrics
+from .middleware import CompressResponse, LimitUpload
+from .progress import (
+    BodyStreamingResponse,
+    RunningCounts,
+    count_bytes,
+    count_documents,
+    count_text,
+    iter_text_units,
+    progressive_results,
+)
 
-app = FastAPI()
-app.add_middleware(LimitUploadSize)  # Default: 5MB
-app.add_middleware(LimitUploadContentType,
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so /health/live answers while models load
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    job_manager.start()
+    yield
+    job_manager.stop()
+    analysis_executor.shutdown()
+    parallel.shutdown_executor()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(LimitUpload,  # Default: MAX_UPLOAD_SIZE
                    allowed_file_content_type=ALLOWED_FILE_CONTENT_TYPES,
+                   path_file_content_types=PATH_FILE_CONTENT_TYPES,
                    allowed_content_type_header=ALLOWED_CONTENT_TYPE_HEADERS)
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressResponse)
+# Outermost, so request timings include the upload checks
+app.add_middleware(Instrumentation)
+
+def file_response(path: str, download_name: str, media_type: str = None):
+    return FileResponse(path, media_type=media_type,
+                        headers={"Content-Disposition": f"attachment; filename={download_name}"})
+
+def buffer_response(buffer, download_name: str, media_type: str):
+    """Stream a rendered buffer back to the client, closing it when done."""
+    size = buffer.seek(0, os.SEEK_END)
+    buffer.seek(0)
+    return StreamingResponse(ts.iter_buffer(buffer), media_type=media_type,
+                             headers={"Content-Disposition": f"attachment; filename={download_name}",
+                                      "Content-Length": str(size)})
+
+def frequency_table(word_stats):
+    """Return the unsorted counts of any word statistics as a FrequencyTable."""
+    if isinstance(word_stats, sketch.SpaceSaving):
+        return FrequencyTable.from_counter(word_stats.counts)
+    if isinstance(word_stats, NgramCounter):
+        return word_stats.to_table(sort=False)
+    return word_stats
+
+def report_data(word_stats, table: TableOptions):
+    """Return the json report data of the words selected by ``table``."""
+    if isinstance(word_stats, sketch.SpaceSaving):
+        # Approximate counts carry their error bounds, n-grams their PMI
+        data = word_stats.summary(table.top_n, table.offset, table.min_count)
+    elif isinstance(word_stats, NgramCounter):
+        data = word_stats.summary(table.min_count, table.top_n, table.offset)
+        if table.columnar:
+            # Collocations are ranked by PMI, so they get their own words array
+            collocations = data.pop("collocations")
+            data = columns(data, WORDS_COLUMN, COUNTS_COLUMN)
+            data["collocations"] = {WORDS_COLUMN: list(collocations), "pmi": list(collocations.values())}
+            return data
+    else:
+        selected = word_stats.select(table.top_n, table.offset, table.min_count)
+        if table.columnar:
+            return {WORDS_COLUMN: selected.words.tolist(), COUNTS_COLUMN: selected.counts.tolist()}
+        return {COUNTS_COLUMN: selected.to_dict()}
+    return columns(data, WORDS_COLUMN, COUNTS_COLUMN) if table.columnar else data
+
+def render(word_stats, report_format: str, key: str, chart: ChartOptions, table: TableOptions):
+    """Render word statistics in the requested format, writing to the disk cache tier when enabled."""
+    if report_format == "json":
+        content = dumps({"status": "success",
+                         "message": "Text analysis completed successfully.",
+                         "data": report_data(word_stats, table)})
+        if result_cache.disk_dir is not None:
+            result_cache.put_file(key, report_format, content)
+        return Response(content, media_type=OUTPUT_MEDIA_TYPES[report_format])
+
+    word_stats = frequency_table(word_stats)
+    if report_format == "csv":
+        buffer = ts.render_csv(word_stats.select(table.top_n, table.offset, table.min_count))
+    elif report_format in CHART_FORMATS:
+        buffer = rendering.render_chart(word_stats, chart.top_n, report_format,
+                                        chart.width, chart.height, chart.dpi)
+    download_name = f"{OUTPUT_FILE_PREFIX}_{key[:16]}.{report_format}"
+
+    if result_cache.disk_dir is not None:
+        path_file = result_cache.put_file(key, report_format, buffer)
+        buffer.close()
+        return file_response(path_file, download_name, OUTPUT_MEDIA_TYPES[report_format])
+
+    if PERSIST_OUTPUT_FILES:
+        ts.save_buffer(buffer, f"{OUTPUT_FILE_PREFIX}_{time.time_ns()}.{report_format}", OUTPUT_DIR)
+        ts.cleanup_output_dir(OUTPUT_DIR)
+    return buffer_response(buffer, download_name, OUTPUT_MEDIA_TYPES[report_format])
+
+def chunk_statistics(chunks, counting: CountingOptions, normalized: bool = False):
+    """Return exact word statistics of text chunks, an n-gram counter when ``counting.n`` > 1,
+    or a Space-Saving summary when ``counting.approximate`` is set."""
+    if counting.n > 1:
+        return streaming.stream_ngram_statistics(chunks, counting.n, normalized)
+    if counting.approximate:
+        return sketch.sketch_statistics(chunks, max_error=counting.max_error, normalized=normalized)
+    # Left unsorted: responses only rank the words they return (see FrequencyTable.select)
+    return FrequencyTable.from_counter(parallel.stream_counts(chunks, normalized))
+
+def word_statistics(text: str, counting: CountingOptions, normalized: bool = False):
+    """Return the word statistics of ``text`` as in :func:`chunk_statistics`."""
+    if counting.n > 1 or counting.approximate:
+        return chunk_statistics(streaming.split_text(text, PARALLEL_SHARD_SIZE), counting, normalized)
+    return FrequencyTable.from_counter(parallel.word_counts(text, normalized=normalized))
+
+def analyze(text: str, report_format: str, chart: ChartOptions, counting: CountingOptions = None,
+            table: TableOptions = None):
+    """Run the analysis and build the response. Blocking; runs on the analysis executor."""
+    counting = counting or CountingOptions()
+    # Normalized once: the cache key and the analysis share it
+    with stage("normalize"):
+        text = ts.normalize(text)
+    key = result_cache.make_key(text, get_stopword_index().version, *counting.key_params)
+    return respond(key, lambda: word_statistics(text, counting, normalized=True), report_format, chart, table)
+
+def analyze_local(path: str, errors: str, report_format: str, chart: ChartOptions,
+                  counting: CountingOptions = None, table: TableOptions = None):
+    """Analyze a server-local file streamed from a memory map. Blocking; runs on the analysis executor."""
+    counting = counting or CountingOptions()
+    # Keyed by path, size and mtime rather than content, so cached results are served without reading the file
+    stat = os.stat(path)
+    key = result_cache.make_key("", get_stopword_index().version, "local", path, stat.st_size, stat.st_mtime_ns,
+                                errors, *counting.key_params)
+    chunks = streaming.iter_mapped_chunks(path, PARALLEL_SHARD_SIZE, errors)
+    return respond(key, lambda: chunk_statistics(chunks, counting), report_format, chart, table)
+
+def respond(key: str, compute, report_format: str, chart: ChartOptions, table: TableOptions = None):
+    """Build the response for the analysis cached under ``key``, calling ``compute`` on a cache miss."""
+    table = table or TableOptions()
+    # Renderings depend on the chart sizing or word selection options, so they are cached per variant
+    file_key = f"{key}-{chart.variant if report_format in CHART_FORMATS else table.variant}"
+
+    # Serve a cached rendering straight from disk
+    cached_path = result_cache.get_file(file_key, report_format)
+    if cached_path is not None:
+        if report_format == "json":
+            response = FileResponse(cached_path, media_type="application/json")
+        else:
+            response = file_response(cached_path, f"{OUTPUT_FILE_PREFIX}_{key[:16]}.{report_format}")
+        response.headers["X-Cache"] = "HIT"
+        return response
+
+    word_stats = result_cache.get(key)
+    cache_status = "HIT"
+    if word_stats is None:
+        cache_status = "MISS"
+        # Preprocess the text and get word statistics
+        word_stats = compute()
+
+        if word_stats.empty:
+            raise HTTPException(status_code=500, detail="No words found after processing data.")
+
+        result_cache.put(key, word_stats)
+
+    with stage("render"):
+        response = render(word_stats, report_format, file_key, chart, table)
+    response.headers["X-Cache"] = cache_status
+    return response
+
+def chart_options(report_format: str, top_n: int | None, width: float, height: float, dpi: int):
+    """Return the chart options. ``top_n`` also selects json/csv words, so its chart bound is checked here."""
+    if report_format in CHART_FORMATS and top_n is not None and top_n > CHART_MAX_TOP_N:
+        raise HTTPException(status_code=400, detail=f"Charts show at most {CHART_MAX_TOP_N} words (top_n).")
+    if report_format not in CHART_FORMATS or top_n is None:
+        top_n = DEFAULT_TOP_N_WORDS
+    return ChartOptions(top_n=top_n, width=width, height=height, dpi=dpi)
+
+def counting_options(n: int, approximate: bool, max_error: float):
+    if approximate and n > 1:
+        raise HTTPException(status_code=400, detail="Approximate counting supports single words only (n=1).")
+    return CountingOptions(n=n, approximate=approximate, max_error=max_error)
+
+async def run_analysis(text: str, report_format: str, chart: ChartOptions, counting: CountingOptions = None,
+                       table: TableOptions = None):
+    """Run :func:`analyze` off the event loop, failing fast with 429 when the queue is full."""
+    try:
+        return await analysis_executor.run(analyze, text, report_format, chart, counting, table)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail="Too many analyses in progress. Please retry later.",
+                            headers={"Retry-After": str(e.retry_after)})
+
+def top_counts(counts: Counter, top_n: int = None):
+    """Return ``{word: count}`` by descending count, keeping the ``top_n`` most frequent words if set."""
+    table = FrequencyTable.from_counter(counts)
+    return (table.top_k(top_n) if top_n else table.sorted()).to_dict()
+
+def document_pairs(documents: list):
+    """Return ``(doc_id, text)`` pairs, ids defaulting to the position in the list."""
+    return [(doc_id, document.text) for doc_id, document in zip(document_ids(documents), documents)]
+
+def analyze_batch(documents, aggregate: bool, top_n: int = None):
+    """Analyze a JSON batch and build the response. Blocking; runs on the analysis executor."""
+    total = Counter() if aggregate else None
+    results = [{"id": doc_id, COUNTS_COLUMN: top_counts(counts, top_n)}
+               for doc_id, counts in batch.analyze_documents(documents, total)]
+    data = {"documents": results}
+    if total is not None:
+        data["aggregate"] = {COUNTS_COLUMN: top_counts(total, top_n)}
+    content = TextStatsResponse(status="success",
+                                message=f"Analyzed {len(results)} documents.",
+                                data=data).model_dump_json()
+    return Response(content, media_type=OUTPUT_MEDIA_TYPES["json"])
+
+def ndjson_line(item: dict) -> bytes:
+    return dumps(item) + b"\n"
+
+def analyze_ndjson_batch(documents: list, total: Counter, top_n: int = None) -> bytes:
+    """Analyze one NDJSON batch and return its result lines. Blocking; runs on the analysis executor."""
+    return b"".join(ndjson_line({"id": doc_id, COUNTS_COLUMN: top_counts(counts, top_n)})
+                   for doc_id, counts in batch.count_batch(documents, total))
+
+def parse_ndjson_document(line: bytes, index: int):
+    """Return ``(doc_id, text)`` for one NDJSON line, raising ValueError when it is invalid."""
+    try:
+        document = BatchDocument.model_validate_json(line)
+    except ValidationError as e:
+        raise ValueError(f"Invalid document on line {index + 1}: {e.errors()[0]['msg']}")
+    return (index if document.id is None else document.id), document.text
+
+async def iter_ndjson_documents(chunks):
+    """Yield ``(doc_id, text)`` for each line of an NDJSON body as its ``chunks`` stream in."""
+    index = 0
+    parts = []  # pieces of a line that spans several body chunks
+    async for chunk in chunks:
+        *lines, rest = chunk.split(b"\n")
+        if lines:
+            lines[0] = b"".join(parts) + lines[0]
+            parts = []
+        for line in lines:
+            if line.strip():
+                yield parse_ndjson_document(line, index)
+            index += 1
+        if rest:
+            parts.append(rest)
+    line = b"".join(parts)
+    if line.strip():
+        yield parse_ndjson_document(line, index)
+
+async def iter_ndjson_batches(chunks):
+    """Group the documents of an NDJSON body into batches bounded like :func:`batch.iter_batches`."""
+    documents, size = [], 0
+    async for doc_id, text in iter_ndjson_documents(chunks):
+        if documents and (len(documents) >= BATCH_MAX_DOCUMENTS or size + len(text) > BATCH_MAX_CHARS):
+            yield documents
+            documents, size = [], 0
+        documents.append((doc_id, text))
+        size += len(text)
+    if documents:
+        yield documents
+
+async def stream_ndjson_batches(first_lines: bytes, batches, total: Counter, top_n: int = None):
+    """Stream the remaining batches, waiting for executor capacity instead of failing mid-response."""
+    yield first_lines
+    try:
+        async for documents in batches:
+            while True:
+                try:
+                    yield await analysis_executor.run(analyze_ndjson_batch, documents, total, top_n)
+                    break
+                except QueueFullError as e:
+                    await asyncio.sleep(e.retry_after)
+    except ValueError as e:
+        print(f"Error raised while reading the NDJSON batch: {e}")
+        yield ndjson_line({"error": str(e)})
+        return
+    if total is not None:
+        yield ndjson_line({"aggregate": {COUNTS_COLUMN: top_counts(total, top_n)}})
 
 @app.post("/analyses/text")
 async def analyze_text(request: TextStatsRequest):
@@ -36,34 +368,11 @@ async def analyze_text(request: TextStatsRequest):
         if request.text is None or request.text.strip() == "":
             raise HTTPException(status_code=400, detail="Input text must not be empty or whitespace-only.")
 
-        # Preprocessing data
-        token = ts.preprocessing(request.text)
-        # Get word statistics
-        word_stats = ts.statistics(token)
-
-        # Validate Dataframe structure
-        if word_stats.empty:
-            raise HTTPException(status_code=500, detail="No words found after processing data.")
-
-        if WORDS_COLUMN not in word_stats.columns:
-            raise HTTPException(status_code=500, detail="Invalid Dataframe structure.")
-        
-        if report_format == "json":
-            return TextStatsResponse(status="success",
-                                    message="Text analysis completed successfully.",
-                                    data=word_stats.set_index(WORDS_COLUMN).to_dict("dict"))
-        elif report_format == "csv":
-            fname = f"{OUTPUT_FILE_PREFIX}_{time.time_ns()}"
-            download_name = f"{fname}.csv"
-            ts.export_results(word_stats, download_name, OUTPUT_DIR)
-            path_file = os.path.join(OUTPUT_DIR, download_name)
-            return FileResponse(path_file, headers={"Content-Disposition": f"attachment; filename={download_name}"})
-        elif report_format == "png":
-            fname = f"{OUTPUT_FILE_PREFIX}_{time.time_ns()}"
-            download_name = f"{fname}.png"
-            ts.visualize_results(word_stats, download_name, OUTPUT_DIR)
-            path_file = os.path.join(OUTPUT_DIR, download_name)
-            return FileResponse(path_file, headers={"Content-Disposition": f"attachment; filename={download_name}"})
+        chart = chart_options(report_format, request.top_n, request.width, request.height, request.dpi)
+        counting = counting_options(request.n, request.approximate, request.max_error)
+        table = TableOptions(top_n=request.top_n, offset=request.offset, min_count=request.min_count,
+                             columnar=request.columnar)
+        return await run_analysis(request.text, report_format, chart, counting, table)
 
     except HTTPException:
         raise
@@ -73,7 +382,17 @@ async def analyze_text(request: TextStatsRequest):
 
 @app.post("/analyses/file")
 async def analyze_file(file: Annotated[UploadFile, File(...)],
-                       output_format: Annotated[str, Form()] = DEFAULT_OUTPUT_FORMAT):
+                       output_format: Annotated[str, Form()] = DEFAULT_OUTPUT_FORMAT,
+                       top_n: Annotated[int | None, Form(ge=1)] = None,
+                       offset: Annotated[int, Form(ge=0)] = 0,
+                       min_count: Annotated[int, Form(ge=1)] = 1,
+                       columnar: Annotated[bool, Form()] = False,
+                       width: Annotated[float, Form(gt=0, le=CHART_MAX_SIZE)] = CHART_WIDTH,
+                       height: Annotated[float, Form(gt=0, le=CHART_MAX_SIZE)] = CHART_HEIGHT,
+                       dpi: Annotated[int, Form(ge=10, le=CHART_MAX_DPI)] = CHART_DPI,
+                       n: Annotated[int, Form(ge=1, le=NGRAM_MAX_N)] = 1,
+                       approximate: Annotated[bool, Form()] = False,
+                       max_error: Annotated[float, Form(ge=SKETCH_MIN_ERROR, lt=1)] = SKETCH_DEFAULT_ERROR):
     try:
         report_format = output_format
         if report_format not in SUPPORTED_OUTPUT_FORMATS:
@@ -85,34 +404,10 @@ async def analyze_file(file: Annotated[UploadFile, File(...)],
         if text.strip() == "":
             raise HTTPException(status_code=400, detail="Input text must not be empty or whitespace-only.")
 
-        # Preprocessing data
-        token = ts.preprocessing(text)
-        # Get word statistics
-        word_stats = ts.statistics(token)
-
-        # Validate Dataframe structure
-        if word_stats.empty:
-            raise HTTPException(status_code=500, detail="No words found after processing data.")
-
-        if WORDS_COLUMN not in word_stats.columns:
-            raise HTTPException(status_code=500, detail="Invalid Dataframe structure.")
-
-        if report_format == "json":
-            return TextStatsResponse(status="success",
-                                    message="Text analysis completed successfully.",
-                                    data=word_stats.set_index(WORDS_COLUMN).to_dict("dict"))
-        elif report_format == "csv":
-            fname = f"{OUTPUT_FILE_PREFIX}_{time.time_ns()}"
-            download_name = f"{fname}.csv"
-            ts.export_results(word_stats, download_name, OUTPUT_DIR)
-            path_file = os.path.join(OUTPUT_DIR, download_name)
-            return FileResponse(path_file, headers={"Content-Disposition": f"attachment; filename={download_name}"})
-        elif report_format == "png":
-            fname = f"{OUTPUT_FILE_PREFIX}_{time.time_ns()}"
-            download_name = f"{fname}.png"
-            ts.visualize_results(word_stats, download_name, OUTPUT_DIR)
-            path_file = os.path.join(OUTPUT_DIR, download_name)
-            return FileResponse(path_file, headers={"Content-Disposition": f"attachment; filename={download_name}"})
+        chart = chart_options(report_format, top_n, width, height, dpi)
+        counting = counting_options(n, approximate, max_error)
+        table = TableOptions(top_n=top_n, offset=offset, min_count=min_count, columnar=columnar)
+        return await run_analysis(text, report_format, chart, counting, table)
 
     except UnicodeDecodeError:
         print(f"Failed to decode uploaded file '{file.filename}' as UTF-8 text.")
@@ -123,6 +418,349 @@ async def analyze_file(file: Annotated[UploadFile, File(...)],
         print(f"Error raised while analyzing the input file: {e}")
         raise HTTPException(status_code=500, detail="Error while analyzing file.")
 
+@app.post("/analyses/local")
+async def analyze_local_file(request: LocalFileRequest):
+    """
+    Analyze a file that is already on the server, without uploading it.
+
+    ``path`` is looked up in the ``LOCAL_DATA_DIRS`` allow-list. The file is
+    memory-mapped and decoded chunk by chunk, invalid UTF-8 being handled by
+    the ``errors`` policy.
+    """
+    report_format = request.output_format
+    if report_format not in SUPPORTED_OUTPUT_FORMATS:
+        raise HTTPException(status_code=415, detail="The format is not supported by the server.")
+    try:
+        path = ts.resolve_data_path(request.path)
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if os.path.getsize(path) == 0:
+        raise HTTPException(status_code=400, detail="Input text must not be empty or whitespace-only.")
+
+    chart = chart_options(report_format, request.top_n, request.width, request.height, request.dpi)
+    counting = counting_options(request.n, request.approximate, request.max_error)
+    table = TableOptions(top_n=request.top_n, offset=request.offset, min_count=request.min_count,
+                         columnar=request.columnar)
+    try:
+        return await analysis_executor.run(analyze_local, path, request.errors, report_format, chart, counting, table)
+    except UnicodeError as e:
+        print(f"Failed to decode local file '{request.path}': {e}")
+        raise HTTPException(status_code=400, detail=f"{e}. Set errors to 'replace' or 'ignore' to analyze it anyway.")
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail="Too many analyses in progress. Please retry later.",
+                            headers={"Retry-After": str(e.retry_after)})
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error raised while analyzing local file '{request.path}': {e}")
+        raise HTTPException(status_code=500, detail="Error while analyzing file.")
+
+@app.post("/analyses/batch")
+async def analyze_batch_documents(request: Request,
+                                  aggregate: bool = False,
+                                  top_n: Annotated[int | None, Query(ge=1)] = None):
+    """
+    Analyze many documents in one request.
+
+    A JSON body (:class:`BatchRequest`) gets a JSON response. An NDJSON body
+    (one ``{"id", "text"}`` object per line, options as query parameters) is
+    read and answered line by line, one batch at a time.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    try:
+        if content_type == "application/x-ndjson":
+            total = Counter() if aggregate else None
+            batches = iter_ndjson_batches(request.stream())
+            try:
+                first = await anext(batches, None)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if first is None:
+                raise HTTPException(status_code=400, detail="The batch must contain at least one document.")
+            first_lines = await analysis_executor.run(analyze_ndjson_batch, first, total, top_n)
+            return BodyStreamingResponse(stream_ndjson_batches(first_lines, batches, total, top_n),
+                                         media_type=OUTPUT_MEDIA_TYPES["ndjson"])
+
+        try:
+            body = BatchRequest.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+        if not body.documents:
+            raise HTTPException(status_code=400, detail="The batch must contain at least one document.")
+        return await analysis_executor.run(analyze_batch, document_pairs(body.documents), body.aggregate, body.top_n)
+
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail="Too many analyses in progress. Please retry later.",
+                            headers={"Retry-After": str(e.retry_after)})
+    except (HTTPException, RequestValidationError):
+        raise
+    except Exception as e:
+        print(f"Error raised while analyzing the batch: {e}")
+        raise HTTPException(status_code=500, detail="Error while analyzing batch.")
+
+@app.post("/analyses/stream")
+async def analyze_stream(request: Request,
+                         top_n: Annotated[int, Query(ge=1, le=CORPUS_MAX_RESULTS)] = DEFAULT_TOP_N_WORDS,
+                         interval: Annotated[float, Query(ge=STREAM_SNAPSHOT_MIN_INTERVAL)] = STREAM_SNAPSHOT_INTERVAL,
+                         errors: Annotated[str, Query(pattern=f"^({'|'.join(DECODE_ERROR_POLICIES)})$")]
+                         = LOCAL_DECODE_ERRORS):
+    """
+    Analyze a streamed body and report progress while it is processed.
+
+    The body is UTF-8 text (``text/plain``, possibly chunked) or NDJSON
+    documents (``application/x-ndjson``, one ``{"id", "text"}`` object per
+    line). The response is NDJSON: a ``snapshot`` line with the ``top_n`` most
+    frequent words so far every ``interval`` seconds, then a ``result`` line
+    with every word, or an ``error`` line if the rest of the body is invalid.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    state = RunningCounts()
+    chunks = count_bytes(request.stream(), state)
+    if content_type == "application/x-ndjson":
+        units, count = iter_ndjson_batches(chunks), count_documents
+    else:
+        units, count = iter_text_units(chunks, errors), count_text
+    # Read the first unit up front so that an empty or invalid start is answered with 400
+    try:
+        first = await anext(units, None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if first is None:
+        raise HTTPException(status_code=400, detail="Input text must not be empty or whitespace-only.")
+    return BodyStreamingResponse(progressive_results(first, units, count, state, top_n, interval),
+                                 media_type=OUTPUT_MEDIA_TYPES["ndjson"])
+
+def analyze_collection(request: CollectionRequest):
+    """Analyze a document collection and build the response. Blocking; runs on the analysis executor."""
+    reference = None
+    if request.reference is not None:
+        total = Counter()
+        for _ in batch.analyze_documents(document_pairs(request.reference), total):
+            pass
+        reference = FrequencyTable.from_counter(total)
+    elif request.reference_corpus is not None:
+        reference = get_corpus_index().counts(request.reference_corpus)
+    with stage("collection"):
+        matrix = collection.DocumentTermMatrix.from_documents(document_pairs(request.documents))
+        data = collection.summary(matrix, request.top_n, reference, request.sublinear)
+    content = dumps({"status": "success",
+                     "message": f"Analyzed {data['documents']} documents.",
+                     "data": data})
+    return Response(content, media_type=OUTPUT_MEDIA_TYPES["json"])
+
+@app.post("/analyses/collection")
+async def analyze_document_collection(request: CollectionRequest):
+    """
+    TF-IDF, document frequency and keyness of a document collection.
+
+    The response lists the collection totals, its ``top_n`` most frequent
+    terms with their document frequency and IDF, and the ``top_n`` TF-IDF
+    terms of every document. With ``reference`` documents or a stored
+    ``reference_corpus`` it also lists the words most over- and underused
+    compared with the reference (signed log-likelihood and log2 ratio).
+    """
+    if not request.documents:
+        raise HTTPException(status_code=400, detail="The collection must contain at least one document.")
+    if request.reference is not None and request.reference_corpus is not None:
+        raise HTTPException(status_code=400, detail="Pass either reference documents or a reference corpus.")
+    if request.reference is not None and not request.reference:
+        raise HTTPException(status_code=400, detail="The reference must contain at least one document.")
+    if request.reference_corpus is not None:
+        corpus_stats_or_404(request.reference_corpus)
+    try:
+        return await analysis_executor.run(analyze_collection, request)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail="Too many analyses in progress. Please retry later.",
+                            headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        print(f"Error raised while analyzing the collection: {e}")
+        raise HTTPException(status_code=500, detail="Error while analyzing collection.")
+
+MERGE_OUTPUT_FORMATS = ("partial", "json", "csv")
+
+def merge_uploads(files: list, output_format: str):
+    """Merge uploaded partial count files and build the response. Blocking; runs on the analysis executor."""
+    buffer = ts.spool(())
+    try:
+        partials.merge_partials(files, buffer)
+    except Exception:
+        buffer.close()
+        raise
+    buffer.seek(0)
+    if output_format == "partial":
+        return buffer_response(buffer, f"{OUTPUT_FILE_PREFIX}_merged.{PARTIAL_FILE_EXTENSION}",
+                               OUTPUT_MEDIA_TYPES[output_format])
+
+    word_stats = partials.read_table(buffer)
+    buffer.close()
+    if output_format == "json":
+        content = TextStatsResponse(status="success",
+                                    message=f"Merged {len(files)} partial counts.",
+                                    data={COUNTS_COLUMN: word_stats.to_dict()}).model_dump_json()
+        return Response(content, media_type=OUTPUT_MEDIA_TYPES[output_format])
+    return buffer_response(ts.render_csv(word_stats), f"{OUTPUT_FILE_PREFIX}_merged.csv",
+                           OUTPUT_MEDIA_TYPES[output_format])
+
+@app.post("/analyses/merge")
+async def merge_partial_counts(files: Annotated[list[UploadFile], File(...)],
+                               output_format: Annotated[str, Form()] = "partial"):
+    """Reduce partial count files (see ``python -m src.pipeline.main map``) into one result."""
+    if output_format not in MERGE_OUTPUT_FORMATS:
+        raise HTTPException(status_code=415, detail="The format is not supported by the server.")
+    try:
+        return await analysis_executor.run(merge_uploads, [file.file for file in files], output_format)
+    except ValueError as e:
+        print(f"Error raised while merging partial counts: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail="Too many analyses in progress. Please retry later.",
+                            headers={"Retry-After": str(e.retry_after)})
+
+@app.post("/analyses/jobs", status_code=202)
+async def submit_job(file: Annotated[UploadFile, File(...)]):
+    """Queue an uploaded file for background analysis and return the job state."""
+    try:
+        job = await asyncio.to_thread(job_manager.submit, file.file, file.filename)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail="Too many jobs in progress. Please retry later.",
+                            headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        print(f"Error raised while submitting a job: {e}")
+        raise HTTPException(status_code=500, detail="Error while submitting job.")
+    return JSONResponse(job, status_code=202, headers={"Location": f"/analyses/jobs/{job['id']}"})
+
+@app.get("/analyses/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+@app.get("/analyses/jobs/{job_id}/result")
+async def get_job_result(job_id: str,
+                         output_format: str = DEFAULT_OUTPUT_FORMAT,
+                         top_n: Annotated[int | None, Query(ge=1)] = None,
+                         offset: Annotated[int, Query(ge=0)] = 0,
+                         min_count: Annotated[int, Query(ge=1)] = 1,
+                         columnar: bool = False,
+                         width: Annotated[float, Query(gt=0, le=CHART_MAX_SIZE)] = CHART_WIDTH,
+                         height: Annotated[float, Query(gt=0, le=CHART_MAX_SIZE)] = CHART_HEIGHT,
+                         dpi: Annotated[int, Query(ge=10, le=CHART_MAX_DPI)] = CHART_DPI):
+    if output_format not in SUPPORTED_OUTPUT_FORMATS:
+        raise HTTPException(status_code=415, detail="The format is not supported by the server.")
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job["status"] != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}, no result is available.")
+
+    chart = chart_options(output_format, top_n, width, height, dpi)
+    table = TableOptions(top_n=top_n, offset=offset, min_count=min_count, columnar=columnar)
+    try:
+        path = await analysis_executor.run(job_manager.result_path, job_id, output_format, chart, table)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail="Too many analyses in progress. Please retry later.",
+                            headers={"Retry-After": str(e.retry_after)})
+    if path is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if output_format == "json":
+        return FileResponse(path, media_type=OUTPUT_MEDIA_TYPES[output_format])
+    return file_response(path, f"{OUTPUT_FILE_PREFIX}_{job_id[:16]}.{output_format}",
+                         OUTPUT_MEDIA_TYPES[output_format])
+
+@app.delete("/analyses/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job["status"] != CANCELLED:
+        raise HTTPException(status_code=409, detail=f"Job is already {job['status']}.")
+    return job
+
+CorpusName = Annotated[str, FastAPIPath(pattern=CORPUS_NAME_PATTERN)]
+
+def corpus_stats_or_404(name: str):
+    stats = get_corpus_index().stats(name)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Corpus not found.")
+    return stats
+
+@app.post("/corpora/{name}/documents")
+async def append_corpus_document(name: CorpusName, document: CorpusDocument):
+    """Tokenize a document and add its word counts to the corpus, creating the corpus if needed."""
+    if document.text.strip() == "":
+        raise HTTPException(status_code=400, detail="Input text must not be empty or whitespace-only.")
+    check_name(name)
+    try:
+        return await analysis_executor.run(get_corpus_index().append_text, name, document.text, document.id)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail="Too many analyses in progress. Please retry later.",
+                            headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        print(f"Error raised while appending to corpus '{name}': {e}")
+        raise HTTPException(status_code=500, detail="Error while updating corpus.")
+
+@app.get("/corpora")
+async def list_corpora():
+    index = get_corpus_index()
+    return {"corpora": [index.stats(name) for name in index.names()]}
+
+@app.get("/corpora/{name}")
+async def get_corpus(name: CorpusName):
+    return corpus_stats_or_404(name)
+
+@app.get("/corpora/{name}/top")
+async def corpus_top(name: CorpusName,
+                     n: Annotated[int, Query(ge=1, le=CORPUS_MAX_RESULTS)] = DEFAULT_TOP_N_WORDS,
+                     offset: Annotated[int, Query(ge=0)] = 0):
+    corpus_stats_or_404(name)
+    return {COUNTS_COLUMN: get_corpus_index().top(name, n, offset).to_dict()}
+
+@app.get("/corpora/{name}/words")
+async def corpus_words(name: CorpusName,
+                       min_count: Annotated[int, Query(ge=1)] = 1,
+                       max_count: Annotated[int | None, Query(ge=1)] = None,
+                       limit: Annotated[int, Query(ge=1, le=CORPUS_MAX_RESULTS)] = CORPUS_MAX_RESULTS,
+                       offset: Annotated[int, Query(ge=0)] = 0):
+    corpus_stats_or_404(name)
+    return {COUNTS_COLUMN: get_corpus_index().filter(name, min_count, max_count, limit, offset).to_dict()}
+
+@app.get("/corpora/{name}/words/{word}")
+async def corpus_word(name: CorpusName, word: str):
+    corpus_stats_or_404(name)
+    return {"word": word, "count": get_corpus_index().lookup(name, word)}
+
+@app.delete("/corpora/{name}")
+async def delete_corpus(name: CorpusName):
+    if not get_corpus_index().delete(name):
+        raise HTTPException(status_code=404, detail="Corpus not found.")
+    return {"name": name, "deleted": True}
+
+@app.get("/health/live")
+async def health_live():
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def health_ready():
+    state = warmup_state.snapshot()
+    return JSONResponse(state, status_code=200 if warmup_state.ready else 503)
+
+@app.get("/analyses/executor")
+async def executor_stats():
+    return analysis_executor.stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: latency, stage, body size and token histograms, cache, executor and job counters."""
+    return Response(render_metrics(), media_type=METRICS_MEDIA_TYPE)
+
+@app.get("/analyses/cache")
+async def cache_stats():
+    """Result cache counters, with the paragraph token cache under ``tokenization``."""
+    return {**result_cache.stats(), "tokenization": get_token_cache().stats()}
+
 if __name__ == "__main__":
     config = uvicorn.Config(APP_IMPORT_PATH, host=DEFAULT_HOST, port=DEFAULT_PORT, log_level=DEFAULT_LOG_LEVEL)
     server = uvicorn.Server(config)
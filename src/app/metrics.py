@@ -0,0 +1,221 @@
+"""Request instrumentation and Prometheus metrics.
+
+:class:`Instrumentation` times every HTTP request, installs a stage timer (see
+:mod:`src.pipeline.timing`) for the pipeline to report into, adds the stage
+timings to the response as a ``Server-Timing`` header and feeds the
+histograms below. :func:`render_metrics` renders them with the cache,
+executor and job counters in the Prometheus text format.
+"""
+
+import os
+import re
+import threading
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.config.constant import (
+    METRICS_LATENCY_BUCKETS,
+    METRICS_SIZE_BUCKETS,
+    PROFILE_DIR,
+    PROFILE_SLOW_REQUESTS,
+    SERVER_TIMING_ENABLED,
+    SLOW_REQUEST_SECONDS,
+)
+from src.pipeline import timing
+from src.pipeline.token_cache import get_token_cache
+from .cache import result_cache
+from .executor import analysis_executor
+from .jobs import job_manager
+from .profiler import SamplingProfiler
+
+METRICS_PREFIX = "wordfreq"
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs) + "}"
+
+
+class Histogram:
+    """A Prometheus histogram with fixed buckets, one series per label combination."""
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [bucket counts, sum, count]
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        """Yield the exposition lines of every series."""
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{format_labels(self.labelnames, labels, [('le', f'{bound:g}')])} {cumulative}"
+            yield f"{self.name}_bucket{format_labels(self.labelnames, labels, [('le', '+Inf')])} {count}"
+            yield f"{self.name}_sum{format_labels(self.labelnames, labels)} {total:g}"
+            yield f"{self.name}_count{format_labels(self.labelnames, labels)} {count}"
+
+
+REQUEST_SECONDS = Histogram(f"{METRICS_PREFIX}_request_duration_seconds", "HTTP request latency.",
+                            METRICS_LATENCY_BUCKETS, ("method", "route", "status"))
+STAGE_SECONDS = Histogram(f"{METRICS_PREFIX}_stage_duration_seconds", "Time per pipeline stage and request.",
+                          METRICS_LATENCY_BUCKETS, ("stage",))
+REQUEST_BYTES = Histogram(f"{METRICS_PREFIX}_request_body_bytes", "Request body size.",
+                          METRICS_SIZE_BUCKETS, ("route",))
+REQUEST_TOKENS = Histogram(f"{METRICS_PREFIX}_request_tokens", "Tokens counted per request, after stopwords.",
+                           METRICS_SIZE_BUCKETS, ("route",))
+HISTOGRAMS = (REQUEST_SECONDS, STAGE_SECONDS, REQUEST_BYTES, REQUEST_TOKENS)
+
+
+def observe_request(method, route, status, seconds, body_bytes, timer):
+    REQUEST_SECONDS.observe(seconds, method, route, str(status))
+    for stage, stage_seconds in list(timer.stages.items()):
+        STAGE_SECONDS.observe(stage_seconds, stage)
+    if body_bytes:
+        REQUEST_BYTES.observe(body_bytes, route)
+    tokens = timer.values.get("tokens")
+    if tokens is not None:
+        REQUEST_TOKENS.observe(tokens, route)
+
+
+def render_value(name, documentation, value, metric_type="gauge", labelname=None):
+    """Return the exposition lines of a metric; ``value`` maps label values to values when ``labelname`` is set."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}"]
+    if labelname is None:
+        lines.append(f"{name} {value:g}")
+    else:
+        lines += [f"{name}{format_labels((labelname,), (label,))} {label_value:g}" for label, label_value in value.items()]
+    return lines
+
+
+def render_metrics():
+    """Return every metric in the Prometheus text exposition format."""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+
+    cache = result_cache.stats()
+    prefix = f"{METRICS_PREFIX}_cache"
+    lines += render_value(f"{prefix}_hits_total", "Result cache memory tier hits.", cache["hits"], "counter")
+    lines += render_value(f"{prefix}_misses_total", "Result cache memory tier misses.", cache["misses"], "counter")
+    lines += render_value(f"{prefix}_disk_hits_total", "Result cache disk tier hits.", cache["disk_hits"], "counter")
+    lines += render_value(f"{prefix}_evictions_total", "Result cache evictions.", cache["evictions"], "counter")
+    lines += render_value(f"{prefix}_entries", "Entries in the result cache memory tier.", cache["entries"])
+    lines += render_value(f"{prefix}_bytes", "Bytes held by the result cache memory tier.", cache["bytes"])
+
+    tokens = get_token_cache().stats()
+    prefix = f"{METRICS_PREFIX}_token_cache"
+    lines += render_value(f"{prefix}_hits_total", "Texts whose tokens came from the token cache.", tokens["hits"], "counter")
+    lines += render_value(f"{prefix}_misses_total", "Texts tokenized by underthesea.", tokens["misses"], "counter")
+    lines += render_value(f"{prefix}_saved_bytes_total", "Input bytes not tokenized again thanks to the cache.",
+                          tokens["bytes_saved"], "counter")
+    lines += render_value(f"{prefix}_evictions_total", "Token cache evictions.", tokens["evictions"], "counter")
+    lines += render_value(f"{prefix}_entries", "Texts in the token cache.", tokens["entries"])
+    lines += render_value(f"{prefix}_bytes", "Bytes held by the token cache.", tokens["bytes"])
+
+    executor = analysis_executor.stats()
+    prefix = f"{METRICS_PREFIX}_executor"
+    lines += render_value(f"{prefix}_running", "Analyses running.", executor["running"])
+    lines += render_value(f"{prefix}_queued", "Analyses waiting for a worker.", executor["queued"])
+    lines += render_value(f"{prefix}_completed_total", "Analyses completed.", executor["completed"], "counter")
+    lines += render_value(f"{prefix}_rejected_total", "Analyses rejected with 429.", executor["rejected"], "counter")
+    lines += render_value(f"{prefix}_queue_wait_max_seconds", "Longest queue wait so far.", executor["queue_wait_max"])
+
+    lines += render_value(f"{METRICS_PREFIX}_jobs", "Background jobs per status.", job_manager.stats(),
+                          labelname="status")
+    return "\n".join(lines) + "\n"
+
+
+class Instrumentation:
+    """
+    Pure ASGI middleware that times requests and their pipeline stages.
+
+    The ``Server-Timing`` header lists the stages measured before the response
+    started (``receive`` is the time spent waiting for body bytes, ``queue``
+    the wait for an analysis worker). With ``profile_slow_requests`` the stacks
+    of every request are sampled, and the profiles of requests slower than
+    ``slow_request_seconds`` are written to ``profile_dir``.
+    """
+
+    def __init__(self, app: ASGIApp,
+                 server_timing: bool = SERVER_TIMING_ENABLED,
+                 profile_slow_requests: bool = PROFILE_SLOW_REQUESTS,
+                 slow_request_seconds: float = SLOW_REQUEST_SECONDS,
+                 profile_dir: str = PROFILE_DIR) -> None:
+        self.app = app
+        self.server_timing = server_timing
+        self.profile_slow_requests = profile_slow_requests
+        self.slow_request_seconds = slow_request_seconds
+        self.profile_dir = profile_dir
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer, token = timing.start()
+        profiler = SamplingProfiler(timer.threads).start() if self.profile_slow_requests else None
+        body_bytes = 0
+        status = 500
+
+        async def timed_receive() -> Message:
+            nonlocal body_bytes
+            started = time.perf_counter()
+            message = await receive()
+            if message["type"] == "http.request":
+                body_bytes += len(message.get("body", b""))
+                timer.add("receive", time.perf_counter() - started)
+            return message
+
+        async def timed_send(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", timer.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, timed_receive, timed_send)
+        finally:
+            timing.reset(token)
+            seconds = timer.elapsed
+            route = getattr(scope.get("route"), "path", "unmatched")
+            observe_request(scope["method"], route, status, seconds, body_bytes, timer)
+            if profiler is not None:
+                profiler.stop()
+                if seconds >= self.slow_request_seconds:
+                    self.save_profile(profiler, scope, seconds, timer)
+
+    def save_profile(self, profiler, scope, seconds, timer):
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{scope['method']}{_UNSAFE_NAME.sub('_', scope['path'])}.folded"
+        path = profiler.write(os.path.join(self.profile_dir, name))
+        print(f"Slow request {scope['method']} {scope['path']} took {seconds:.2f}s "
+              f"({timer.server_timing()}); profile written to {path}")
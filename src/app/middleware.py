@@ -1,119 +1,331 @@
+import zlib
 from starlette import status
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.requests import Request
-from starlette.responses import Response
-from starlette.types import ASGIApp
-import re
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.config.constant import (
+    BROTLI_QUALITY,
+    COMPRESSIBLE_MEDIA_TYPES,
+    COMPRESSION_MIN_SIZE,
+    GZIP_COMPRESSION_LEVEL,
+    MAX_MULTIPART_HEADER_SIZE,
+    MAX_UPLOAD_SIZE,
+)
+
+try:
+    import brotli
+except ImportError:  # optional dependency, responses fall back to gzip
+    brotli = None
 
 ALLOWED_METHODS = ['POST', 'PUT', 'PATCH']
 
-def get_content_type_from_body(body: bytes) -> str | None:
-    content_type_match = re.search(rb'Content-Type: ([^\r\n]+)', body)
-    if content_type_match:
-        return content_type_match.group(1).decode("utf-8")
+class UploadRejected(Exception):
+    """Raised from the wrapped ``receive`` channel once an upload is refused."""
+
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+def get_boundary(content_type_header: str) -> bytes | None:
+    """Return the multipart boundary declared in a Content-Type header."""
+    for param in content_type_header.split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.strip().lower() == "boundary" and value:
+            return value.strip().strip('"').encode("latin-1")
     return None
 
-def set_body(request: Request, body: bytes):
+class MultipartHeaderScanner:
     """
-    Override the request's internal receive channel so the given body can be
-    read again by downstream handlers.
-    
-    This function mutates the provided ``request`` in place by replacing its
-    low-level ``_receive`` callable with one that always returns the supplied
-    ``body`` bytes. This is useful in ASGI/Starlette applications where the
-    request body stream can normally be consumed only once.
-
-    :param request: The Starlette Request object whose body receive handler
-                    should be overridden.
-    :param body: The raw HTTP request body to expose to downstream consumers.
+    Incrementally find the part headers of a multipart body.
+
+    Only the header block of each part is buffered; part payloads are skipped
+    while scanning for the next delimiter, keeping just enough trailing bytes
+    to detect a delimiter split across chunks.
+
+    :param boundary: The multipart boundary from the request Content-Type.
+    :param max_header_size: Largest header block accepted for a single part.
     """
-    async def receive():
-        return {"type": "http.request", "body": body}
-    request._receive = receive # Restore the body so downstream code can read it again
 
-async def get_body(request: Request) -> bytes:
+    def __init__(self, boundary: bytes, max_header_size: int = MAX_MULTIPART_HEADER_SIZE) -> None:
+        self.delimiter = b"--" + boundary
+        self.max_header_size = max_header_size
+        self.buffer = b""
+        self.in_headers = False
+        self.finished = False
+        self.content_types = []
+
+    def feed(self, data: bytes) -> list:
+        """Consume a body chunk and return the part Content-Types completed in it."""
+        found = []
+        if self.finished:
+            return found
+        self.buffer += data
+        while True:
+            if self.in_headers:
+                line_end = self.buffer.find(b"\r\n")
+                end = self.buffer.find(b"\r\n\r\n", max(line_end, 0))
+                if line_end < 0 or end < 0:
+                    if len(self.buffer) > self.max_header_size:
+                        raise ValueError("Multipart part headers are too large.")
+                    break
+                content_type = self._parse_content_type(self.buffer[line_end:end])
+                if content_type:
+                    found.append(content_type)
+                self.buffer = self.buffer[end + 4:]
+                self.in_headers = False
+            else:
+                idx = self.buffer.find(self.delimiter)
+                if idx < 0:
+                    # Drop the payload, keep a tail that may hold a partial delimiter
+                    self.buffer = self.buffer[-(len(self.delimiter) - 1):]
+                    break
+                after = idx + len(self.delimiter)
+                if len(self.buffer) < after + 2:
+                    self.buffer = self.buffer[idx:]
+                    break
+                if self.buffer[after:after + 2] == b"--":
+                    self.finished = True
+                    self.buffer = b""
+                    break
+                self.buffer = self.buffer[after:]
+                self.in_headers = True
+        self.content_types.extend(found)
+        return found
+
+    @staticmethod
+    def _parse_content_type(header_block: bytes) -> str | None:
+        for line in header_block.split(b"\r\n"):
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-type":
+                return value.decode("latin-1").split(";")[0].strip().lower()
+        return None
+
+class LimitUpload:
     """
-    Read and return the full request body, while preserving it for reuse.
+    Pure ASGI middleware that guards request bodies while they stream in.
 
-    This helper reads the body from the given ``request`` once, then calls
-    :func:`set_body` so that subsequent handlers can read the same body again
-    without encountering an already-consumed stream.
+    The request Content-Type header is checked up front. Body bytes are counted
+    as the downstream app receives them, and the request is aborted with 413
+    as soon as ``max_upload_size`` is passed, whatever Content-Length claims.
+    For multipart bodies only the part headers are inspected, and each part
+    Content-Type must be in ``allowed_file_content_type`` or in the extra
+    types ``path_file_content_types`` allows for the request path.
 
-    :param request: The Starlette Request whose body should be read.
-    :return: The complete request body as a bytes object.
+    When a violation is found the downstream app's own response (usually a
+    form-parsing error) is discarded and the rejection is sent instead.
     """
-    body = await request.body()
-    set_body(request, body)
-    return body
 
-class LimitUploadSize(BaseHTTPMiddleware):
-    def __init__(self, app: ASGIApp, max_upload_size: int = 5_000_000) -> None:
-        super().__init__(app)
+    def __init__(self, app: ASGIApp,
+                 max_upload_size: int = MAX_UPLOAD_SIZE,
+                 allowed_content_type_header: list = None,
+                 allowed_file_content_type: list = None,
+                 path_file_content_types: dict = None) -> None:
+        self.app = app
         self.max_upload_size = max_upload_size
+        self.allowed_content_type_header = allowed_content_type_header
+        self.allowed_file_content_type = allowed_file_content_type
+        self.path_file_content_types = path_file_content_types or {}
+
+    @staticmethod
+    async def reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str) -> None:
+        response = JSONResponse(status_code=status_code, content={"detail": detail})
+        await response(scope, receive, send)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ALLOWED_METHODS:
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        if request.method in ALLOWED_METHODS:
-            if 'content-length' not in request.headers:
-                return Response(status_code=status.HTTP_411_LENGTH_REQUIRED,
-                                content='{"detail":"Content-Length header is required for file uploads."}',
-                                media_type="application/json")
-            content_length_header = request.headers['content-length']
-            
+        headers = Headers(scope=scope)
+        content_type_header = headers.get("content-type", "")
+        if not content_type_header:
+            await self.reject(scope, receive, send, status.HTTP_400_BAD_REQUEST,
+                              "Content-Type from request header is required.")
+            return
+
+        if "content-length" in headers:
             try:
-                content_length = int(content_length_header)
+                content_length = int(headers["content-length"])
             except ValueError:
                 print("Error while converting the content-length header to integer.")
-                return Response(status_code=status.HTTP_400_BAD_REQUEST,
-                                content='{"detail":"Content-Length should be a numeric value"}',
-                                media_type="application/json")
-
+                await self.reject(scope, receive, send, status.HTTP_400_BAD_REQUEST,
+                                  "Content-Length should be a numeric value")
+                return
             if content_length > self.max_upload_size:
-                return Response(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                                content='{"detail":"Uploaded content exceeds the maximum allowed size."}',
-                                media_type="application/json")
-        return await call_next(request)
-
-class LimitUploadContentType(BaseHTTPMiddleware):
-    def __init__(self, app: ASGIApp, 
-                 allowed_content_type_header: list = None, 
-                 allowed_file_content_type: list = None) -> None:
-        super().__init__(app)
-        self.allowed_file_content_type = allowed_file_content_type
-        self.allowed_content_type_header = allowed_content_type_header
+                await self.reject(scope, receive, send, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                  "Uploaded content exceeds the maximum allowed size.")
+                return
+
+        content_type = content_type_header.split(';')[0].strip()
+        scanner = None
+        if content_type == "multipart/form-data":
+            boundary = get_boundary(content_type_header)
+            if not boundary:
+                await self.reject(scope, receive, send, status.HTTP_400_BAD_REQUEST,
+                                  "Error reading or parsing request body.")
+                return
+            scanner = MultipartHeaderScanner(boundary)
+        elif self.allowed_content_type_header is not None and content_type not in self.allowed_content_type_header:
+            await self.reject(scope, receive, send, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                              "Content-Type header is not allowed.")
+            return
+
+        allowed_file_content_type = self.allowed_file_content_type
+        if allowed_file_content_type is not None and scope["path"] in self.path_file_content_types:
+            allowed_file_content_type = allowed_file_content_type + self.path_file_content_types[scope["path"]]
+
+        received = 0
+        rejection = None
+        response_started = False
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        if request.method in ALLOWED_METHODS:
-            content_type_header = request.headers.get("Content-Type", "")
+        async def guarded_receive() -> Message:
+            nonlocal received, rejection
+            if rejection is not None:
+                raise rejection
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
 
-            if not content_type_header:
-                return Response(status_code=status.HTTP_400_BAD_REQUEST,
-                                content='{"detail":"Content-Type from request header is required."}',
-                                media_type="application/json")
+            body = message.get("body", b"")
+            received += len(body)
+            if received > self.max_upload_size:
+                rejection = UploadRejected(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                           "Uploaded content exceeds the maximum allowed size.")
+                raise rejection
 
-            if content_type_header.startswith("multipart/form-data"):
+            if scanner is not None:
                 try:
-                    body = await get_body(request)
-                    file_content_type = get_content_type_from_body(body)
-                except (RuntimeError, ValueError) as e:
+                    part_content_types = scanner.feed(body)
+                except ValueError as e:
                     print(f"Error processing request body: {e}")
-                    return Response(status_code=status.HTTP_400_BAD_REQUEST,
-                                    content='{"detail":"Error reading or parsing request body."}',
-                                    media_type="application/json")
-            
-                if not file_content_type:
-                    return Response(status_code=status.HTTP_400_BAD_REQUEST,
-                                    content='{"detail":"Content-Type from request body is not found."}',
-                                    media_type="application/json")
-                
-                if self.allowed_file_content_type is not None and file_content_type not in self.allowed_file_content_type:
-                    return Response(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
-                                    content='{"detail":"Uploaded file type is not allowed."}',
-                                    media_type="application/json")
-            else:
-                content_type = content_type_header.split(';')[0].strip()
-                if self.allowed_content_type_header is not None and content_type not in self.allowed_content_type_header:
-                    return Response(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
-                                    content='{"detail":"Content-Type header is not allowed."}',
-                                    media_type="application/json")
-                
-        return await call_next(request)
+                    rejection = UploadRejected(status.HTTP_400_BAD_REQUEST, "Error reading or parsing request body.")
+                    raise rejection
+                for part_content_type in part_content_types:
+                    if allowed_file_content_type is not None and part_content_type not in allowed_file_content_type:
+                        rejection = UploadRejected(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                                   "Uploaded file type is not allowed.")
+                        raise rejection
+                if not message.get("more_body", False) and not scanner.content_types:
+                    rejection = UploadRejected(status.HTTP_400_BAD_REQUEST,
+                                               "Content-Type from request body is not found.")
+                    raise rejection
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            if rejection is not None and not response_started:
+                # Drop whatever the app answered to the aborted body
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, guarded_receive, guarded_send)
+        except UploadRejected:
+            pass
+        except Exception:
+            if rejection is None:
+                raise
+
+        if rejection is not None and not response_started:
+            await self.reject(scope, receive, send, rejection.status_code, rejection.detail)
+
+def negotiate_encoding(accept_encoding: str, available: tuple) -> str | None:
+    """Return the first of ``available`` that an Accept-Encoding header allows, or None for identity."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.strip().lower().split(";")
+        weight = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if coding:
+            weights[coding.strip()] = weight
+    for coding in available:
+        if weights.get(coding, weights.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+class Compressor:
+    """Incremental gzip or brotli compression of a response body."""
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress a chunk, flushing it so streamed lines reach the client, and end the stream if ``final``."""
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class CompressResponse:
+    """
+    Pure ASGI middleware that compresses responses with gzip or brotli.
+
+    The encoding is negotiated from the request Accept-Encoding header (br
+    first, when the brotli package is installed). Only ``media_types`` are
+    compressed, and a response sent in one message is left alone below
+    ``min_size`` bytes. Streamed bodies are compressed chunk by chunk and
+    flushed after each one, so NDJSON lines are not held back.
+    """
+
+    def __init__(self, app: ASGIApp,
+                 min_size: int = COMPRESSION_MIN_SIZE,
+                 media_types: tuple = COMPRESSIBLE_MEDIA_TYPES) -> None:
+        self.app = app
+        self.min_size = min_size
+        self.media_types = media_types
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = None
+        if scope["type"] == "http" and scope["method"] != "HEAD":
+            encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None  # held back until the first body message shows whether to compress
+        compressor = None
+
+        async def compressing_send(message: Message) -> None:
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is not None:
+                headers = MutableHeaders(scope=start)
+                body = message.get("body", b"")
+                more_body = message.get("more_body", False)
+                media_type = headers.get("content-type", "").split(";")[0].strip()
+                if (message["type"] == "http.response.body" and "content-encoding" not in headers
+                        and media_type in self.media_types and (more_body or len(body) >= self.min_size)):
+                    compressor = Compressor(encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers.add_vary_header("Accept-Encoding")
+                    message = {**message, "body": compressor.compress(body, final=not more_body)}
+                    if more_body:
+                        del headers["content-length"]
+                    else:
+                        headers["Content-Length"] = str(len(message["body"]))
+                await send(start)
+                start = None
+                await send(message)
+                return
+            if compressor is not None and message["type"] == "http.response.body":
+                more_body = message.get("more_body", False)
+                message = {**message, "body": compressor.compress(message.get("body", b""), final=not more_body)}
+            await send(message)
+
+        await self.app(scope, receive, compressing_send)
@@ -1,10 +1,103 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
+from src.config.constant import (
+    CHART_DPI,
+    CHART_HEIGHT,
+    CHART_MAX_DPI,
+    CHART_MAX_SIZE,
+    CHART_MAX_TOP_N,
+    CHART_WIDTH,
+    CORPUS_MAX_RESULTS,
+    CORPUS_NAME_PATTERN,
+    DECODE_ERROR_POLICIES,
+    DEFAULT_TOP_N_WORDS,
+    LOCAL_DECODE_ERRORS,
+    NGRAM_MAX_N,
+    SKETCH_DEFAULT_ERROR,
+    SKETCH_MIN_ERROR,
+)
 
-class TextStatsRequest(BaseModel):
+class ChartOptions(BaseModel):
+    top_n: int = Field(DEFAULT_TOP_N_WORDS, ge=1, le=CHART_MAX_TOP_N)
+    width: float = Field(CHART_WIDTH, gt=0, le=CHART_MAX_SIZE) # inches
+    height: float = Field(CHART_HEIGHT, gt=0, le=CHART_MAX_SIZE) # inches
+    dpi: int = Field(CHART_DPI, ge=10, le=CHART_MAX_DPI)
+
+    @property
+    def variant(self) -> str:
+        """Identify these options in cache keys."""
+        return f"{self.top_n}-{self.width:g}x{self.height:g}-{self.dpi}"
+
+class CountingOptions(BaseModel):
+    n: int = Field(1, ge=1, le=NGRAM_MAX_N) # count n-grams of n consecutive words
+    approximate: bool = False # Space-Saving heavy hitters instead of exact counts
+    max_error: float = Field(SKETCH_DEFAULT_ERROR, ge=SKETCH_MIN_ERROR, lt=1) # relative to the token total
+
+    @property
+    def key_params(self) -> tuple:
+        """Extra cache key parts; exact single-word counting keeps the plain text key."""
+        params = ("ngram", self.n) if self.n > 1 else ()
+        return params + (("space_saving", self.max_error) if self.approximate else ())
+
+class TableOptions(BaseModel):
+    # json/csv: most frequent words returned, all when unset. Charts: bars drawn, DEFAULT_TOP_N_WORDS when unset
+    top_n: int | None = Field(None, ge=1)
+    offset: int = Field(0, ge=0) # skip the most frequent words, to page through the vocabulary
+    min_count: int = Field(1, ge=1) # words seen fewer times are left out
+    columnar: bool = False # json data as parallel "words"/"counts" arrays instead of a {word: count} object
+
+    @property
+    def variant(self) -> str:
+        """Identify these options in cache keys."""
+        return f"{self.top_n}-{self.offset}-{self.min_count}" + ("-columnar" if self.columnar else "")
+
+class TextStatsRequest(TableOptions, ChartOptions, CountingOptions):
     text: str
-    output_format: str = "json" # json, csv, png
+    output_format: str = "json" # json, csv, png, svg
+
+class LocalFileRequest(TableOptions, ChartOptions, CountingOptions):
+    path: str # relative to one of LOCAL_DATA_DIRS
+    output_format: str = "json" # json, csv, png, svg
+    errors: str = Field(LOCAL_DECODE_ERRORS, pattern=f"^({'|'.join(DECODE_ERROR_POLICIES)})$") # invalid UTF-8 policy
 
 class TextStatsResponse(BaseModel):
     status: str
     message: str
     data: dict
+
+class BatchDocument(BaseModel):
+    id: str | int | None = None # defaults to the position in the batch
+    text: str
+
+def document_ids(documents: list[BatchDocument]) -> list:
+    """Return the id of every document, its position in the list when it has none."""
+    return [i if document.id is None else document.id for i, document in enumerate(documents)]
+
+def check_unique_ids(documents: list[BatchDocument]) -> list[BatchDocument]:
+    """Reject documents whose ids (explicit or positional) repeat, since results are reported by id."""
+    seen = set()
+    for doc_id in document_ids(documents):
+        if doc_id in seen:
+            raise ValueError(f"Duplicate document id: {doc_id!r}")
+        seen.add(doc_id)
+    return documents
+
+class BatchRequest(BaseModel):
+    documents: list[BatchDocument]
+    aggregate: bool = False
+    top_n: int | None = Field(None, ge=1) # most frequent words kept per document, all when unset
+
+    _unique_ids = field_validator("documents")(check_unique_ids)
+
+class CollectionRequest(BaseModel):
+    documents: list[BatchDocument]
+    top_n: int = Field(DEFAULT_TOP_N_WORDS, ge=1, le=CORPUS_MAX_RESULTS) # terms listed per table and document
+    sublinear: bool = False # TF-IDF with 1 + ln(tf) as the term frequency
+    # Keyness reference, at most one of: documents counted with the request, or a stored corpus
+    reference: list[BatchDocument] | None = None
+    reference_corpus: str | None = Field(None, pattern=CORPUS_NAME_PATTERN)
+
+    _unique_ids = field_validator("documents")(check_unique_ids)
+
+class CorpusDocument(BaseModel):
+    text: str
+    id: str | None = None
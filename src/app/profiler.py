@@ -0,0 +1,58 @@
+"""Sampling profiler for individual slow requests.
+
+A background thread samples the Python stacks of the threads that work on one
+request (the event loop thread and the analysis worker it was handed to) every
+``interval`` seconds. The samples are written in the folded-stack format read
+by flame graph tools such as speedscope or ``flamegraph.pl``.
+"""
+
+import os
+import sys
+import threading
+from collections import Counter
+from src.config.constant import PROFILE_SAMPLE_INTERVAL
+
+
+class SamplingProfiler:
+    """Count the stacks of ``threads`` (a set that may grow while sampling)."""
+
+    def __init__(self, threads, interval=PROFILE_SAMPLE_INTERVAL):
+        self.threads = threads
+        self.interval = interval
+        self.samples = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.threads):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.samples[self.folded_stack(frame)] += 1
+
+    @staticmethod
+    def folded_stack(frame):
+        """Return the stack ending at ``frame`` as ``outer;...;inner`` frame names."""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def write(self, path):
+        """Write the samples as folded stacks, one ``stack count`` line each, and return ``path``."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
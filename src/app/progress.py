@@ -0,0 +1,153 @@
+"""Progressive analysis of streamed request bodies.
+
+The body is counted one unit at a time on the analysis executor (a group of
+text chunks, or a batch of NDJSON documents) with the same preprocessing as
+``/analyses/text``, while the response streams NDJSON snapshots of the running
+top-N words with token and byte counts, then the complete result.
+
+A snapshot is built only when the client has taken the previous one. A slow
+reader gets fewer, fresher snapshots: unsent lines never pile up and the
+analysis never waits for the client.
+"""
+
+import asyncio
+import time
+from collections import Counter
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+from src.config.constant import COUNTS_COLUMN, PARALLEL_MAX_WORKERS, PARALLEL_SHARD_SIZE
+from src.pipeline import batch
+from src.pipeline import parallel
+from src.pipeline import streaming
+from src.pipeline.counting import FrequencyTable
+from .encoding import dumps
+from .executor import QueueFullError, analysis_executor
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    A StreamingResponse whose body iterator reads the request body itself.
+
+    Starlette listens for the client disconnecting by calling ``receive``
+    next to the body iterator, which would take body messages away from it.
+    ``Request.stream`` raises ClientDisconnect on its own, so no listener is
+    started here.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+
+class RunningCounts:
+    """Word counts merged so far, with the bytes, tokens and documents they came from."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.bytes = 0
+        self.tokens = 0
+        self.documents = 0
+        self.started = time.perf_counter()
+
+    def add(self, counts, documents=0):
+        self.counts.update(counts)
+        self.tokens += counts.total()
+        self.documents += documents
+
+    def line(self, kind, top_n=None):
+        """Return an NDJSON line with the ``top_n`` most frequent words (all when None).
+
+        ``top_n`` words are picked with a heap, cheap enough for the event loop.
+        Ranking and serializing every word is not: run that on the executor.
+        """
+        if top_n is None:
+            counts = FrequencyTable.from_counter(self.counts).select().to_dict()
+        else:
+            # most_common keeps ties in first-occurrence order, like FrequencyTable
+            counts = dict(self.counts.most_common(top_n))
+        return dumps({
+            "type": kind,
+            "bytes": self.bytes,
+            "tokens": self.tokens,
+            "documents": self.documents,
+            "words": len(self.counts),
+            "elapsed": round(time.perf_counter() - self.started, 3),
+            COUNTS_COLUMN: counts,
+        }) + b"\n"
+
+
+async def count_bytes(chunks, state: RunningCounts):
+    """Pass body chunks through, adding their size to ``state``."""
+    async for chunk in chunks:
+        state.bytes += len(chunk)
+        yield chunk
+
+
+async def iter_text_units(chunks, errors: str, shards: int = PARALLEL_MAX_WORKERS):
+    """Decode a UTF-8 body and yield groups of ``shards`` text chunks cut like :func:`streaming.split_text`."""
+    decoder = streaming.Utf8Decoder(errors)
+    buffer, unit = "", []
+    async for data in chunks:
+        texts, buffer = streaming.cut_chunks(buffer + decoder.decode(data), PARALLEL_SHARD_SIZE)
+        for text in texts:
+            unit.append(text)
+            if len(unit) >= shards:
+                yield unit
+                unit = []
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        unit.append(buffer)
+    if unit:
+        yield unit
+
+
+def count_text(chunks):
+    """Count a group of text chunks, in the worker pool when one is configured. Blocking."""
+    return parallel.stream_counts(chunks), 0
+
+
+def count_documents(documents):
+    """Count a batch of ``(doc_id, text)`` documents. Blocking."""
+    counts = Counter()
+    batch.count_batch(documents, counts)
+    return counts, len(documents)
+
+
+async def run_waiting(fn, *args):
+    """Run ``fn(*args)`` on the analysis executor, waiting for capacity instead of failing mid-response."""
+    while True:
+        try:
+            return await analysis_executor.run(fn, *args)
+        except QueueFullError as e:
+            await asyncio.sleep(e.retry_after)
+
+
+async def progressive_results(first, units, count, state: RunningCounts, top_n: int, interval: float):
+    """Yield snapshot lines every ``interval`` seconds while ``first`` and the other ``units`` are counted,
+    then the result line (or an error line)."""
+
+    async def produce():
+        unit = first
+        while unit is not None:
+            counts, documents = await run_waiting(count, unit)
+            state.add(counts, documents)
+            unit = await anext(units, None)
+
+    task = asyncio.create_task(produce())
+    try:
+        while not task.done():
+            await asyncio.wait({task}, timeout=interval)
+            if not task.done():
+                yield state.line("snapshot", top_n)
+        try:
+            task.result()
+        except ClientDisconnect:
+            return
+        except ValueError as e:
+            print(f"Error raised while reading the streamed body: {e}")
+            yield dumps({"type": "error", "error": str(e)}) + b"\n"
+            return
+        # The result holds every word; rank and serialize it off the event loop
+        yield await run_waiting(state.line, "result")
+    finally:
+        task.cancel()
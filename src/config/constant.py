@@ -1,5 +1,7 @@
 """Centralized constants for the word frequency mini project."""
 
+import os
+
 # Project metadata
 PROJECT_NAME = "NLP Word Frequency Mini Project"
 PROJECT_VERSION = "2.2.0"
@@ -12,20 +14,166 @@ DEFAULT_PORT = 5000
 DEFAULT_LOG_LEVEL = "info"
 APP_IMPORT_PATH = "src.app.main:app"
 
-SUPPORTED_OUTPUT_FORMATS = ("json", "csv", "png")
+SUPPORTED_OUTPUT_FORMATS = ("json", "csv", "png", "svg")
 DEFAULT_OUTPUT_FORMAT = "json"
 
+# Analysis executor: worker threads, extra tasks allowed to wait, Retry-After on 429
+ANALYSIS_MAX_WORKERS = 4
+ANALYSIS_MAX_QUEUE = 16
+ANALYSIS_RETRY_AFTER_SECONDS = 1
+
+# Upload limits: body size is counted as it streams in, multipart part headers are capped
+MAX_UPLOAD_SIZE = 50_000_000
+MAX_MULTIPART_HEADER_SIZE = 16_384
+
 ALLOWED_FILE_CONTENT_TYPES = ["text/plain"]
-ALLOWED_CONTENT_TYPE_HEADERS = ["multipart/form-data", "application/json"]
+PATH_FILE_CONTENT_TYPES = {"/analyses/merge": ["application/octet-stream"]}  # partial-count files, merge only
+ALLOWED_CONTENT_TYPE_HEADERS = ["multipart/form-data", "application/json", "application/x-ndjson", "text/plain"]
 
 # Data and output constants
 DATA_DIR = "data"
 OUTPUT_DIR = "output"
 STOPWORDS_FILE_PATTERN = "*stopwords.txt"
+NLTK_STOPWORDS_LANGUAGE = "english"
+STOPWORDS_RELOAD_INTERVAL = 5.0  # seconds between stopword file mtime checks
 OUTPUT_FILE_PREFIX = "word_frequency"
+OUTPUT_MEDIA_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv; charset=utf-8",
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "ndjson": "application/x-ndjson",
+    "partial": "application/octet-stream",
+}
+
+# Server-local files (POST /analyses/local) are read from LOCAL_DATA_DIRS through a memory map and decoded
+# LOCAL_READ_BLOCK_SIZE bytes at a time. Invalid UTF-8 is handled by one of DECODE_ERROR_POLICIES:
+# strict (rejected), replace (U+FFFD) or ignore (dropped).
+LOCAL_DATA_DIRS = [DATA_DIR]
+LOCAL_READ_BLOCK_SIZE = 1024 * 1024
+DECODE_ERROR_POLICIES = ("strict", "replace", "ignore")
+LOCAL_DECODE_ERRORS = "strict"
+
+# Rendering: csv/png are built in memory (spooled to a temp file above SPOOL_MAX_MEMORY bytes)
+# and streamed. Set PERSIST_OUTPUT_FILES to also keep a copy in OUTPUT_DIR for OUTPUT_RETENTION_SECONDS.
+CSV_BATCH_ROWS = 10_000
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+STREAM_RESPONSE_CHUNK_SIZE = 64 * 1024
+PERSIST_OUTPUT_FILES = False
+OUTPUT_RETENTION_SECONDS = 24 * 3600
+
+# Response compression, negotiated through Accept-Encoding (br needs the optional brotli package).
+# Responses of other media types, and single-message responses under COMPRESSION_MIN_SIZE bytes, are sent as is.
+COMPRESSION_ENABLED = True
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSIBLE_MEDIA_TYPES = ("application/json", "text/csv", "application/x-ndjson", "image/svg+xml", "text/plain")
+GZIP_COMPRESSION_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Result cache: in-memory LRU tier bounded by bytes, optional on-disk tier for renderings
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_TTL_SECONDS = 3600
+CACHE_DISK_ENABLED = False
+CACHE_DISK_DIR = os.path.join(OUTPUT_DIR, "cache")
+CACHE_DISK_MAX_BYTES = 1024 * 1024 * 1024
+
+# Instrumentation: Server-Timing headers, Prometheus histograms on /metrics, optional slow request profiles
+SERVER_TIMING_ENABLED = True
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # seconds
+METRICS_SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)  # bytes or tokens
+PROFILE_SLOW_REQUESTS = False  # sample the stacks of every request, keep the profiles of slow ones
+SLOW_REQUEST_SECONDS = 2.0
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_DIR = os.path.join(OUTPUT_DIR, "profiles")
+
+# Asynchronous jobs: inputs, state and results live under JOBS_DIR until JOB_TTL_SECONDS after they finish
+JOBS_DIR = os.path.join(OUTPUT_DIR, "jobs")
+JOB_MAX_WORKERS = 1
+JOB_MAX_PENDING = 100
+JOB_TTL_SECONDS = 24 * 3600
+JOB_CLEANUP_INTERVAL = 60.0  # seconds between expiry sweeps of an idle worker
+
+# Corpus index: running word counts of named corpora in an SQLite database
+CORPUS_DB_PATH = os.path.join(OUTPUT_DIR, "corpora.sqlite3")
+CORPUS_NAME_PATTERN = r"^[A-Za-z0-9_.-]{1,64}$"
+CORPUS_MAX_RESULTS = 10_000  # largest page a query returns
+CORPUS_CACHE_SIZE_KB = 64 * 1024  # SQLite page cache per connection; keeps the word indexes hot while appending
+
+# Approximate counting (Space-Saving): capacity = ceil(1 / max_error), capped to bound memory
+SKETCH_DEFAULT_ERROR = 0.001
+SKETCH_MAX_CAPACITY = 100_000
+SKETCH_MIN_ERROR = 1 / SKETCH_MAX_CAPACITY
+
+# Partial counts for map/reduce: blocks of sorted vocabulary entries with numpy count arrays
+PARTIAL_FILE_EXTENSION = "wfp"
+PARTIAL_BLOCK_SIZE = 65_536  # entries per block, read and written one block at a time
+
+# Multi-file runs of the offline pipeline: per-file and aggregate outputs, unchanged files skipped by content hash
+RUN_FILE_PATTERN = "*.txt"  # files picked from directory inputs, searched recursively
+RUN_OUTPUT_FORMATS = ("csv", "json", "png", "svg")
+RUN_MANIFEST_NAME = "manifest.json"
+RUN_HASH_BLOCK_SIZE = 1024 * 1024
+
+# Benchmarks (python -m benchmarks.run): generated corpora, timing repeats and the regression tolerance
+BENCHMARK_CORPUS_DIR = os.path.join(OUTPUT_DIR, "benchmarks")
+BENCHMARK_BASELINE_PATH = os.path.join(BENCHMARK_CORPUS_DIR, "baseline.json")  # machine specific, not committed
+BENCHMARK_SIZES = ("1KB", "100KB", "1MB")  # up to 100MB with --sizes
+BENCHMARK_LANGUAGES = ("en", "vi", "mixed")
+BENCHMARK_SEED = 42
+BENCHMARK_REPEAT = 3
+BENCHMARK_TOLERANCE = 0.25  # fail when throughput drops more than this fraction below the baseline
+
+# Tokenization: only paragraphs in Vietnamese script go to underthesea, other text is split on whitespace
+FAST_TOKENIZER_ENABLED = True
+FAST_TOKENIZER_MIN_CHARS = 200  # shorter non-Vietnamese paragraphs next to Vietnamese ones stay with underthesea
+# Tokenize every paragraph on its own, so no word spans a line break and shared paragraphs hit the token cache
+TOKENIZE_PARAGRAPHS = True
+# Tokens of the Vietnamese text sent to underthesea are cached by hash (LRU, bounded by bytes); output is unchanged
+TOKEN_CACHE_ENABLED = True
+TOKEN_CACHE_MAX_BYTES = 64 * 1024 * 1024  # split between the API process and the tokenization workers
 
 # Text processing constants
 WORDS_COLUMN = "words"
 COUNTS_COLUMN = "counts"
 DEFAULT_TOP_N_WORDS = 10
 
+# N-grams: tokens of an n-gram are joined with NGRAM_SEPARATOR (tokens may contain spaces).
+# Rare n-grams are pruned whenever more than NGRAM_MAX_ENTRIES distinct ones are tracked.
+NGRAM_MAX_N = 5
+NGRAM_SEPARATOR = " | "
+NGRAM_MAX_ENTRIES = 2_000_000
+# Collocations: n-grams ranked by PMI; rarer ones are left out, since a single chance occurrence scores highest
+NGRAM_COLLOCATION_MIN_COUNT = 2
+NGRAM_COLLOCATION_TOP_N = 20  # collocations listed when the request sets no top_n
+
+# Chart rendering (sizes in inches)
+CHART_FORMATS = ("png", "svg")
+CHART_WIDTH = 12
+CHART_HEIGHT = 6
+CHART_DPI = 100
+CHART_MAX_TOP_N = 100
+CHART_MAX_SIZE = 30
+CHART_MAX_DPI = 200
+CHART_TEMPLATES_PER_THREAD = 4
+
+# Streaming constants (sizes in characters)
+STREAM_CHUNK_SIZE = 1_000_000
+STREAM_MAX_CHUNK_SIZE = 4_000_000
+
+# Progressive analysis (POST /analyses/stream): NDJSON snapshots of the running counts at most every
+# STREAM_SNAPSHOT_INTERVAL seconds (clients may ask for any interval from STREAM_SNAPSHOT_MIN_INTERVAL)
+STREAM_SNAPSHOT_INTERVAL = 1.0
+STREAM_SNAPSHOT_MIN_INTERVAL = 0.1
+
+# Batch analysis: documents are processed in groups bounded by count and characters
+BATCH_MAX_DOCUMENTS = 1_000
+BATCH_MAX_CHARS = 1_000_000
+
+# Parallel tokenization constants (sizes in characters)
+PARALLEL_MIN_CHARS = 100_000  # documents shorter than this are tokenized in one call
+PARALLEL_SHARD_SIZE = 20_000  # small enough to spread a document evenly across the workers
+PARALLEL_MAX_WORKERS = os.cpu_count() or 1
+PARALLEL_MAX_PENDING_SHARDS = 2 * PARALLEL_MAX_WORKERS
+PARALLEL_START_METHOD = "spawn"
+WARMUP_PROCESS_POOL = True  # start the pool workers during app warm-up
+
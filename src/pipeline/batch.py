@@ -0,0 +1,44 @@
+"""Word statistics for many documents in one call.
+
+Documents are consumed lazily in batches bounded by ``BATCH_MAX_DOCUMENTS``
+and ``BATCH_MAX_CHARS``, so only one batch of texts is held at a time. Every
+document of a batch goes through the same tokenizer and stopword index (see
+:func:`parallel.count_documents`).
+"""
+
+from src.config.constant import BATCH_MAX_CHARS, BATCH_MAX_DOCUMENTS
+from src.pipeline import parallel
+
+
+def iter_batches(documents, max_documents=BATCH_MAX_DOCUMENTS, max_chars=BATCH_MAX_CHARS):
+    """Group ``(doc_id, text)`` pairs into lists bounded by document count and total characters."""
+    batch, size = [], 0
+    for doc_id, text in documents:
+        if batch and (len(batch) >= max_documents or size + len(text) > max_chars):
+            yield batch
+            batch, size = [], 0
+        batch.append((doc_id, text))
+        size += len(text)
+    if batch:
+        yield batch
+
+
+def count_batch(batch, aggregate=None):
+    """Return ``(doc_id, Counter)`` for each document of a batch, adding them to ``aggregate`` if given."""
+    ids = [doc_id for doc_id, _ in batch]
+    counts = parallel.count_documents([text for _, text in batch])
+    if aggregate is not None:
+        for doc_counts in counts:
+            aggregate.update(doc_counts)
+    return list(zip(ids, counts))
+
+
+def analyze_documents(documents, aggregate=None, max_documents=BATCH_MAX_DOCUMENTS, max_chars=BATCH_MAX_CHARS):
+    """Yield ``(doc_id, Counter)`` for each ``(doc_id, text)`` pair, in input order.
+
+    Pass a :class:`collections.Counter` as ``aggregate`` to also collect the
+    counts over all documents; ties keep their first-occurrence order.
+    """
+    for batch in iter_batches(documents, max_documents, max_chars):
+        yield from count_batch(batch, aggregate)
+
@@ -0,0 +1,213 @@
+"""TF-IDF, document frequency and keyness of document collections.
+
+Documents are counted like a batch (see :func:`batch.analyze_documents`) and
+their counts stored as a sparse document-term matrix in CSR layout: one
+``indices``/``data`` pair of arrays holds the term IDs and counts of every
+document back to back, ``indptr`` marks where each document starts, and the
+terms are interned once into a vocabulary shared by the whole collection.
+Every statistic is a NumPy operation over the non-zero entries, so the cost
+grows with the number of tokens rather than documents times vocabulary.
+
+Keyness compares the collection with a reference corpus using Dunning's
+log-likelihood (G2), signed positive for words used more often than in the
+reference, and the log2 ratio of relative frequencies.
+"""
+
+from array import array
+import numpy as np
+from src.config.constant import COUNTS_COLUMN, DEFAULT_TOP_N_WORDS, WORDS_COLUMN
+from src.pipeline import batch
+from src.pipeline.counting import FrequencyTable
+
+
+class DocumentTermMatrix:
+    """Term counts of a document collection in compressed sparse row layout."""
+
+    def __init__(self, doc_ids, words, indptr, indices, data):
+        self.doc_ids = list(doc_ids)
+        self.words = words
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.int64)
+
+    @classmethod
+    def from_counts(cls, items):
+        """Build the matrix from ``(doc_id, word -> count mapping)`` pairs, interning words in first-occurrence order."""
+        vocabulary = {}
+        doc_ids, indptr, indices, data = [], array("q", [0]), array("q"), array("q")
+        for doc_id, counts in items:
+            doc_ids.append(doc_id)
+            indices.extend([vocabulary.setdefault(word, len(vocabulary)) for word in counts])
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        words = np.empty(len(vocabulary), dtype=object)
+        words[:] = list(vocabulary)
+        return cls(doc_ids, words, indptr, indices, data)
+
+    @classmethod
+    def from_documents(cls, documents):
+        """Tokenize ``(doc_id, text)`` pairs batch by batch and build their matrix."""
+        return cls.from_counts(batch.analyze_documents(documents))
+
+    @property
+    def shape(self):
+        return len(self.doc_ids), len(self.words)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def row_ids(self):
+        """Return the document index of every non-zero entry."""
+        return np.repeat(np.arange(len(self.doc_ids)), np.diff(self.indptr))
+
+    def term_counts(self):
+        """Return the collection count of every term."""
+        return np.bincount(self.indices, weights=self.data, minlength=len(self.words)).astype(np.int64)
+
+    def document_frequency(self):
+        """Return the number of documents every term occurs in."""
+        return np.bincount(self.indices, minlength=len(self.words))
+
+    def document_lengths(self):
+        """Return the token count of every document."""
+        return np.bincount(self.row_ids(), weights=self.data, minlength=len(self.doc_ids)).astype(np.int64)
+
+    def idf(self):
+        """Return the smoothed inverse document frequency ``ln((1 + N) / (1 + df)) + 1`` of every term."""
+        return np.log((1 + len(self.doc_ids)) / (1 + self.document_frequency())) + 1
+
+    def tfidf(self, sublinear=False, normalize=True):
+        """Return the TF-IDF weight of every non-zero entry, aligned with ``indices``.
+
+        ``sublinear`` uses ``1 + ln(tf)`` as the term frequency; ``normalize``
+        scales every document to unit Euclidean length.
+        """
+        tf = 1 + np.log(self.data) if sublinear else self.data.astype(np.float64)
+        weights = tf * self.idf()[self.indices]
+        if normalize and self.nnz:
+            rows = self.row_ids()
+            norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=len(self.doc_ids)))
+            weights /= norms[rows]
+        return weights
+
+    def top_terms(self, scores, k):
+        """Return ``(doc_id, {word: score})`` with the ``k`` best scoring terms of every document.
+
+        ``scores`` is aligned with ``indices`` (e.g. :meth:`tfidf`). Entries are
+        ranked within their document by one sort over all of them; ties keep
+        first-occurrence order.
+        """
+        lengths = np.diff(self.indptr)
+        order = np.lexsort((-scores, self.row_ids()))
+        # Rows stay in place, so an entry's rank is its distance from the start of its row
+        rank = np.arange(self.nnz) - np.repeat(self.indptr[:-1], lengths)
+        kept = order[rank < k]
+        ends = np.cumsum(np.minimum(lengths, k))
+        words = self.words[self.indices[kept]].tolist()
+        values = scores[kept].tolist()
+        start = 0
+        result = []
+        for doc_id, end in zip(self.doc_ids, ends.tolist()):
+            result.append((doc_id, dict(zip(words[start:end], values[start:end]))))
+            start = end
+        return result
+
+    def to_table(self):
+        """Return the collection counts as an unsorted FrequencyTable."""
+        return FrequencyTable(self.words, self.term_counts())
+
+
+def log_likelihood(a, b, c, d):
+    """Return the signed log-likelihood (G2) of counts ``a`` in ``c`` target tokens against ``b`` in ``d`` reference tokens."""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    expected_a = c * (a + b) / (c + d)
+    expected_b = d * (a + b) / (c + d)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        g2 = 2 * (np.where(a > 0, a * np.log(a / expected_a), 0) + np.where(b > 0, b * np.log(b / expected_b), 0))
+    return np.where(a * d >= b * c, g2, -g2)
+
+
+def log_ratio(a, b, c, d):
+    """Return the log2 ratio of the relative frequencies ``a / c`` and ``b / d``, adding 0.5 to zero counts."""
+    a = np.where(a > 0, a, 0.5)
+    b = np.where(b > 0, b, 0.5)
+    return np.log2((a / c) / (b / d))
+
+
+def keyness(target: FrequencyTable, reference: FrequencyTable):
+    """Return the keyness of every word of ``target`` or ``reference`` as aligned arrays.
+
+    The vocabularies are joined in one pass: target words keep their
+    positions and reference-only words follow.
+    """
+    positions = {word: i for i, word in enumerate(target.words.tolist())}
+    reference_ids = np.fromiter((positions.setdefault(word, len(positions)) for word in reference.words.tolist()),
+                                dtype=np.int64, count=len(reference))
+    size = len(positions)
+    words = np.empty(size, dtype=object)
+    words[:] = list(positions)
+    counts = np.zeros(size, dtype=np.int64)
+    counts[:len(target)] = target.counts
+    reference_counts = np.bincount(reference_ids, weights=reference.counts, minlength=size).astype(np.int64)
+    c, d = max(target.total, 1), max(reference.total, 1)
+    return {
+        WORDS_COLUMN: words,
+        COUNTS_COLUMN: counts,
+        "reference_counts": reference_counts,
+        "log_likelihood": log_likelihood(counts, reference_counts, c, d),
+        "log_ratio": log_ratio(counts, reference_counts, c, d),
+    }
+
+
+def rank(scores, k):
+    """Return the positions of the ``k`` highest ``scores``, best first, ties in position order."""
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+def keyness_summary(target: FrequencyTable, reference: FrequencyTable, top_n=DEFAULT_TOP_N_WORDS):
+    """Return the ``top_n`` words most over- and underused in ``target`` as columnar tables."""
+    columns = keyness(target, reference)
+    scores = columns["log_likelihood"]
+    overused = rank(scores, top_n)
+    overused = overused[scores[overused] > 0]
+    underused = rank(-scores, top_n)
+    underused = underused[scores[underused] < 0]
+    return {
+        "reference": {"tokens": reference.total, "vocabulary": len(reference)},
+        "overused": {name: values[overused].tolist() for name, values in columns.items()},
+        "underused": {name: values[underused].tolist() for name, values in columns.items()},
+    }
+
+
+def summary(matrix: DocumentTermMatrix, top_n=DEFAULT_TOP_N_WORDS, reference: FrequencyTable = None,
+            sublinear=False):
+    """Return the collection totals, its ``top_n`` terms with their document frequency and IDF, the ``top_n``
+    TF-IDF terms of every document and, given a ``reference`` table, the keyness of the collection."""
+    counts = matrix.term_counts()
+    document_frequency = matrix.document_frequency()
+    idf = matrix.idf()
+    # Rank term IDs like ngrams.summary so only the selected words are looked up
+    selected = FrequencyTable(np.arange(len(counts)), counts).top_k(top_n).words
+    data = {
+        "documents": len(matrix.doc_ids),
+        "tokens": int(counts.sum()),
+        "vocabulary": len(matrix.words),
+        "nonzero": matrix.nnz,
+        "terms": {
+            WORDS_COLUMN: matrix.words[selected].tolist(),
+            COUNTS_COLUMN: counts[selected].tolist(),
+            "document_frequency": document_frequency[selected].tolist(),
+            "idf": idf[selected].tolist(),
+        },
+        "tfidf": [{"id": doc_id, "terms": terms}
+                  for doc_id, terms in matrix.top_terms(matrix.tfidf(sublinear), top_n)],
+    }
+    if reference is not None:
+        data["keyness"] = keyness_summary(FrequencyTable(matrix.words, counts), reference, top_n)
+    return data
@@ -0,0 +1,208 @@
+"""Persistent, incrementally updated word counts of named corpora.
+
+Each appended document is tokenized once and its counts are added to the
+corpus totals in an SQLite table with the ``words``/``counts`` columns of
+:func:`text_stats.statistics`. An index on ``(corpus, counts)`` serves top-N
+and count-threshold queries without rescanning the collection. Words with
+equal counts keep their first-occurrence order (the table rowid), as in
+``statistics``.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+from src.config.constant import (
+    CORPUS_CACHE_SIZE_KB,
+    CORPUS_DB_PATH,
+    CORPUS_MAX_RESULTS,
+    CORPUS_NAME_PATTERN,
+    COUNTS_COLUMN,
+    DEFAULT_TOP_N_WORDS,
+    WORDS_COLUMN,
+)
+from src.pipeline import parallel
+from src.pipeline.counting import FrequencyTable
+
+_NAME = re.compile(CORPUS_NAME_PATTERN)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS corpora (
+    name TEXT PRIMARY KEY,
+    documents INTEGER NOT NULL DEFAULT 0,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS corpus_words (
+    corpus TEXT NOT NULL,
+    {WORDS_COLUMN} TEXT NOT NULL,
+    {COUNTS_COLUMN} INTEGER NOT NULL,
+    UNIQUE (corpus, {WORDS_COLUMN})
+);
+CREATE INDEX IF NOT EXISTS corpus_words_by_count ON corpus_words (corpus, {COUNTS_COLUMN} DESC);
+CREATE TABLE IF NOT EXISTS corpus_documents (
+    corpus TEXT NOT NULL,
+    doc_id TEXT,
+    tokens INTEGER NOT NULL,
+    added_at REAL NOT NULL
+);
+"""
+
+
+def check_name(name):
+    """Raise ValueError unless ``name`` is a valid corpus name."""
+    if not isinstance(name, str) or not _NAME.match(name):
+        raise ValueError(f"Invalid corpus name: {name!r}")
+    return name
+
+
+class CorpusIndex:
+    """Word counts of named corpora stored in an SQLite database.
+
+    Every thread uses its own connection; the database runs in WAL mode so
+    queries are not blocked by an append in progress.
+    """
+
+    def __init__(self, path=CORPUS_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def connect(self):
+        """Return this thread's connection, creating the database on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA cache_size=-{CORPUS_CACHE_SIZE_KB}")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(_SCHEMA)
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def append_counts(self, name, counts, doc_id=None):
+        """Add a word -> count mapping (e.g. a Counter) to corpus ``name`` and return its stats."""
+        check_name(name)
+        now = time.time()
+        tokens = sum(counts.values())
+        conn = self.connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO corpora (name, created_at, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO NOTHING", (name, now, now))
+            conn.executemany(
+                f"INSERT INTO corpus_words (corpus, {WORDS_COLUMN}, {COUNTS_COLUMN}) VALUES (?, ?, ?) "
+                f"ON CONFLICT(corpus, {WORDS_COLUMN}) DO UPDATE "
+                f"SET {COUNTS_COLUMN} = {COUNTS_COLUMN} + excluded.{COUNTS_COLUMN}",
+                ((name, word, int(count)) for word, count in counts.items()))
+            conn.execute(
+                "UPDATE corpora SET documents = documents + 1, tokens = tokens + ?, updated_at = ? "
+                "WHERE name = ?", (tokens, now, name))
+            conn.execute(
+                "INSERT INTO corpus_documents (corpus, doc_id, tokens, added_at) VALUES (?, ?, ?, ?)",
+                (name, None if doc_id is None else str(doc_id), tokens, now))
+        return self.stats(name)
+
+    def append_text(self, name, text, doc_id=None):
+        """Tokenize ``text`` and add its word counts to corpus ``name``."""
+        check_name(name)
+        return self.append_counts(name, parallel.word_counts(text), doc_id)
+
+    def top(self, name, n=DEFAULT_TOP_N_WORDS, offset=0):
+        """Return the ``n`` most frequent words of the corpus as a sorted FrequencyTable."""
+        return self._query(name, "", (), min(n, CORPUS_MAX_RESULTS), offset)
+
+    def filter(self, name, min_count=1, max_count=None, limit=CORPUS_MAX_RESULTS, offset=0):
+        """Return the words whose count is within ``[min_count, max_count]``, most frequent first."""
+        condition = f" AND {COUNTS_COLUMN} >= ?"
+        params = (min_count,)
+        if max_count is not None:
+            condition += f" AND {COUNTS_COLUMN} <= ?"
+            params += (max_count,)
+        return self._query(name, condition, params, min(limit, CORPUS_MAX_RESULTS), offset)
+
+    def counts(self, name):
+        """Return every word of the corpus as an unsorted FrequencyTable, e.g. as a keyness reference."""
+        rows = self.connect().execute(
+            f"SELECT {WORDS_COLUMN}, {COUNTS_COLUMN} FROM corpus_words WHERE corpus = ? ORDER BY rowid",
+            (name,)).fetchall()
+        words = np.empty(len(rows), dtype=object)
+        words[:] = [row[0] for row in rows]
+        return FrequencyTable(words, np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows)))
+
+    def lookup(self, name, word):
+        """Return the count of ``word`` in the corpus (0 when it never occurred)."""
+        row = self.connect().execute(
+            f"SELECT {COUNTS_COLUMN} FROM corpus_words WHERE corpus = ? AND {WORDS_COLUMN} = ?",
+            (name, word.strip().lower())).fetchone()
+        return row[0] if row else 0
+
+    def stats(self, name):
+        """Return the document, token and vocabulary totals of the corpus, or None if it does not exist."""
+        conn = self.connect()
+        row = conn.execute(
+            "SELECT documents, tokens, created_at, updated_at FROM corpora WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        vocabulary = conn.execute(
+            "SELECT COUNT(*) FROM corpus_words WHERE corpus = ?", (name,)).fetchone()[0]
+        documents, tokens, created_at, updated_at = row
+        return {
+            "name": name,
+            "documents": documents,
+            "tokens": tokens,
+            "vocabulary": vocabulary,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    def names(self):
+        """Return the names of all corpora."""
+        return [row[0] for row in self.connect().execute("SELECT name FROM corpora ORDER BY name")]
+
+    def delete(self, name):
+        """Drop the corpus and its counts. Return whether it existed."""
+        conn = self.connect()
+        with conn:
+            deleted = conn.execute("DELETE FROM corpora WHERE name = ?", (name,)).rowcount
+            conn.execute("DELETE FROM corpus_words WHERE corpus = ?", (name,))
+            conn.execute("DELETE FROM corpus_documents WHERE corpus = ?", (name,))
+        return bool(deleted)
+
+    def _query(self, name, condition, params, limit, offset):
+        rows = self.connect().execute(
+            f"SELECT {WORDS_COLUMN}, {COUNTS_COLUMN} FROM corpus_words "
+            f"WHERE corpus = ?{condition} ORDER BY {COUNTS_COLUMN} DESC, rowid LIMIT ? OFFSET ?",
+            (name, *params, limit, offset)).fetchall()
+        return FrequencyTable([row[0] for row in rows], [row[1] for row in rows], is_sorted=True)
+
+
+_corpus_index = None
+_corpus_index_lock = threading.Lock()
+
+
+def get_corpus_index():
+    """Return the process-wide corpus index."""
+    global _corpus_index
+    if _corpus_index is None:
+        with _corpus_index_lock:
+            if _corpus_index is None:
+                _corpus_index = CorpusIndex()
+    return _corpus_index
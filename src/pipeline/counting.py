@@ -0,0 +1,114 @@
+"""Array-backed word frequency table."""
+
+import sys
+from collections import Counter
+import numpy as np
+from src.config.constant import COUNTS_COLUMN, WORDS_COLUMN
+
+
+class FrequencyTable:
+    """Words and their counts stored as parallel arrays.
+
+    Tokens are interned by a hash map (the insertion order of a
+    :class:`collections.Counter` gives each word its integer ID) and the counts
+    are kept in an ``int64`` array indexed by that ID. Sorting is stable, so
+    words with equal counts keep their first-occurrence order, like
+    ``pandas.Series.value_counts``. The table only becomes a DataFrame when
+    :meth:`to_frame` is called.
+    """
+
+    columns = (WORDS_COLUMN, COUNTS_COLUMN)
+
+    def __init__(self, words, counts, is_sorted=False):
+        self.words = words if isinstance(words, np.ndarray) else np.array(words, dtype=object)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.is_sorted = is_sorted
+
+    @classmethod
+    def from_counter(cls, counter):
+        """Build an unsorted table from a word -> count mapping."""
+        words = np.empty(len(counter), dtype=object)
+        words[:] = list(counter)
+        counts = np.fromiter(counter.values(), dtype=np.int64, count=len(counter))
+        return cls(words, counts)
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        """Count a token sequence."""
+        return cls.from_counter(Counter(tokens))
+
+    def sorted(self):
+        """Return the table ordered by descending count."""
+        if self.is_sorted:
+            return self
+        order = np.argsort(-self.counts, kind="stable")
+        return FrequencyTable(self.words[order], self.counts[order], is_sorted=True)
+
+    def top_k(self, k):
+        """Return the ``k`` most frequent words in O(n + k log k)."""
+        if self.is_sorted or k >= len(self):
+            return self.sorted().head(k)
+        # Partition on (count desc, id asc) so ties keep first-occurrence order
+        keys = -self.counts * len(self) + np.arange(len(self))
+        order = np.argpartition(keys, k)[:k]
+        order = order[np.argsort(keys[order])]
+        return FrequencyTable(self.words[order], self.counts[order], is_sorted=True)
+
+    def head(self, n):
+        return FrequencyTable(self.words[:n], self.counts[:n], self.is_sorted)
+
+    def select(self, top_n=None, offset=0, min_count=1):
+        """Return the words ranked ``offset`` to ``offset + top_n`` by descending count.
+
+        Only words seen at least ``min_count`` times are ranked, and all of
+        them are returned past ``offset`` when ``top_n`` is None. With ``top_n``
+        only the first ``offset + top_n`` words are sorted (see :meth:`top_k`).
+        """
+        table = self.filter(min_count) if min_count > 1 else self
+        table = table.sorted() if top_n is None else table.top_k(offset + top_n)
+        if offset:
+            table = FrequencyTable(table.words[offset:], table.counts[offset:], is_sorted=True)
+        return table
+
+    def filter(self, min_count):
+        """Return the words that occur at least ``min_count`` times."""
+        mask = self.counts >= min_count
+        return FrequencyTable(self.words[mask], self.counts[mask], self.is_sorted)
+
+    def items(self):
+        return zip(self.words.tolist(), self.counts.tolist())
+
+    def to_dict(self):
+        """Return ``{word: count}`` in table order."""
+        return dict(self.items())
+
+    def to_frame(self):
+        """Return the table as a DataFrame with the words/counts columns."""
+        import pandas as pd
+
+        return pd.DataFrame({WORDS_COLUMN: self.words, COUNTS_COLUMN: self.counts})
+
+    @property
+    def empty(self):
+        return len(self.counts) == 0
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes + self.words.nbytes + sum(sys.getsizeof(word) for word in self.words)
+
+    def __getitem__(self, column):
+        if column == WORDS_COLUMN:
+            return self.words
+        if column == COUNTS_COLUMN:
+            return self.counts
+        raise KeyError(column)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __repr__(self):
+        return f"FrequencyTable({len(self)} words, total={self.total})"
@@ -1,15 +1,40 @@
-import text_stats as ts
-from src.config.constant import DATA_DIR, OUTPUT_DIR
+import argparse
+import contextlib
+import itertools
+import json
+import os
+from collections import Counter
+from src.pipeline import batch
+from src.pipeline import collection
+from src.pipeline import streaming
+from src.pipeline import text_stats as ts
+from src.pipeline import partials
+from src.pipeline import runner
+from src.pipeline.corpus import CorpusIndex
+from src.pipeline.counting import FrequencyTable
+from src.pipeline.sketch import SpaceSaving, sketch_statistics
+from src.config.constant import (
+    CORPUS_DB_PATH,
+    CORPUS_MAX_RESULTS,
+    COUNTS_COLUMN,
+    DATA_DIR,
+    DEFAULT_TOP_N_WORDS,
+    NGRAM_MAX_N,
+    OUTPUT_DIR,
+    PARALLEL_MAX_WORKERS,
+    PARALLEL_SHARD_SIZE,
+    RUN_FILE_PATTERN,
+    RUN_OUTPUT_FORMATS,
+    SKETCH_DEFAULT_ERROR,
+    WORDS_COLUMN,
+)
 
-def main():
-    # Import data from TEXT file
-    text = ts.import_data(filename="sample.txt", rootpath=DATA_DIR)
+def run_sample(n=1):
+    # Read the TEXT file in bounded chunks
+    chunks = streaming.iter_file_chunks(filename="sample.txt", rootpath=DATA_DIR)
 
-    # Preprocessing data
-    token = ts.preprocessing(text)
-    
-    # Get word statistics
-    word_stats = ts.statistics(token)
+    # Preprocess each chunk and merge the word (or n-gram) statistics
+    word_stats = streaming.stream_statistics(chunks, n)
 
     # Export to CSV
     ts.export_results(word_stats, "word_frequency.csv", OUTPUT_DIR)
@@ -17,5 +42,227 @@ def main():
     # Visualize the results
     ts.visualize_results(word_stats, "word_frequency.png", OUTPUT_DIR)
 
+def print_table(word_stats):
+    for word, count in word_stats.items():
+        print(f"{word}\t{count}")
+
+def run_corpus(args):
+    """Run a ``corpus`` subcommand against the index at ``args.db``."""
+    index = CorpusIndex(args.db)
+    if args.action == "add":
+        for path in args.files:
+            # Stream each file so large documents are counted in bounded memory
+            chunks = streaming.iter_file_chunks(os.path.basename(path), os.path.dirname(path) or ".")
+            stats = index.append_counts(args.name, streaming.count_chunks(chunks), doc_id=path)
+            print(f"Added {path} to '{args.name}': {stats['documents']} documents, {stats['tokens']} tokens")
+    elif args.action == "top":
+        print_table(index.top(args.name, args.n))
+    elif args.action == "lookup":
+        print(index.lookup(args.name, args.word))
+    elif args.action == "filter":
+        print_table(index.filter(args.name, args.min_count, args.max_count, args.limit))
+    elif args.action == "stats":
+        names = [args.name] if args.name else index.names()
+        print(json.dumps([index.stats(name) for name in names], ensure_ascii=False, indent=2))
+    elif args.action == "delete":
+        print("Deleted." if index.delete(args.name) else f"Corpus '{args.name}' not found.")
+
+def run_sketch(args):
+    """Feed files to a Space-Saving summary, resuming from and saving to ``args.checkpoint`` if given."""
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        summary = SpaceSaving.load(args.checkpoint)
+        print(f"Resumed {summary} from {args.checkpoint}")
+    else:
+        summary = SpaceSaving.from_error(args.max_error)
+    for path in args.files:
+        chunks = streaming.iter_file_chunks(os.path.basename(path), os.path.dirname(path) or ".",
+                                            chunk_size=PARALLEL_SHARD_SIZE)
+        sketch_statistics(chunks, summary)
+        if args.checkpoint:
+            summary.save(args.checkpoint)
+    result = summary.summary(args.n)
+    print(f"total={result['total']} capacity={result['capacity']} max_error={result['max_error']}")
+    for word, count in result["counts"].items():
+        print(f"{word}\t{count}\t±{result['errors'][word]}")
+
+def iter_files_chunks(paths, chunk_size=PARALLEL_SHARD_SIZE):
+    """Yield the chunks of several UTF-8 text files, one file after another."""
+    return itertools.chain.from_iterable(
+        streaming.iter_file_chunks(os.path.basename(path), os.path.dirname(path) or ".", chunk_size)
+        for path in paths)
+
+def run_map(args):
+    """Count the input files and write the result as one partial count file."""
+    counts = runner.count_file_chunks(iter_files_chunks(args.files), args.ngram)
+    with open(args.output, "wb") as f:
+        writer = partials.write_partial(counts, f, n=args.ngram)
+    print(f"Wrote {writer.words} words ({writer.total} tokens) to {args.output}")
+
+def run_reduce(args):
+    """Merge partial count files, optionally exporting the merged table as CSV."""
+    with contextlib.ExitStack() as stack:
+        inputs = [stack.enter_context(open(path, "rb")) for path in args.partials]
+        with open(args.output, "wb") as f:
+            writer = partials.merge_partials(inputs, f)
+    print(f"Merged {len(args.partials)} partials into {args.output}: {writer.words} words, {writer.total} tokens")
+    if args.csv:
+        with open(args.output, "rb") as f:
+            word_stats = partials.read_table(f)
+        ts.export_results(word_stats, os.path.basename(args.csv), os.path.dirname(args.csv) or ".")
+
+def run_batch(args):
+    """Count many files in parallel into per-file and aggregate outputs, skipping unchanged files."""
+    paths = runner.expand_inputs(args.inputs, args.pattern)
+    if not paths:
+        raise ValueError("No input files found.")
+    result = runner.run_files(paths, args.output, n=args.ngram, formats=args.format or ["csv"],
+                              workers=args.workers, force=args.force, aggregate=not args.no_aggregate,
+                              top_n=args.top_n, progress=lambda line: print(line, flush=True))
+    print(f"{result['processed']} processed, {result['skipped']} unchanged, {len(result['failed'])} failed "
+          f"of {result['files']} files; {result['tokens']} tokens, {result['bytes'] / 1e6:.1f} MB read "
+          f"in {result['seconds']:.1f}s")
+    if result["failed"]:
+        raise SystemExit(1)
+
+def iter_file_documents(paths):
+    """Yield ``(path, text)`` for UTF-8 text files, reading each one only when it is counted."""
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            yield path, f.read()
+
+def run_collection(args):
+    """Compute TF-IDF and document frequencies of files, one document each, and their keyness."""
+    if args.reference and args.reference_corpus:
+        raise ValueError("Pass either --reference or --reference-corpus.")
+    paths = runner.expand_inputs(args.inputs, args.pattern)
+    if not paths:
+        raise ValueError("No input files found.")
+    reference = None
+    if args.reference:
+        total = Counter()
+        for _ in batch.analyze_documents(iter_file_documents(runner.expand_inputs(args.reference, args.pattern)),
+                                         total):
+            pass
+        reference = FrequencyTable.from_counter(total)
+    elif args.reference_corpus:
+        index = CorpusIndex(args.db)
+        if index.stats(args.reference_corpus) is None:
+            raise ValueError(f"Corpus '{args.reference_corpus}' not found.")
+        reference = index.counts(args.reference_corpus)
+
+    matrix = collection.DocumentTermMatrix.from_documents(iter_file_documents(paths))
+    result = collection.summary(matrix, args.top_n, reference, args.sublinear)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        print(f"Wrote {result['documents']} documents to {args.output}")
+    print(f"{result['documents']} documents, {result['tokens']} tokens, {result['vocabulary']} words")
+    terms = result["terms"]
+    for row in zip(terms[WORDS_COLUMN], terms[COUNTS_COLUMN], terms["document_frequency"], terms["idf"]):
+        print("{}\t{}\tdf={}\tidf={:.3f}".format(*row))
+    if reference is not None:
+        print("Keywords against the reference:")
+        overused = result["keyness"]["overused"]
+        for row in zip(overused[WORDS_COLUMN], overused["log_likelihood"], overused["log_ratio"]):
+            print("{}\tG2={:.2f}\tlog_ratio={:.2f}".format(*row))
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Word frequency pipeline. Without a command, analyze data/sample.txt.")
+    parser.add_argument("--ngram", type=int, default=1, choices=range(1, NGRAM_MAX_N + 1),
+                        help="Count n-grams of this many words instead of single words.")
+    commands = parser.add_subparsers(dest="command")
+
+    corpus = commands.add_parser("corpus", help="Maintain and query persistent corpus word counts.")
+    corpus.add_argument("--db", default=CORPUS_DB_PATH, help="SQLite database of the corpus index.")
+    actions = corpus.add_subparsers(dest="action", required=True)
+
+    add = actions.add_parser("add", help="Append UTF-8 text files to a corpus.")
+    add.add_argument("name")
+    add.add_argument("files", nargs="+")
+
+    top = actions.add_parser("top", help="Print the most frequent words.")
+    top.add_argument("name")
+    top.add_argument("-n", type=int, default=DEFAULT_TOP_N_WORDS)
+
+    lookup = actions.add_parser("lookup", help="Print the count of one word.")
+    lookup.add_argument("name")
+    lookup.add_argument("word")
+
+    count_filter = actions.add_parser("filter", help="Print the words within a count range.")
+    count_filter.add_argument("name")
+    count_filter.add_argument("--min-count", type=int, default=1)
+    count_filter.add_argument("--max-count", type=int)
+    count_filter.add_argument("--limit", type=int, default=CORPUS_MAX_RESULTS)
+
+    stats = actions.add_parser("stats", help="Print corpus totals.")
+    stats.add_argument("name", nargs="?")
+
+    delete = actions.add_parser("delete", help="Drop a corpus.")
+    delete.add_argument("name")
+
+    mapper = commands.add_parser("map", help="Count text files into a mergeable partial count file.")
+    mapper.add_argument("files", nargs="+")
+    mapper.add_argument("-o", "--output", required=True)
+
+    reducer = commands.add_parser("reduce", help="Merge partial count files.")
+    reducer.add_argument("partials", nargs="+")
+    reducer.add_argument("-o", "--output", required=True)
+    reducer.add_argument("--csv", help="Also export the merged counts to this CSV file.")
+
+    batch = commands.add_parser("run", help="Count many text files in parallel, skipping files unchanged "
+                                             "since the last run.")
+    batch.add_argument("inputs", nargs="+", help="Files, directories or glob patterns (quote them).")
+    batch.add_argument("-o", "--output", default=os.path.join(OUTPUT_DIR, "run"),
+                       help="Directory of the per-file outputs, the aggregate and the manifest.")
+    batch.add_argument("-f", "--format", action="append", choices=RUN_OUTPUT_FORMATS,
+                       help="Output format, repeat for several (default: csv).")
+    batch.add_argument("-j", "--workers", type=int, default=PARALLEL_MAX_WORKERS)
+    batch.add_argument("--pattern", default=RUN_FILE_PATTERN, help="File pattern searched in directories.")
+    batch.add_argument("--top-n", type=int, default=DEFAULT_TOP_N_WORDS, help="Words shown in charts.")
+    batch.add_argument("--force", action="store_true", help="Recount files even if they are unchanged.")
+    batch.add_argument("--no-aggregate", action="store_true", help="Skip the merged output of all files.")
+
+    docs = commands.add_parser("collection", help="TF-IDF, document frequencies and keyness of a document "
+                                                  "collection, one document per file.")
+    docs.add_argument("inputs", nargs="+", help="Files, directories or glob patterns (quote them).")
+    docs.add_argument("--pattern", default=RUN_FILE_PATTERN, help="File pattern searched in directories.")
+    docs.add_argument("-n", "--top-n", type=int, default=DEFAULT_TOP_N_WORDS,
+                      help="Terms listed per table and per document.")
+    docs.add_argument("--sublinear", action="store_true", help="Use 1 + ln(tf) as the TF-IDF term frequency.")
+    docs.add_argument("--reference", action="append",
+                      help="Reference files for keyness, repeat for several (files, directories or patterns).")
+    docs.add_argument("--reference-corpus", help="Stored corpus used as the keyness reference.")
+    docs.add_argument("--db", default=CORPUS_DB_PATH, help="SQLite database of the corpus index.")
+    docs.add_argument("-o", "--output", help="Write the full result, per-document TF-IDF included, as JSON.")
+
+    sketch = commands.add_parser("sketch", help="Approximate top words of large inputs in bounded memory.")
+    sketch.add_argument("files", nargs="+")
+    sketch.add_argument("-n", type=int, default=DEFAULT_TOP_N_WORDS)
+    sketch.add_argument("--max-error", type=float, default=SKETCH_DEFAULT_ERROR,
+                        help="Count error bound as a fraction of all tokens (sets the summary capacity).")
+    sketch.add_argument("--checkpoint", help="Summary file to resume from and update after each input file.")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "corpus":
+            run_corpus(args)
+        elif args.command == "sketch":
+            run_sketch(args)
+        elif args.command == "map":
+            run_map(args)
+        elif args.command == "reduce":
+            run_reduce(args)
+        elif args.command == "run":
+            run_batch(args)
+        elif args.command == "collection":
+            run_collection(args)
+        else:
+            run_sample(args.ngram)
+    except ValueError as e:
+        parser.error(str(e))
+
 if __name__ == "__main__":
     main()
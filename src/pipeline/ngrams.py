@@ -0,0 +1,187 @@
+"""N-gram counting over interned token IDs.
+
+Tokens are interned to integer IDs and each chunk becomes an ``int64`` array.
+The n-gram windows are a strided view of that array, never a list of tuples.
+Each window is packed into one integer key (mixed radix over the vocabulary
+size) and counted with ``np.unique``. When ``vocabulary ** n`` does not fit
+in 64 bits, the window is packed into several keys that are sorted together. The last
+``n - 1`` tokens of a chunk are carried over, so no n-gram is lost at chunk
+boundaries.
+
+Memory is bounded by pruning: once more than ``max_entries`` distinct n-grams
+are tracked, the rarest are dropped (as in lossy counting). ``max_error`` then
+bounds how much any count may be under-reported.
+"""
+
+import sys
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src.config.constant import (
+    NGRAM_COLLOCATION_MIN_COUNT,
+    NGRAM_COLLOCATION_TOP_N,
+    NGRAM_MAX_ENTRIES,
+    NGRAM_MAX_N,
+    NGRAM_SEPARATOR,
+)
+from src.pipeline.counting import FrequencyTable
+
+def check_n(n):
+    if not 1 <= n <= NGRAM_MAX_N:
+        raise ValueError(f"n must be between 1 and {NGRAM_MAX_N}.")
+    return n
+
+
+class NgramCounter:
+    """Running counts of the n-grams of a token stream."""
+
+    def __init__(self, n, max_entries=NGRAM_MAX_ENTRIES):
+        self.n = check_n(n)
+        self.max_entries = max_entries
+        self.vocab = {}
+        self.words = []
+        self.unigrams = np.zeros(0, dtype=np.int64)
+        self.counts = {}  # tuple of token IDs -> count, in first-occurrence order
+        self.total = 0  # number of n-gram windows seen
+        self.max_error = 0
+        self.pruned = 0
+        self._tail = np.zeros(0, dtype=np.int64)
+
+    def intern(self, tokens):
+        """Return the token IDs of ``tokens``, adding new tokens to the vocabulary."""
+        vocab = self.vocab
+        for token in dict.fromkeys(tokens):
+            if token not in vocab:
+                vocab[token] = len(vocab)
+                self.words.append(token)
+        return np.fromiter(map(vocab.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+
+    def update(self, tokens):
+        """Add a chunk of preprocessed tokens, continuing the windows of the previous chunk."""
+        ids = self.intern(tokens)
+        self.unigrams = np.pad(self.unigrams, (0, len(self.vocab) - len(self.unigrams)))
+        self.unigrams += np.bincount(ids, minlength=len(self.vocab))
+
+        sequence = np.concatenate((self._tail, ids))
+        self._tail = sequence[len(sequence) - self.n + 1:] if self.n > 1 else self._tail
+        if len(sequence) < self.n:
+            return
+        windows = sliding_window_view(sequence, self.n)
+        rows, counts = self._count_windows(windows)
+
+        merged = self.counts
+        for row, count in zip(zip(*rows.T.tolist()), counts.tolist()):
+            merged[row] = merged.get(row, 0) + count
+        self.total += len(windows)
+        if len(merged) > self.max_entries:
+            self.prune(self.max_entries // 2)
+
+    def _count_windows(self, windows):
+        """Return the distinct window rows in first-occurrence order and their counts."""
+        radix = max(len(self.vocab), 2)
+        # Pack as many columns per int64 key as the vocabulary size allows
+        per_key = max(1, min(self.n, int(63 / np.log2(radix))))
+        keys = [windows[:, start:start + per_key] @ (radix ** np.arange(min(per_key, self.n - start) - 1, -1, -1,
+                                                                         dtype=np.int64))
+                for start in range(0, self.n, per_key)]
+        if len(keys) == 1:
+            _, first, counts = np.unique(keys[0], return_index=True, return_counts=True)
+        else:
+            order = np.lexsort(keys[::-1])
+            packed = np.stack([key[order] for key in keys], axis=1)
+            starts = np.flatnonzero(np.concatenate(([True], (packed[1:] != packed[:-1]).any(axis=1))))
+            counts = np.diff(np.append(starts, len(order)))
+            first = np.minimum.reduceat(order, starts)
+        order = np.argsort(first, kind="stable")
+        return windows[first[order]], counts[order]
+
+    def prune(self, keep):
+        """Drop the rarest n-grams so that at most ``keep`` remain."""
+        counts = np.fromiter(self.counts.values(), dtype=np.int64, count=len(self.counts))
+        if len(counts) <= keep:
+            return
+        # Everything at or below the threshold goes, so ties never survive partially
+        threshold = int(np.partition(counts, len(counts) - keep - 1)[len(counts) - keep - 1])
+        before = len(self.counts)
+        self.counts = {key: count for key, count in self.counts.items() if count > threshold}
+        self.pruned += before - len(self.counts)
+        self.max_error += threshold
+
+    def key_matrix(self):
+        """Return the token IDs of every tracked n-gram as an ``(entries, n)`` array."""
+        return np.array(list(self.counts), dtype=np.int64).reshape(len(self.counts), self.n)
+
+    def to_table(self, min_count=1, sort=True):
+        """Return the n-gram counts as a FrequencyTable ordered by descending count
+        (by first occurrence if ``sort`` is false)."""
+        words = self.words
+        table = FrequencyTable(
+            [NGRAM_SEPARATOR.join(words[i] for i in key) for key in self.counts],
+            np.fromiter(self.counts.values(), dtype=np.int64, count=len(self.counts)),
+        )
+        if min_count > 1:
+            table = table.filter(min_count)
+        return table.sorted() if sort else table
+
+    def pmi(self):
+        """Return the pointwise mutual information of every tracked n-gram, in table insertion order.
+
+        ``log2(p(w1..wn) / (p(w1) * ... * p(wn)))`` with n-gram probabilities
+        over all windows and word probabilities over all tokens.
+        """
+        if not self.counts:
+            return np.zeros(0)
+        counts = np.fromiter(self.counts.values(), dtype=np.float64, count=len(self.counts))
+        log_words = np.log2(self.unigrams) - np.log2(self.unigrams.sum())
+        return np.log2(counts) - np.log2(self.total) - log_words[self.key_matrix()].sum(axis=1)
+
+    def summary(self, min_count=1, top_n=None, offset=0):
+        """Return ``{"counts": ..., "pmi": ..., "collocations": ...}`` for n-grams seen at least ``min_count``
+        times, by descending count.
+
+        ``top_n`` and ``offset`` select a page of them as in :meth:`FrequencyTable.select`.
+        ``collocations`` ranks them by PMI instead (see :meth:`collocations`).
+        """
+        counts = np.fromiter(self.counts.values(), dtype=np.int64, count=len(self.counts))
+        pmi = self.pmi()
+        # Rank the n-gram positions rather than their names, which are only built for the selection
+        selected = FrequencyTable(np.arange(len(counts)), counts).select(top_n, offset, min_count).words
+        names = self.names(selected)
+        return {
+            "counts": dict(zip(names, counts[selected].tolist())),
+            "pmi": dict(zip(names, pmi[selected].tolist())),
+            "collocations": self.collocations(max(min_count, NGRAM_COLLOCATION_MIN_COUNT),
+                                              top_n or NGRAM_COLLOCATION_TOP_N, pmi),
+        }
+
+    def names(self, positions):
+        """Return the joined names of the n-grams at ``positions`` of the table."""
+        keys = list(self.counts)
+        return [NGRAM_SEPARATOR.join(self.words[i] for i in keys[k]) for k in positions]
+
+    @property
+    def empty(self):
+        return not self.counts
+
+    @property
+    def nbytes(self):
+        words = sum(sys.getsizeof(word) for word in self.words)
+        return words + len(self.counts) * (sys.getsizeof((0,) * self.n) + 100) + self.unigrams.nbytes
+
+    def collocations(self, min_count=NGRAM_COLLOCATION_MIN_COUNT, top_n=NGRAM_COLLOCATION_TOP_N, pmi=None):
+        """Return ``{ngram: pmi}`` for the ``top_n`` n-grams seen at least ``min_count`` times, highest PMI first.
+
+        Pass ``pmi`` when :meth:`pmi` was already computed.
+        """
+        pmi = self.pmi() if pmi is None else pmi
+        counts = np.fromiter(self.counts.values(), dtype=np.int64, count=len(self.counts))
+        selected = np.flatnonzero(counts >= min_count)
+        # Highest PMI first, ties by count then first occurrence
+        selected = selected[np.lexsort((selected, -counts[selected], -pmi[selected]))][:top_n]
+        return dict(zip(self.names(selected), pmi[selected].tolist()))
+
+
+def ngram_statistics(tokens, n, min_count=1):
+    """Return the n-gram counts of a token sequence as a sorted FrequencyTable."""
+    counter = NgramCounter(n)
+    counter.update(tokens)
+    return counter.to_table(min_count)
@@ -0,0 +1,182 @@
+"""Process-pool tokenization for large documents.
+
+A document longer than ``PARALLEL_MIN_CHARS`` is split into sentence-aligned
+shards (see :func:`streaming.split_text`), each shard is preprocessed and
+counted in a persistent worker pool, and the partial counts are merged back
+into the words/counts layout returned by :func:`text_stats.statistics`.
+Batches of short documents are packed into shard-sized jobs for the same pool.
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from src.config.constant import (
+    PARALLEL_MAX_PENDING_SHARDS,
+    PARALLEL_MAX_WORKERS,
+    PARALLEL_MIN_CHARS,
+    PARALLEL_SHARD_SIZE,
+    PARALLEL_START_METHOD,
+)
+from src.pipeline import streaming
+from src.pipeline import text_stats as ts
+from src.pipeline.stopwords import get_stopword_index
+from src.pipeline.timing import record_value, stage
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker():
+    """Load the tokenizer model and the stopword index once per worker."""
+    ts.get_word_tokenizer()
+    get_stopword_index()
+
+
+def _count_shard(shard, normalized=False):
+    tokens = ts.preprocessing(shard, normalized)
+    with stage("count"):
+        return Counter(tokens)
+
+
+def _count_documents(texts):
+    return [_count_shard(text) for text in texts]
+
+
+def get_executor():
+    """Return the persistent, pre-warmed worker pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=PARALLEL_MAX_WORKERS,
+                    mp_context=multiprocessing.get_context(PARALLEL_START_METHOD),
+                    initializer=_init_worker,
+                )
+    return _executor
+
+
+def _worker_pid():
+    return os.getpid()
+
+
+def warm_up():
+    """Start every pool worker so that each one has loaded its models."""
+    executor = get_executor()
+    return len(set(executor.map(_worker_pid, range(PARALLEL_MAX_WORKERS))))
+
+
+def shutdown_executor():
+    """Stop the worker pool. A new one is created on the next parallel call."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
+
+
+def count_chunks_parallel(chunks, max_pending=PARALLEL_MAX_PENDING_SHARDS, normalized=False):
+    """Count the words of every chunk in the worker pool.
+
+    At most ``max_pending`` chunks are in flight at once so that memory stays
+    bounded for streamed input. Partial counts are merged in input order, so
+    ties keep their first-occurrence order as in :func:`text_stats.statistics`.
+    """
+    executor = get_executor()
+    counts = Counter()
+    pending = []
+    for chunk in chunks:
+        if not chunk.strip():
+            continue
+        pending.append(executor.submit(_count_shard, chunk, normalized))
+        if len(pending) >= max_pending:
+            counts.update(pending.pop(0).result())
+    for future in pending:
+        counts.update(future.result())
+    return counts
+
+
+def parallel_counts(text, shard_size=PARALLEL_SHARD_SIZE, normalized=False):
+    """Return a :class:`collections.Counter` of the words in ``text``, tokenized in parallel."""
+    # Workers run in other processes, so their stages show up as one
+    with stage("parallel"):
+        counts = count_chunks_parallel(streaming.split_text(text, shard_size), normalized=normalized)
+    record_value("tokens", counts.total())
+    return counts
+
+
+def stream_counts(chunks, normalized=False):
+    """Return a :class:`collections.Counter` of the words in streamed text chunks.
+
+    Chunks go to the worker pool when more than one worker is configured.
+    """
+    if PARALLEL_MAX_WORKERS > 1:
+        with stage("parallel"):
+            counts = count_chunks_parallel(chunks, normalized=normalized)
+        record_value("tokens", counts.total())
+        return counts
+    return streaming.count_chunks(chunks, normalized=normalized)
+
+
+def word_counts(text, min_chars=PARALLEL_MIN_CHARS, shard_size=PARALLEL_SHARD_SIZE, normalized=False):
+    """Return a :class:`collections.Counter` of the words in ``text``, sharding large documents.
+
+    Shards go to the worker pool when more than one worker is configured, so
+    that the load is balanced across workers, and are tokenized one after
+    another otherwise. Pass ``normalized`` for text already through
+    :func:`text_stats.normalize`.
+    """
+    if len(text) < min_chars:
+        return _count_shard(text, normalized)
+    if PARALLEL_MAX_WORKERS > 1:
+        return parallel_counts(text, shard_size, normalized)
+    return streaming.count_chunks(streaming.split_text(text, shard_size), normalized=normalized)
+
+
+def word_statistics(text, min_chars=PARALLEL_MIN_CHARS, shard_size=PARALLEL_SHARD_SIZE):
+    """Return word statistics for ``text``, sharding large documents (see :func:`word_counts`)."""
+    return streaming.counts_to_table(word_counts(text, min_chars, shard_size))
+
+
+def _group_by_size(indexes, texts, max_chars):
+    group, size = [], 0
+    for i in indexes:
+        if group and size + len(texts[i]) > max_chars:
+            yield group
+            group, size = [], 0
+        group.append(i)
+        size += len(texts[i])
+    if group:
+        yield group
+
+
+def count_documents(texts, min_chars=PARALLEL_MIN_CHARS, shard_size=PARALLEL_SHARD_SIZE):
+    """Return one :class:`collections.Counter` per text, in input order.
+
+    Texts of ``min_chars`` or more are sharded on their own as in
+    :func:`word_counts`. Shorter texts are packed into jobs of about
+    ``shard_size`` characters for the worker pool, or tokenized back to back
+    when only one worker is configured.
+    """
+    results = [None] * len(texts)
+    short = []
+    for i, text in enumerate(texts):
+        if len(text) >= min_chars:
+            results[i] = word_counts(text, min_chars, shard_size)
+        else:
+            short.append(i)
+
+    if PARALLEL_MAX_WORKERS > 1 and len(short) > 1:
+        groups = list(_group_by_size(short, texts, shard_size))
+        with stage("parallel"):
+            jobs = get_executor().map(_count_documents, [[texts[i] for i in group] for group in groups])
+            for group, counts in zip(groups, jobs):
+                for i, doc_counts in zip(group, counts):
+                    results[i] = doc_counts
+                    record_value("tokens", doc_counts.total())
+    else:
+        for i in short:
+            results[i] = _count_shard(texts[i])
+    return results
@@ -0,0 +1,182 @@
+"""Compact, mergeable partial word counts for map/reduce.
+
+A partial file holds word counts sorted by word, so any number of partials
+can be combined with a streaming k-way merge. The layout is a fixed header
+followed by blocks of at most ``PARTIAL_BLOCK_SIZE`` entries. The file ends
+with an empty block::
+
+    header  magic "WFPC", version (u16), n-gram size (u16), words (u64), tokens (u64),
+            key space (u64, one past the largest ``first``)
+    block   entries (u32), vocabulary bytes (u32),
+            counts (int64[entries]), first (int64[entries]),
+            words (UTF-8, NUL-separated, sorted)
+
+``first`` orders words by first occurrence. Merging offsets each input's keys
+past those of the inputs before it, so when the partials are given in corpus
+order the merged table breaks count ties like :func:`text_stats.statistics`
+over the whole corpus.
+"""
+
+import heapq
+import struct
+import numpy as np
+from src.config.constant import PARTIAL_BLOCK_SIZE
+from src.pipeline.counting import FrequencyTable
+
+_MAGIC = b"WFPC"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHQQQ")
+_BLOCK = struct.Struct("<II")
+
+
+class PartialWriter:
+    """Write ``(word, count, first)`` entries in ascending word order to a binary file object."""
+
+    def __init__(self, fileobj, n=1, block_size=PARTIAL_BLOCK_SIZE):
+        self.fileobj = fileobj
+        self.n = n
+        self.block_size = block_size
+        self.words = 0
+        self.total = 0
+        self.key_space = 0
+        self._start = fileobj.tell()
+        self._block = []
+        self._last = None
+        fileobj.write(_HEADER.pack(_MAGIC, _VERSION, n, 0, 0, 0))
+
+    def write(self, word, count, first):
+        if self._last is not None and word <= self._last:
+            raise ValueError("Partial entries must be written in strictly ascending word order.")
+        self._last = word
+        self.key_space = max(self.key_space, first + 1)
+        self._block.append((word, count, first))
+        if len(self._block) >= self.block_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._block:
+            return
+        words, counts, firsts = zip(*self._block)
+        vocabulary = "\0".join(words).encode("utf-8")
+        counts = np.array(counts, dtype="<i8")
+        self.fileobj.write(_BLOCK.pack(len(words), len(vocabulary)))
+        self.fileobj.write(counts.tobytes())
+        self.fileobj.write(np.array(firsts, dtype="<i8").tobytes())
+        self.fileobj.write(vocabulary)
+        self.words += len(words)
+        self.total += int(counts.sum())
+        self._block = []
+
+    def close(self):
+        """Write the last block and the end marker, then fill in the header totals."""
+        self._flush()
+        self.fileobj.write(_BLOCK.pack(0, 0))
+        end = self.fileobj.tell()
+        self.fileobj.seek(self._start)
+        self.fileobj.write(_HEADER.pack(_MAGIC, _VERSION, self.n, self.words, self.total, self.key_space))
+        self.fileobj.seek(end)
+
+
+def read_header(fileobj):
+    """Return ``(n, words, tokens, key_space)`` from the header of a partial file object."""
+    data = fileobj.read(_HEADER.size)
+    if len(data) < _HEADER.size:
+        raise ValueError("Not a partial count file.")
+    magic, version, n, words, total, key_space = _HEADER.unpack(data)
+    if magic != _MAGIC:
+        raise ValueError("Not a partial count file.")
+    if version != _VERSION:
+        raise ValueError(f"Unsupported partial count file version {version}.")
+    return n, words, total, key_space
+
+
+def iter_blocks(fileobj):
+    """Yield ``(words, counts, firsts)`` for each block, after :func:`read_header`."""
+    while True:
+        data = fileobj.read(_BLOCK.size)
+        if len(data) < _BLOCK.size:
+            raise ValueError("Truncated partial count file.")
+        entries, vocabulary_size = _BLOCK.unpack(data)
+        if entries == 0:
+            return
+        counts = np.frombuffer(fileobj.read(8 * entries), dtype="<i8")
+        firsts = np.frombuffer(fileobj.read(8 * entries), dtype="<i8")
+        words = fileobj.read(vocabulary_size).decode("utf-8").split("\0")
+        if len(words) != entries or len(counts) != entries or len(firsts) != entries:
+            raise ValueError("Corrupted partial count block.")
+        yield words, counts, firsts
+
+
+def iter_entries(fileobj):
+    """Yield ``(word, count, first)`` in word order, reading one block at a time."""
+    for words, counts, firsts in iter_blocks(fileobj):
+        yield from zip(words, counts.tolist(), firsts.tolist())
+
+
+def write_partial(counts, fileobj, n=1, block_size=PARTIAL_BLOCK_SIZE):
+    """Write a word -> count mapping or a FrequencyTable as a partial.
+
+    The iteration order of ``counts`` is taken as the first-occurrence order.
+    """
+    if isinstance(counts, FrequencyTable):
+        words, values = counts.words.tolist(), counts.counts.tolist()
+    else:
+        words, values = list(counts), list(counts.values())
+    writer = PartialWriter(fileobj, n, block_size)
+    for first in sorted(range(len(words)), key=words.__getitem__):
+        writer.write(words[first], values[first], first)
+    writer.close()
+    return writer
+
+
+def merge_partials(inputs, output, block_size=PARTIAL_BLOCK_SIZE):
+    """Merge partial file objects into ``output`` with a streaming k-way merge and return the writer.
+
+    Only one block per input is held in memory. All inputs must count the
+    same n-gram size.
+    """
+    streams = []
+    offset = 0
+    n = None
+    for fileobj in inputs:
+        input_n, _, _, key_space = read_header(fileobj)
+        if n is not None and input_n != n:
+            raise ValueError("Cannot merge partial counts of different n-gram sizes.")
+        n = input_n
+        streams.append(_offset_entries(iter_entries(fileobj), offset))
+        offset += key_space
+
+    writer = PartialWriter(output, n or 1, block_size)
+    current, count, first = None, 0, 0
+    for word, word_count, word_first in heapq.merge(*streams):
+        if word == current:
+            count += word_count
+            first = min(first, word_first)
+            continue
+        if current is not None:
+            writer.write(current, count, first)
+        current, count, first = word, word_count, word_first
+    if current is not None:
+        writer.write(current, count, first)
+    writer.close()
+    return writer
+
+
+def _offset_entries(entries, offset):
+    for word, count, first in entries:
+        yield word, count, first + offset
+
+
+def read_table(fileobj):
+    """Load a partial as a FrequencyTable ordered by descending count, ties by first occurrence."""
+    read_header(fileobj)
+    words, counts, firsts = [], [], []
+    for block_words, block_counts, block_firsts in iter_blocks(fileobj):
+        words.extend(block_words)
+        counts.append(block_counts)
+        firsts.append(block_firsts)
+    if not words:
+        return FrequencyTable([], [], is_sorted=True)
+    counts = np.concatenate(counts)
+    order = np.lexsort((np.concatenate(firsts), -counts))
+    return FrequencyTable(np.array(words, dtype=object)[order], counts[order], is_sorted=True)
@@ -0,0 +1,92 @@
+"""Thread-safe bar chart rendering with reusable figure templates.
+
+Charts are drawn with matplotlib's object-oriented ``Figure`` API on an Agg
+canvas instead of the global ``pyplot`` state machine. Each thread keeps its
+own preconfigured figures (one per size), so a render only swaps the bars,
+tick labels and title before saving.
+"""
+
+import io
+import threading
+from collections import OrderedDict
+import numpy as np
+from src.config.constant import (
+    CHART_DPI,
+    CHART_HEIGHT,
+    CHART_TEMPLATES_PER_THREAD,
+    CHART_WIDTH,
+    COUNTS_COLUMN,
+    DEFAULT_TOP_N_WORDS,
+    WORDS_COLUMN,
+)
+from src.pipeline.counting import FrequencyTable
+
+_local = threading.local()
+
+
+class ChartTemplate:
+    """A preconfigured bar chart figure, reused by the thread that created it."""
+
+    def __init__(self, width=CHART_WIDTH, height=CHART_HEIGHT, dpi=CHART_DPI):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=(width, height), dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.axes.set_xlabel('Words')
+        self.axes.set_ylabel('Frequency')
+        self.title = self.axes.set_title("")
+        self.bars = None
+
+    def render(self, words, counts, title, output_format="png"):
+        """Draw the bars and return the chart as a rewound in-memory buffer."""
+        if self.bars is not None:
+            self.bars.remove()
+        # Numeric positions keep the axis free of category mappings from earlier renders
+        positions = np.arange(len(words))
+        self.bars = self.axes.bar(positions, counts)
+        self.axes.set_xticks(positions, words)
+        self.title.set_text(title)
+        self.axes.relim()
+        self.axes.autoscale_view()
+
+        buffer = io.BytesIO()
+        self.figure.savefig(buffer, format=output_format)
+        buffer.seek(0)
+        return buffer
+
+
+def get_template(width=CHART_WIDTH, height=CHART_HEIGHT, dpi=CHART_DPI):
+    """Return this thread's chart template for the given size, creating it if needed."""
+    templates = getattr(_local, "templates", None)
+    if templates is None:
+        templates = _local.templates = OrderedDict()
+    key = (width, height, dpi)
+    template = templates.get(key)
+    if template is None:
+        template = templates[key] = ChartTemplate(width, height, dpi)
+        if len(templates) > CHART_TEMPLATES_PER_THREAD:
+            templates.popitem(last=False)
+    else:
+        templates.move_to_end(key)
+    return template
+
+
+def top_words(dataset, top_n=DEFAULT_TOP_N_WORDS):
+    """Return the ``top_n`` most frequent words and their counts as two lists."""
+    if isinstance(dataset, FrequencyTable):
+        top = dataset.top_k(top_n)
+    else:
+        import pandas as pd
+
+        top = pd.DataFrame(dataset).head(top_n)
+    return list(top[WORDS_COLUMN]), list(top[COUNTS_COLUMN])
+
+
+def render_chart(dataset, top_n=DEFAULT_TOP_N_WORDS, output_format="png",
+                 width=CHART_WIDTH, height=CHART_HEIGHT, dpi=CHART_DPI):
+    """Render the top N words bar chart in ``output_format`` (png or svg) into a buffer."""
+    words, counts = top_words(dataset, top_n)
+    template = get_template(width, height, dpi)
+    return template.render(words, counts, f'Top {top_n} Most Frequent Words', output_format)
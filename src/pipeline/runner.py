@@ -0,0 +1,228 @@
+"""Parallel multi-file runs of the offline pipeline.
+
+Inputs (files, directories or glob patterns) are counted one file per task in
+a process pool. Each file's counts are kept as a partial count file next to
+its outputs, and the aggregate is the merge of those partials, so a file
+whose content hash is unchanged since the last run (see :class:`Manifest`)
+is neither re-read nor re-tokenized.
+"""
+
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.config.constant import (
+    COUNTS_COLUMN,
+    DEFAULT_TOP_N_WORDS,
+    PARALLEL_SHARD_SIZE,
+    PARALLEL_START_METHOD,
+    PARTIAL_FILE_EXTENSION,
+    RUN_FILE_PATTERN,
+    RUN_HASH_BLOCK_SIZE,
+    RUN_MANIFEST_NAME,
+)
+from src.pipeline import partials
+from src.pipeline import rendering
+from src.pipeline import streaming
+from src.pipeline import text_stats as ts
+from src.pipeline.parallel import _init_worker
+
+
+def expand_inputs(specs, pattern=RUN_FILE_PATTERN):
+    """Return the files named by ``specs`` (paths, directories or glob patterns) without duplicates.
+
+    Directories are searched recursively for ``pattern``. Matches of one spec
+    are sorted; specs keep their order.
+    """
+    paths = {}
+    for spec in specs:
+        if os.path.isdir(spec):
+            matches = sorted(glob.glob(os.path.join(glob.escape(spec), "**", pattern), recursive=True))
+        elif os.path.isfile(spec):
+            matches = [spec]
+        else:
+            matches = sorted(glob.glob(spec, recursive=True))
+            if not matches:
+                raise ValueError(f"No input files match '{spec}'.")
+        for path in matches:
+            if os.path.isfile(path):
+                paths.setdefault(os.path.abspath(path), None)
+    return list(paths)
+
+
+def file_digest(path, block_size=RUN_HASH_BLOCK_SIZE):
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def output_stems(paths, output_dir):
+    """Map each input path to the path, without extension, of its outputs under ``output_dir``/files."""
+    base = os.path.commonpath([os.path.dirname(path) for path in paths]) if paths else ""
+    return {path: os.path.join(output_dir, "files", os.path.relpath(path, base)) for path in paths}
+
+
+def output_paths(stem, formats):
+    """Return the partial and every requested output of ``stem``."""
+    return [f"{stem}.{extension}" for extension in (PARTIAL_FILE_EXTENSION, *formats)]
+
+
+class Manifest:
+    """Content hashes and results of the files counted by earlier runs, kept as JSON."""
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+
+    def is_fresh(self, path, digest, n, outputs):
+        """Return whether ``path`` was counted with the same content and n and its outputs still exist."""
+        entry = self.files.get(path)
+        return (entry is not None and entry["sha256"] == digest and entry["n"] == n
+                and all(os.path.exists(output) for output in outputs))
+
+    def record(self, path, digest, n, result):
+        self.files[path] = {"sha256": digest, "n": n, "words": result["words"], "tokens": result["tokens"]}
+
+    def save(self):
+        """Write the manifest atomically, so an interrupted run keeps the files finished so far."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+def count_file_chunks(chunks, n=1):
+    """Count an iterable of text chunks into a word -> count mapping in first-occurrence order."""
+    if n > 1:
+        return streaming.stream_ngram_statistics(chunks, n).to_table(sort=False)
+    return streaming.count_chunks(chunks)
+
+
+def write_outputs(word_stats, stem, formats, top_n=DEFAULT_TOP_N_WORDS):
+    """Write word statistics as ``<stem>.<format>`` for each format."""
+    directory, name = os.path.split(stem)
+    for output_format in formats:
+        filename = f"{name}.{output_format}"
+        if output_format == "csv":
+            ts.export_results(word_stats, filename, directory)
+        elif output_format == "json":
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, filename), "w", encoding="utf-8") as f:
+                json.dump({COUNTS_COLUMN: word_stats.to_dict()}, f, ensure_ascii=False)
+        else:
+            ts.save_buffer(rendering.render_chart(word_stats, top_n, output_format), filename, directory)
+
+
+def process_file(path, stem, n=1, formats=(), top_n=DEFAULT_TOP_N_WORDS):
+    """Count one file, write its partial and outputs, and return its totals. Runs in a pool worker."""
+    start = time.perf_counter()
+    chunks = streaming.iter_file_chunks(os.path.basename(path), os.path.dirname(path), PARALLEL_SHARD_SIZE)
+    counts = count_file_chunks(chunks, n)
+    os.makedirs(os.path.dirname(stem), exist_ok=True)
+    partial_path = f"{stem}.{PARTIAL_FILE_EXTENSION}"
+    with open(partial_path, "wb") as f:
+        writer = partials.write_partial(counts, f, n=n)
+    if formats:
+        with open(partial_path, "rb") as f:
+            write_outputs(partials.read_table(f), stem, formats, top_n)
+    return {"words": writer.words, "tokens": writer.total, "seconds": time.perf_counter() - start}
+
+
+def merge_outputs(stems, output_dir, formats, top_n=DEFAULT_TOP_N_WORDS):
+    """Merge the partials of ``stems``, in order, into the aggregate partial and outputs."""
+    stem = os.path.join(output_dir, "aggregate")
+    inputs = [open(f"{file_stem}.{PARTIAL_FILE_EXTENSION}", "rb") for file_stem in stems]
+    try:
+        with open(f"{stem}.{PARTIAL_FILE_EXTENSION}", "wb") as f:
+            writer = partials.merge_partials(inputs, f)
+    finally:
+        for fileobj in inputs:
+            fileobj.close()
+    with open(f"{stem}.{PARTIAL_FILE_EXTENSION}", "rb") as f:
+        write_outputs(partials.read_table(f), stem, formats, top_n)
+    return writer
+
+
+def run_files(paths, output_dir, n=1, formats=("csv",), workers=1, force=False,
+              aggregate=True, top_n=DEFAULT_TOP_N_WORDS, progress=print):
+    """Count every file into ``output_dir``, skipping files unchanged since the last run.
+
+    Files are processed in a pool of ``workers`` processes, or inline with one
+    worker. ``progress`` receives one line per finished file. Returns the run
+    totals; files that fail are reported and left out of the aggregate.
+    """
+    start = time.perf_counter()
+    manifest = Manifest(os.path.join(output_dir, RUN_MANIFEST_NAME))
+    stems = output_stems(paths, output_dir)
+    sizes = {path: os.path.getsize(path) for path in paths}
+    digests = {}
+    todo = []
+    for path in paths:
+        digests[path] = file_digest(path)
+        if force or not manifest.is_fresh(path, digests[path], n, output_paths(stems[path], formats)):
+            todo.append(path)
+    skipped = len(paths) - len(todo)
+    if skipped:
+        progress(f"Skipping {skipped} unchanged of {len(paths)} files")
+
+    failed = {}
+    completed = 0
+    done_bytes = done_tokens = 0
+
+    def finish(path, result=None, error=None):
+        nonlocal completed, done_bytes, done_tokens
+        completed += 1
+        if error is not None:
+            failed[path] = str(error)
+            progress(f"[{completed}/{len(todo)}] {path}: failed: {error}")
+            return
+        manifest.record(path, digests[path], n, result)
+        manifest.save()
+        done_bytes += sizes[path]
+        done_tokens += result["tokens"]
+        elapsed = time.perf_counter() - start
+        progress(f"[{completed}/{len(todo)}] {path}: {result['tokens']} tokens in {result['seconds']:.2f}s; "
+                 f"overall {done_bytes / 1e6 / elapsed:.2f} MB/s, {done_tokens / elapsed:.0f} tokens/s")
+
+    if workers > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo)),
+                                 mp_context=multiprocessing.get_context(PARALLEL_START_METHOD),
+                                 initializer=_init_worker) as pool:
+            futures = {pool.submit(process_file, path, stems[path], n, formats, top_n): path for path in todo}
+            for future in as_completed(futures):
+                try:
+                    finish(futures[future], future.result())
+                except (OSError, ValueError) as e:
+                    finish(futures[future], error=e)
+    else:
+        for path in todo:
+            try:
+                finish(path, process_file(path, stems[path], n, formats, top_n))
+            except (OSError, ValueError) as e:
+                finish(path, error=e)
+
+    counted = [path for path in paths if path not in failed]
+    if aggregate and counted:
+        merge_outputs([stems[path] for path in counted], output_dir, formats, top_n)
+
+    seconds = time.perf_counter() - start
+    tokens = sum(manifest.files[path]["tokens"] for path in counted)
+    return {
+        "files": len(paths),
+        "processed": len(todo) - len(failed),
+        "skipped": skipped,
+        "failed": failed,
+        "tokens": tokens,
+        "bytes": done_bytes,
+        "seconds": seconds,
+    }
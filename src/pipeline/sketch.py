@@ -0,0 +1,190 @@
+"""Approximate heavy hitters with the Space-Saving algorithm.
+
+A :class:`SpaceSaving` summary tracks at most ``capacity`` words, so memory
+stays bounded however large the vocabulary of the stream grows. When a new
+word arrives and the summary is full, the word with the smallest count is
+evicted and the newcomer inherits that count as its error.
+
+Every reported count is an overestimate by at most the word's ``error``, and
+``error`` never exceeds ``total / capacity``. Any word occurring more than
+``total / capacity`` times is guaranteed to be tracked.
+"""
+
+import heapq
+import math
+import os
+import struct
+import sys
+from collections import Counter
+import numpy as np
+from src.config.constant import SKETCH_DEFAULT_ERROR, SKETCH_MAX_CAPACITY
+from src.pipeline import text_stats as ts
+from src.pipeline.counting import FrequencyTable
+from src.pipeline.timing import stage
+
+_MAGIC = b"SSK1"
+_HEADER = struct.Struct("<4sIQII")  # magic, capacity, total, words, encoded word bytes
+
+
+def capacity_for_error(max_error=SKETCH_DEFAULT_ERROR, max_capacity=SKETCH_MAX_CAPACITY):
+    """Return the capacity whose error bound is ``max_error`` of the stream size."""
+    if not 0 < max_error < 1:
+        raise ValueError("max_error must be between 0 and 1.")
+    return min(math.ceil(1 / max_error), max_capacity)
+
+
+class SpaceSaving:
+    """Space-Saving summary of a word stream.
+
+    ``counts`` and ``errors`` are dicts in insertion order; a min-heap of
+    ``(count, order, word)`` entries finds the eviction candidate. Heap
+    entries go stale when a tracked count grows and are refreshed lazily when
+    they reach the top.
+    """
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        self._heap = []
+        self._order = 0
+
+    @classmethod
+    def from_error(cls, max_error=SKETCH_DEFAULT_ERROR):
+        return cls(capacity_for_error(max_error))
+
+    def update(self, tokens):
+        """Add a token sequence to the summary."""
+        self.update_counts(Counter(tokens))
+
+    def update_counts(self, counts):
+        """Add a word -> count mapping (e.g. the Counter of one chunk) to the summary."""
+        tracked = self.counts
+        for word, count in counts.items():
+            self.total += count
+            if word in tracked:
+                tracked[word] += count
+            elif len(tracked) < self.capacity:
+                self._insert(word, count, 0)
+            else:
+                floor = self._evict_min()
+                self._insert(word, floor + count, floor)
+
+    def _insert(self, word, count, error):
+        self.counts[word] = count
+        self.errors[word] = error
+        heapq.heappush(self._heap, (count, self._order, word))
+        self._order += 1
+
+    def _evict_min(self):
+        heap = self._heap
+        while True:
+            count, order, word = heap[0]
+            current = self.counts.get(word)
+            if current == count:
+                heapq.heappop(heap)
+                del self.counts[word]
+                del self.errors[word]
+                return count
+            # Stale entry: the word was incremented since it was pushed
+            heapq.heapreplace(heap, (current, order, word))
+
+    @property
+    def max_error(self):
+        """Upper bound of every count's overestimate, and of the count of any untracked word."""
+        # The latest newcomer always carries a nonzero error once anything was evicted
+        if not any(self.errors.values()):
+            return 0
+        return min(self.counts.values())
+
+    @property
+    def empty(self):
+        return not self.counts
+
+    def to_table(self):
+        """Return the estimated counts as a FrequencyTable ordered by descending count."""
+        return FrequencyTable.from_counter(self.counts).sorted()
+
+    def top_k(self, k):
+        return FrequencyTable.from_counter(self.counts).top_k(k)
+
+    def summary(self, top_n=None, offset=0, min_count=1):
+        """Return the estimated counts, their error bounds and the stream totals as a dict.
+
+        ``top_n``, ``offset`` and ``min_count`` select words as in :meth:`FrequencyTable.select`.
+        """
+        table = FrequencyTable.from_counter(self.counts).select(top_n, offset, min_count)
+        words = table.words.tolist()
+        return {
+            "counts": dict(zip(words, table.counts.tolist())),
+            "errors": {word: self.errors[word] for word in words},
+            "total": self.total,
+            "capacity": self.capacity,
+            "max_error": self.max_error,
+        }
+
+    @property
+    def nbytes(self):
+        words = sum(sys.getsizeof(word) for word in self.counts)
+        return words + 2 * sys.getsizeof(self.counts) + sys.getsizeof(self._heap) * 2
+
+    def to_bytes(self):
+        """Serialize the summary: a fixed header, the NUL-separated words, then int64 counts and errors."""
+        words = list(self.counts)
+        encoded = "\0".join(words).encode("utf-8")
+        header = _HEADER.pack(_MAGIC, self.capacity, self.total, len(words), len(encoded))
+        counts = np.fromiter(self.counts.values(), dtype="<i8", count=len(words))
+        errors = np.fromiter(self.errors.values(), dtype="<i8", count=len(words))
+        return header + encoded + counts.tobytes() + errors.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Rebuild a summary written by :meth:`to_bytes`."""
+        magic, capacity, total, size, encoded_size = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a Space-Saving checkpoint.")
+        offset = _HEADER.size
+        words = data[offset:offset + encoded_size].decode("utf-8").split("\0") if size else []
+        offset += encoded_size
+        counts = np.frombuffer(data, dtype="<i8", count=size, offset=offset).tolist()
+        errors = np.frombuffer(data, dtype="<i8", count=size, offset=offset + 8 * size).tolist()
+        sketch = cls(capacity)
+        sketch.total = total
+        for word, count, error in zip(words, counts, errors):
+            sketch._insert(word, count, error)
+        return sketch
+
+    def save(self, path):
+        """Write a checkpoint atomically."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __repr__(self):
+        return f"SpaceSaving({len(self)}/{self.capacity} words, total={self.total})"
+
+
+def sketch_statistics(chunks, sketch=None, max_error=SKETCH_DEFAULT_ERROR, normalized=False):
+    """Feed the preprocessed tokens of each chunk to a Space-Saving summary and return it.
+
+    Pass ``sketch`` to resume a summary loaded from a checkpoint.
+    """
+    sketch = SpaceSaving.from_error(max_error) if sketch is None else sketch
+    for chunk in chunks:
+        if chunk.strip():
+            tokens = ts.preprocessing(chunk, normalized)
+            with stage("count"):
+                sketch.update(tokens)
+    return sketch
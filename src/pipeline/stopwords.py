@@ -0,0 +1,207 @@
+"""Process-wide stopword index shared by every analysis call."""
+
+import glob
+import hashlib
+import os
+import threading
+import time
+from src.config.constant import (
+    DATA_DIR,
+    NLTK_STOPWORDS_LANGUAGE,
+    STOPWORDS_FILE_PATTERN,
+    STOPWORDS_RELOAD_INTERVAL,
+)
+
+_END = object()
+_nltk_import_lock = threading.Lock()
+
+
+def load_vi_stopwords(patternpath, rootpath):
+    """Load Vietnamese stopwords from multiple txt files."""
+    vi_stopwords = []
+    for filepath in glob.glob(pathname=patternpath, root_dir=rootpath):
+        fullpath = os.path.join(rootpath, filepath)
+        if os.path.exists(fullpath):
+            with open(fullpath, encoding="utf-8") as f:
+                vi_stopwords.extend([line.strip() for line in f if line.strip()])
+        else:
+            print(f"File not found: {filepath}")
+    return vi_stopwords
+
+
+def import_nltk():
+    """Import nltk with its corpus readers.
+
+    nltk's package imports are circular and fail when two threads import it at
+    the same time (e.g. the warm-up thread and a first request), so the first
+    import is serialized.
+    """
+    with _nltk_import_lock:
+        import nltk
+        import nltk.corpus  # noqa: F401
+    return nltk
+
+
+def load_nltk_stopwords(language):
+    """Load the NLTK stopword list for the given language."""
+    return import_nltk().corpus.stopwords.words(language)
+
+
+class StopwordTrie:
+    """Syllable trie over multi-syllable stopwords such as "biết bao nhiêu"."""
+
+    def __init__(self, phrases=()):
+        self._root = {}
+        self.size = 0
+        for phrase in phrases:
+            self.add(phrase)
+
+    def add(self, phrase):
+        """Insert a space-separated stopword phrase."""
+        node = self._root
+        for syllable in phrase.split():
+            node = node.setdefault(syllable, {})
+        if _END not in node:
+            node[_END] = True
+            self.size += 1
+
+    def longest_match(self, syllables, start=0):
+        """Return how many syllables from ``start`` form the longest stopword, or 0."""
+        node = self._root
+        longest = 0
+        for offset in range(start, len(syllables)):
+            node = node.get(syllables[offset])
+            if node is None:
+                break
+            if _END in node:
+                longest = offset - start + 1
+        return longest
+
+    def starts_with(self, syllable):
+        """Return whether some stopword begins with ``syllable``."""
+        return syllable in self._root
+
+    def __contains__(self, phrase):
+        node = self._root
+        for syllable in phrase.split():
+            node = node.get(syllable)
+            if node is None:
+                return False
+        return _END in node
+
+    def __len__(self):
+        return self.size
+
+
+class StopwordIndex:
+    """Frozen set of English and Vietnamese stopwords, rebuilt when the files change.
+
+    Tokens are tested with a single hash lookup. Multi-syllable Vietnamese
+    entries are also kept in a :class:`StopwordTrie`, so that a stopword split
+    into single-syllable tokens (by the whitespace tokenizer, or when
+    underthesea does not join it) is removed too.
+    The stopword files are re-stat'ed at most every ``reload_interval`` seconds;
+    if any mtime (or the set of matching files) changed, the index is rebuilt.
+    The words, trie and version are published together as one tuple, so a
+    reader never mixes the version of one build with the words of another.
+    """
+
+    def __init__(self, patternpath=STOPWORDS_FILE_PATTERN, rootpath=DATA_DIR,
+                 language=NLTK_STOPWORDS_LANGUAGE, reload_interval=STOPWORDS_RELOAD_INTERVAL):
+        self.patternpath = patternpath
+        self.rootpath = rootpath
+        self.language = language
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtimes = {}
+        self._checked_at = 0.0
+        self._snapshot = (frozenset(), StopwordTrie(), "")  # (words, trie, version)
+        self.reload()
+
+    def _file_mtimes(self):
+        mtimes = {}
+        for filepath in glob.glob(pathname=self.patternpath, root_dir=self.rootpath):
+            fullpath = os.path.join(self.rootpath, filepath)
+            try:
+                mtimes[fullpath] = os.stat(fullpath).st_mtime_ns
+            except OSError:
+                continue
+        return mtimes
+
+    def reload(self):
+        """Rebuild the index from the NLTK corpus and the stopword files."""
+        with self._lock:
+            mtimes = self._file_mtimes()
+            words = set(load_vi_stopwords(self.patternpath, self.rootpath))
+            if self.language:
+                words.update(load_nltk_stopwords(self.language))
+
+            trie = StopwordTrie(word for word in words if " " in word)
+            version = hashlib.sha1("\n".join(sorted(words)).encode("utf-8")).hexdigest()[:12]
+            self._snapshot = (frozenset(words), trie, version)
+            self._mtimes = mtimes
+            self._checked_at = time.monotonic()
+
+    @property
+    def words(self):
+        return self._snapshot[0]
+
+    @property
+    def trie(self):
+        return self._snapshot[1]
+
+    @property
+    def version(self):
+        return self._snapshot[2]
+
+    def refresh(self):
+        """Reload the index if the stopword files changed. Return True if reloaded."""
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return False
+        self._checked_at = now
+        if self._file_mtimes() == self._mtimes:
+            return False
+        self.reload()
+        return True
+
+    def filter(self, tokens):
+        """Return the tokens that are not stopwords, dropping runs of tokens that spell a multi-syllable one."""
+        words, trie, _ = self._snapshot
+        kept = []
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token in words:
+                i += 1
+                continue
+            if trie.starts_with(token):
+                length = trie.longest_match(tokens, i)
+                if length:
+                    i += length
+                    continue
+            kept.append(token)
+            i += 1
+        return kept
+
+    def __contains__(self, token):
+        return token in self.words
+
+    def __len__(self):
+        return len(self.words)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_stopword_index():
+    """Return the process-wide stopword index, reloading it if the files changed."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = StopwordIndex()
+        return _index
+    _index.refresh()
+    return _index
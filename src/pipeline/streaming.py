@@ -0,0 +1,212 @@
+"""Chunked analysis of inputs that do not fit in memory.
+
+Text is read in bounded chunks that end on a paragraph, sentence or
+whitespace boundary, each chunk goes through :func:`text_stats.preprocessing`
+and the word counts are merged incrementally. Peak memory is one chunk plus
+the vocabulary, independent of the input size.
+
+Server-local files can also be read through a memory map
+(:func:`iter_mapped_chunks`): the page cache backs the bytes and only one
+decoded block and the pending chunk are held as text.
+"""
+
+import codecs
+import mmap
+import os
+import re
+from collections import Counter
+from src.config.constant import (
+    LOCAL_DECODE_ERRORS,
+    LOCAL_READ_BLOCK_SIZE,
+    STREAM_CHUNK_SIZE,
+    STREAM_MAX_CHUNK_SIZE,
+)
+from src.pipeline import text_stats as ts
+from src.pipeline.counting import FrequencyTable
+from src.pipeline.ngrams import NgramCounter
+from src.pipeline.timing import stage
+
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s")
+_WHITESPACE = " \t\r\f\v"
+
+
+def find_boundary(text, limit, start=0):
+    """Return the index just past the last safe split point in ``text[start:limit]``, or 0.
+
+    Paragraph breaks are preferred, then sentence ends, then any whitespace,
+    so that chunks never cut a word and rarely cut a sentence.
+    """
+    limit = min(limit, len(text))
+    idx = text.rfind("\n", start, limit)
+    if idx >= 0:
+        return idx + 1
+
+    end = 0
+    for match in _SENTENCE_END.finditer(text, start, limit):
+        end = match.end()
+    if end:
+        return end
+
+    return max(text.rfind(char, start, limit) for char in _WHITESPACE) + 1
+
+
+def split_text(text, chunk_size=STREAM_CHUNK_SIZE, max_chunk_size=STREAM_MAX_CHUNK_SIZE):
+    """Yield consecutive pieces of an in-memory ``text`` of about ``chunk_size`` characters."""
+    start = 0
+    while len(text) - start > chunk_size:
+        cut = (find_boundary(text, start + chunk_size, start)
+               or find_boundary(text, start + max_chunk_size, start)
+               or min(start + max_chunk_size, len(text)))
+        yield text[start:cut]
+        start = cut
+    if start < len(text):
+        yield text[start:]
+
+
+def iter_chunks(fileobj, chunk_size=STREAM_CHUNK_SIZE, max_chunk_size=STREAM_MAX_CHUNK_SIZE):
+    """Yield text chunks read from a text-mode file object (see :func:`rechunk`)."""
+    yield from rechunk(iter(lambda: fileobj.read(chunk_size), ""), chunk_size, max_chunk_size)
+
+
+def rechunk(blocks, chunk_size=STREAM_CHUNK_SIZE, max_chunk_size=STREAM_MAX_CHUNK_SIZE):
+    """Yield text chunks cut on safe boundaries from an iterable of text blocks.
+
+    A chunk is cut at the last boundary found within ``chunk_size`` characters.
+    If the buffer grows to ``max_chunk_size`` without any whitespace the chunk
+    is cut there anyway to keep memory bounded.
+    """
+    buffer = ""
+    for block in blocks:
+        chunks, buffer = cut_chunks(buffer + block, chunk_size, max_chunk_size)
+        yield from chunks
+    if buffer:
+        yield buffer
+
+
+def cut_chunks(buffer, chunk_size=STREAM_CHUNK_SIZE, max_chunk_size=STREAM_MAX_CHUNK_SIZE):
+    """Return the chunks that can be cut from the start of ``buffer`` (see :func:`rechunk`) and the rest."""
+    chunks = []
+    start = 0  # chunks are cut by index so large blocks are not copied once per chunk
+    while len(buffer) - start > chunk_size:
+        # The fallback search stops at max_chunk_size, like split_text, so no chunk can grow past it
+        cut = (find_boundary(buffer, start + chunk_size, start)
+               or find_boundary(buffer, start + max_chunk_size, start))
+        if not cut:
+            if len(buffer) - start < max_chunk_size:
+                break
+            cut = start + max_chunk_size
+        chunks.append(buffer[start:cut])
+        start = cut
+    return chunks, buffer[start:]
+
+
+def iter_file_chunks(filename, rootpath, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the chunks of a UTF-8 text file under ``rootpath``."""
+    fullpath = os.path.join(rootpath, filename)
+    if not os.path.exists(fullpath):
+        return
+    with open(fullpath, encoding="utf-8") as f:
+        yield from iter_chunks(f, chunk_size)
+
+
+class Utf8Decoder:
+    """Incremental UTF-8 decoder of a byte stream.
+
+    A character split between two blocks is completed by the next one.
+    ``errors`` is the codec error handler: with ``"strict"`` invalid UTF-8
+    raises UnicodeError giving the stream offset of the first bad byte,
+    ``"replace"`` yields U+FFFD in its place and ``"ignore"`` drops it.
+    """
+
+    def __init__(self, errors=LOCAL_DECODE_ERRORS):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors)
+        self.offset = 0  # bytes decoded so far
+
+    def decode(self, block, final=False):
+        # Bytes of an incomplete character carried over from the previous block
+        pending = len(self._decoder.getstate()[0])
+        try:
+            text = self._decoder.decode(block, final)
+        except UnicodeDecodeError as e:
+            raise UnicodeError(f"Invalid UTF-8 at byte {self.offset - pending + e.start}: {e.reason}") from None
+        self.offset += len(block)
+        return text
+
+
+def decode_blocks(data, errors=LOCAL_DECODE_ERRORS, block_size=LOCAL_READ_BLOCK_SIZE):
+    """Yield the text of UTF-8 bytes-like ``data``, decoded ``block_size`` bytes at a time.
+
+    Blocks are zero-copy slices of ``data``; invalid bytes are handled by
+    ``errors`` as in :class:`Utf8Decoder`.
+    """
+    decoder = Utf8Decoder(errors)
+    view = memoryview(data)
+    try:
+        for start in range(0, len(view) + 1, block_size):
+            with view[start:start + block_size] as block:
+                text = decoder.decode(block, final=start + block_size > len(view))
+            if text:
+                yield text
+    finally:
+        view.release()
+
+
+def iter_mapped_chunks(path, chunk_size=STREAM_CHUNK_SIZE, errors=LOCAL_DECODE_ERRORS,
+                       block_size=LOCAL_READ_BLOCK_SIZE):
+    """Yield the text chunks of a UTF-8 file read through a read-only memory map.
+
+    Invalid bytes are handled by ``errors`` as in :class:`Utf8Decoder`.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            blocks = decode_blocks(mapped, errors, block_size)
+            try:
+                yield from rechunk(blocks, chunk_size)
+            finally:
+                # Release the view on the map before it is closed
+                blocks.close()
+
+
+def iter_tokens(chunks, normalized=False):
+    """Yield the preprocessed token list of each chunk."""
+    for chunk in chunks:
+        if chunk.strip():
+            yield ts.preprocessing(chunk, normalized)
+
+
+def count_chunks(chunks, counts=None, normalized=False):
+    """Merge the word counts of every chunk into a :class:`collections.Counter`."""
+    counts = Counter() if counts is None else counts
+    for tokens in iter_tokens(chunks, normalized):
+        with stage("count"):
+            counts.update(tokens)
+    return counts
+
+
+def counts_to_table(counts):
+    """Return word counts as a sorted table, like :func:`text_stats.statistics`."""
+    return FrequencyTable.from_counter(counts).sorted()
+
+
+def stream_ngram_statistics(chunks, n, normalized=False):
+    """Return the :class:`ngrams.NgramCounter` of an iterable of text chunks.
+
+    N-grams spanning two chunks are counted, since the counter carries the
+    last ``n - 1`` tokens of each chunk over to the next.
+    """
+    counter = NgramCounter(n)
+    for tokens in iter_tokens(chunks, normalized):
+        with stage("count"):
+            counter.update(tokens)
+    return counter
+
+
+def stream_statistics(chunks, n=1):
+    """Return word (or n-gram) statistics over an iterable of text chunks."""
+    if n > 1:
+        return stream_ngram_statistics(chunks, n).to_table()
+    return counts_to_table(count_chunks(chunks))
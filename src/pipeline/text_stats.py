@@ -1,118 +1,226 @@
 import re
-import pandas as pd
-import nltk
-from nltk.corpus import stopwords
-import underthesea
-import matplotlib.pyplot as plt
 import os
-import glob
+import io
+import csv
+import codecs
+import shutil
+import tempfile
+import threading
+import time
 from src.config.constant import (
     COUNTS_COLUMN,
-    DATA_DIR,
+    CSV_BATCH_ROWS,
     DEFAULT_TOP_N_WORDS,
-    STOPWORDS_FILE_PATTERN,
+    LOCAL_DATA_DIRS,
+    LOCAL_DECODE_ERRORS,
+    OUTPUT_FILE_PREFIX,
+    OUTPUT_RETENTION_SECONDS,
+    SPOOL_MAX_MEMORY,
+    STREAM_RESPONSE_CHUNK_SIZE,
+    TOKEN_CACHE_ENABLED,
     WORDS_COLUMN,
 )
-
-def ensure_nltk_resources():
-    try:
-        nltk.data.find("tokenizers/punkt")
-    except LookupError:
-        nltk.download("punkt")
-        nltk.download("punkt_tab")
-
-    try:
-        nltk.data.find("corpora/stopwords")
-    except LookupError:
-        nltk.download("stopwords")
-
-def import_data(filename, rootpath):
-    """Load a text file from rootpath and return its contents as a DataFrame."""
+from src.pipeline import rendering
+from src.pipeline import tokenizer
+from src.pipeline.timing import record_value, stage
+from src.pipeline.token_cache import get_token_cache
+from src.pipeline.counting import FrequencyTable
+from src.pipeline.ngrams import ngram_statistics
+from src.pipeline.stopwords import get_stopword_index, import_nltk, load_vi_stopwords  # noqa: F401
+
+# Heavy dependencies (pandas, nltk, underthesea, matplotlib) are imported on
+# the code paths that use them, so importing this module stays cheap.
+
+_tokenizer_lock = threading.Lock()
+_word_tokenize = None
+
+NLTK_RESOURCES = {
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "stopwords": "corpora/stopwords",
+}
+
+def ensure_nltk_resources(download=False, resources=NLTK_RESOURCES):
+    """Return the names of missing NLTK resources, downloading them first if ``download`` is set."""
+    nltk = import_nltk()
+
+    missing = []
+    for name, path in resources.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            if download and nltk.download(name):
+                continue
+            missing.append(name)
+    return missing
+
+def get_word_tokenizer():
+    """Return underthesea's ``word_tokenize`` with its CRF model loaded.
+
+    underthesea publishes its model before loading it on the first call, so
+    concurrent first calls are serialized here.
+    """
+    global _word_tokenize
+    if _word_tokenize is None:
+        with _tokenizer_lock:
+            if _word_tokenize is None:
+                import underthesea
+
+                underthesea.word_tokenize("khởi động")
+                _word_tokenize = underthesea.word_tokenize
+    return _word_tokenize
+
+def import_data(filename, rootpath, errors=LOCAL_DECODE_ERRORS):
+    """Load a text file from rootpath and return its contents as a string.
+
+    Invalid UTF-8 is handled by the codec error handler ``errors``. Large
+    files are better read with :func:`streaming.iter_mapped_chunks`.
+    """
     fullpath = os.path.join(rootpath, filename)
     data = ""
     if os.path.exists(fullpath):
-        with open(fullpath, encoding="utf-8") as f:
+        with open(fullpath, encoding="utf-8", errors=errors) as f:
             data = f.read()
     return data
 
-def load_vi_stopwords(patternpath, rootpath):
-    """Load Vietnamese stopwords from multiple txt files."""
-    vi_stopwords = []
-    for filepath in glob.glob(pathname=patternpath, root_dir=rootpath):
-        fullpath = os.path.join(rootpath, filepath)
-        if os.path.exists(fullpath):
-            with open(fullpath, encoding="utf-8") as f:
-                vi_stopwords.extend([line.strip() for line in f if line.strip()])
-        else:
-            print(f"File not found: {filepath}")
-    return vi_stopwords
-
-def preprocessing(text):
-    """Return individual words after preprocessing."""
+def resolve_data_path(filename, allowed_dirs=LOCAL_DATA_DIRS):
+    """Return the real path of ``filename`` relative to the first of ``allowed_dirs`` that has it.
+
+    Raise PermissionError when it resolves outside an allowed directory
+    (through ``..``, an absolute path or a symlink), FileNotFoundError when no
+    allowed directory has it.
+    """
+    for rootpath in allowed_dirs:
+        root = os.path.realpath(rootpath)
+        path = os.path.realpath(os.path.join(root, filename))
+        if os.path.commonpath([root, path]) != root:
+            raise PermissionError(f"'{filename}' is outside the allowed data directories.")
+        if os.path.isfile(path):
+            return path
+    raise FileNotFoundError(f"'{filename}' was not found in the allowed data directories.")
+
+_PUNCTUATION = re.compile(r"[^\w\s\-]")
+
+def normalize(text):
+    """Return the text lowercased with punctuation replaced by spaces."""
+    return _PUNCTUATION.sub(" ", text).lower()
+
+def preprocessing(text, normalized=False):
+    """Return individual words after preprocessing. Pass ``normalized`` for text already through :func:`normalize`."""
     # Lowercase and Punctual Removal
-    text = re.sub(r"[^\w\s\-]", " ", text).lower()
-
-    # Stop word removal
-    # English
-    en_stopwords = stopwords.words("english")
-    # Vietnamese
-    rootpath = DATA_DIR
-    pattern = STOPWORDS_FILE_PATTERN
-    vi_stopwords = load_vi_stopwords(pattern, rootpath)
+    if not normalized:
+        with stage("normalize"):
+            text = normalize(text)
 
-    # Both English and Vietnamese Tokenization
-    tokens = underthesea.word_tokenize(text)
+    # Vietnamese paragraphs through underthesea, other languages split on whitespace
+    with stage("tokenize"):
+        cache = get_token_cache() if TOKEN_CACHE_ENABLED else None
+        tokens = tokenizer.tokenize(text, get_word_tokenizer, cache=cache)
 
     # Remove both English and Vietnamese stopwords
-    tokens = [token for token in tokens if token not in en_stopwords and token not in vi_stopwords]
+    with stage("stopwords"):
+        tokens = get_stopword_index().filter(tokens)
+    record_value("tokens", len(tokens))
     return tokens
 
-def statistics(tokens):
-    """Return the number of occurrences of each word in the text."""
-    # Using the unigrams to count the number of occurrences of each word 
-    unigrams = (pd.Series(nltk.ngrams(tokens, 1)))
-
-    # Convert unigrams from tuple to string
-    nwords = unigrams.apply(
-        lambda words: words[0]
-    )
-    
-    # Define a Dataframe from nwords Series;
-    # count the number of occurrences of each word and reset index
-    df = nwords.value_counts().reset_index()
-    df.columns = [WORDS_COLUMN, COUNTS_COLUMN]
+def statistics(tokens, n=1):
+    """Return the number of occurrences of each word (or n-gram) in the text as a FrequencyTable."""
+    with stage("count"):
+        if n > 1:
+            return ngram_statistics(tokens, n)
+        # Count each word once through a hash map and order by descending count
+        return FrequencyTable.from_tokens(tokens).sorted()
+
+def as_frame(dataset):
+    """Return a DataFrame view of a FrequencyTable or any DataFrame-compatible dataset."""
+    if isinstance(dataset, FrequencyTable):
+        return dataset.to_frame()
+    import pandas as pd
+
+    return pd.DataFrame(dataset)
+
+def as_table(dataset):
+    """Return a FrequencyTable view of a DataFrame-compatible dataset, keeping its row order."""
+    if isinstance(dataset, FrequencyTable):
+        return dataset
+    df = as_frame(dataset)
+    return FrequencyTable(df[WORDS_COLUMN].to_numpy(dtype=object), df[COUNTS_COLUMN].to_numpy(), is_sorted=True)
+
+def iter_csv(dataset, batch_rows=CSV_BATCH_ROWS):
+    """Yield the dataset as UTF-8 (with BOM) CSV bytes, one batch of rows at a time."""
+    table = as_table(dataset)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator=os.linesep)
+    writer.writerow(table.columns)
+    yield codecs.BOM_UTF8 + buffer.getvalue().encode("utf-8")
+
+    for start in range(0, len(table), batch_rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(zip(table.words[start:start + batch_rows].tolist(),
+                             table.counts[start:start + batch_rows].tolist()))
+        yield buffer.getvalue().encode("utf-8")
+
+def spool(chunks, max_size=SPOOL_MAX_MEMORY):
+    """Write byte chunks to a rewound temporary file kept in memory up to ``max_size`` bytes."""
+    buffer = tempfile.SpooledTemporaryFile(max_size=max_size)
+    for chunk in chunks:
+        buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
+
+def render_csv(dataset):
+    """Render word statistics as CSV into a spooled buffer."""
+    return spool(iter_csv(dataset))
+
+def render_png(dataset, top_n=DEFAULT_TOP_N_WORDS):
+    """Render the top N words bar chart as PNG into an in-memory buffer."""
+    return rendering.render_chart(dataset, top_n, "png")
+
+def iter_buffer(buffer, chunk_size=STREAM_RESPONSE_CHUNK_SIZE):
+    """Yield the contents of a file-like buffer and close it afterwards."""
+    try:
+        while chunk := buffer.read(chunk_size):
+            yield chunk
+    finally:
+        buffer.close()
 
-    return df
+def save_buffer(buffer, filename, rootpath):
+    """Copy a rendered buffer to a file in the specified directory and rewind the buffer."""
+    os.makedirs(rootpath, exist_ok=True)
+    fullpath = os.path.join(rootpath, filename)
+    with open(fullpath, "wb") as f:
+        shutil.copyfileobj(buffer, f)
+    buffer.seek(0)
+    return fullpath
+
+def cleanup_output_dir(rootpath, max_age=OUTPUT_RETENTION_SECONDS, prefix=OUTPUT_FILE_PREFIX):
+    """Delete result files named ``prefix*`` older than ``max_age`` seconds. Return how many were removed."""
+    if not os.path.isdir(rootpath):
+        return 0
+    removed = 0
+    cutoff = time.time() - max_age
+    for entry in os.scandir(rootpath):
+        if entry.is_file() and entry.name.startswith(prefix) and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except OSError as e:
+                print(f"Failed to remove expired output file '{entry.path}': {e}")
+    return removed
 
 def export_results(dataset, filename, rootpath):
-    """Export DataFrame to CSV file in the specified directory."""
+    """Export word statistics to CSV file in the specified directory."""
 
     # Create new directory if it exists
     os.makedirs(rootpath, exist_ok=True)
     fullpath = os.path.join(rootpath, filename)
 
-    # Declare the Dataframe from the dataset
-    df = pd.DataFrame(dataset)
-
-    # Use utf-8-sig to ensure proper encoding
-    df.to_csv(fullpath, index=False, encoding="utf-8-sig")
+    # Write row batches as they are produced, with a UTF-8 BOM for spreadsheet apps
+    with open(fullpath, "wb") as f:
+        for chunk in iter_csv(dataset):
+            f.write(chunk)
 
 def visualize_results(dataset, filename, rootpath, top_n=DEFAULT_TOP_N_WORDS):
     """Visualize the top N most frequent words from the dataset and save the plot as an image file."""
-
-    # Create new directory if it exists
-    os.makedirs(rootpath, exist_ok=True)
-    fullpath = os.path.join(rootpath, filename)
-
-    # Declare the Dataframe from the dataset
-    df = pd.DataFrame(dataset)
-    top_words = df.head(top_n)
-
-    # Using matplotlib.pyplot to visualize the results 
-    plt.figure(figsize=(12,6))
-    plt.bar(top_words[WORDS_COLUMN], top_words[COUNTS_COLUMN])
-    plt.title(f'Top {top_n} Most Frequent Words')
-    plt.xlabel('Words')
-    plt.ylabel('Frequency')
-    plt.savefig(fullpath)
-    plt.close()
+    save_buffer(render_png(dataset, top_n), filename, rootpath)
@@ -0,0 +1,96 @@
+"""Per-request stage timings.
+
+A request (or any caller) installs a :class:`StageTimer` in a context
+variable with :func:`start`; pipeline code wraps its stages in :func:`stage`,
+which adds the elapsed time to the current timer and costs only a context
+variable lookup when none is installed. Context variables follow the work
+into the analysis executor's threads, which copy the caller's context.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    """Accumulated seconds per stage, and the threads that worked on the request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.values = {}
+        self.threads = {threading.get_ident()}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_value(self, name, value):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + value
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Return the stages as a ``Server-Timing`` header value, durations in milliseconds."""
+        with self._lock:
+            stages = list(self.stages.items())
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages]
+        parts.append(f"total;dur={self.elapsed * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def start():
+    """Install a new timer for the current context and return it with the token to :func:`reset` it."""
+    timer = StageTimer()
+    return timer, _current.set(timer)
+
+
+def reset(token):
+    _current.reset(token)
+
+
+def current():
+    """Return the timer of the current context, or None."""
+    return _current.get()
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as stage ``name`` of the current timer, if any."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+def record(name, seconds):
+    """Add ``seconds`` measured elsewhere to stage ``name`` of the current timer."""
+    timer = _current.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+def record_value(name, value):
+    """Add to a per-request quantity such as the number of tokens."""
+    timer = _current.get()
+    if timer is not None:
+        timer.add_value(name, value)
+
+
+def track_thread():
+    """Mark the calling thread as working for the current timer (see the slow request profiler)."""
+    timer = _current.get()
+    if timer is not None:
+        timer.threads.add(threading.get_ident())
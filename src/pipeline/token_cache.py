@@ -0,0 +1,106 @@
+"""Process-wide cache of tokenized text.
+
+Documents are often repeated whole or share templated parts. The tokens of
+every paragraph sent to underthesea (see :func:`tokenizer.tokenize`) are
+kept in an LRU cache bounded by bytes, keyed by a hash of the normalized
+paragraph, so a paragraph seen before skips underthesea even when the rest of
+its document is new.
+
+Every analysis thread of the process shares the cache. Worker processes of
+the parallel pool cannot share memory with it, so each process keeps its own
+cache and ``TOKEN_CACHE_MAX_BYTES`` is split evenly between the API process
+and the workers: the total stays bounded whatever the core count, at the
+cost of hits in one process not helping the others.
+"""
+
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from src.config.constant import PARALLEL_MAX_WORKERS, TOKEN_CACHE_MAX_BYTES
+
+_ENTRY_OVERHEAD = 120  # key bytes, OrderedDict node and the (tokens, size) pair
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+
+def process_budget(max_bytes=TOKEN_CACHE_MAX_BYTES, workers=PARALLEL_MAX_WORKERS):
+    """Return the bytes one process may cache: ``max_bytes`` split between the API process and ``workers``."""
+    return max_bytes // (workers + 1) if workers > 1 else max_bytes
+
+
+def tokens_size(tokens):
+    """Return the approximate bytes held by a tuple of tokens."""
+    return sys.getsizeof(tokens) + sum(sys.getsizeof(token) for token in tokens) + _ENTRY_OVERHEAD
+
+
+class TokenCache:
+    def __init__(self, max_bytes=process_budget()):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # text digest -> (tokens, size)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def make_key(data):
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def tokenize(self, text, tokenize):
+        """Return the tokens of ``text``, calling ``tokenize`` only if it is not cached."""
+        data = text.encode("utf-8")
+        key = self.make_key(data)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.bytes_saved += len(data)
+                return entry[0]
+            self.misses += 1
+
+        tokens = tuple(tokenize(text))
+        size = tokens_size(tokens)
+        if size <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = (tokens, size)
+                    self._bytes += size
+                    while self._bytes > self.max_bytes:
+                        _, (_, evicted_size) = self._entries.popitem(last=False)
+                        self._bytes -= evicted_size
+                        self.evictions += 1
+        return tokens
+
+    def stats(self):
+        """Return hit/miss counters, the input bytes served from the cache and the memory used."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+def get_token_cache():
+    """Return the process-wide token cache, creating it on first use."""
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                _token_cache = TokenCache()
+    return _token_cache
@@ -0,0 +1,133 @@
+"""Language-aware word tokenization.
+
+underthesea segments Vietnamese words (one word may span several syllables),
+which is wasted work on other languages and even joins unrelated English words
+("and data"). Normalized text is routed by paragraph instead: runs of
+Vietnamese paragraphs go to underthesea, everything else is split on
+whitespace.
+
+Vietnamese is recognized by its script. Letters such as ``ă``, ``đ``, ``ơ``,
+``ư`` or a dot below only occur in Vietnamese. Accents it shares with French
+or Spanish (``é``, ``ô``...) count as Vietnamese unless the paragraph also has
+letters Vietnamese never uses (``ç``, ``ü``...). Unaccented Vietnamese is taken
+for another language; underthesea rarely joins its syllables anyway.
+
+By default every paragraph is tokenized on its own. underthesea would
+otherwise join words across a line break, even a blank one ("hiện đại" at
+the end of one paragraph and "tóm lại" starting the next), and the tokens of
+a paragraph would depend on its neighbours. Paragraph by paragraph, a
+paragraph shared by different documents (a signature, a disclaimer, a
+templated header) is looked up in the token cache (see :mod:`token_cache`)
+and only the others go to underthesea. The cache memoizes the same calls the
+uncached path makes, so it never changes the tokens.
+
+With ``paragraphs`` off, runs of Vietnamese paragraphs (see :func:`segments`)
+are passed on whole and tokenized exactly like underthesea on the full text.
+"""
+
+import re
+from src.config.constant import FAST_TOKENIZER_ENABLED, FAST_TOKENIZER_MIN_CHARS, TOKENIZE_PARAGRAPHS
+
+VIETNAMESE_LETTERS = "ăđơưạảấầẩẫậắằẳẵặẹẻẽếềểễệỉịĩọỏốồổỗộớờởỡợụủũứừửữựỳỵỷỹ"
+SHARED_LETTERS = "àáâãèéêìíòóôõùúý"
+NON_VIETNAMESE_LETTERS = "çñäëïöüÿßåøæœîûāēīōū"
+
+# Decomposed (NFD) accents are combining marks; leave such text to underthesea
+_VIETNAMESE = re.compile(f"[{VIETNAMESE_LETTERS}{VIETNAMESE_LETTERS.upper()}\u0300-\u036f]")
+_SHARED = re.compile(f"[{SHARED_LETTERS}{SHARED_LETTERS.upper()}]")
+_NON_VIETNAMESE = re.compile(f"[{NON_VIETNAMESE_LETTERS}{NON_VIETNAMESE_LETTERS.upper()}]")
+_LETTER = re.compile(r"[^\W\d_]")
+
+
+def is_vietnamese(text):
+    """Return whether ``text`` is written in Vietnamese script."""
+    if _VIETNAMESE.search(text):
+        return True
+    return _SHARED.search(text) is not None and _NON_VIETNAMESE.search(text) is None
+
+
+def route(paragraph):
+    """Return True for Vietnamese, False for other languages, None for a paragraph without letters."""
+    if is_vietnamese(paragraph):
+        return True
+    return False if _LETTER.search(paragraph) else None
+
+
+def segments(text, min_chars=FAST_TOKENIZER_MIN_CHARS):
+    """Split ``text`` into ``(is_vietnamese, part)`` runs of whole lines.
+
+    Lines without letters join the run before them (or after, at the start).
+    A non-Vietnamese run shorter than ``min_chars`` next to a Vietnamese run
+    joins it. Joined with newlines, the parts give back ``text``.
+    """
+    runs = []  # [is_vietnamese, lines, chars]
+    pending = []
+    for line in text.split("\n"):
+        kind = route(line)
+        if kind is None or (runs and runs[-1][0] == kind):
+            (runs[-1][1] if runs else pending).append(line)
+            if runs:
+                runs[-1][2] += len(line)
+            continue
+        runs.append([kind, pending + [line], len(line)])
+        pending = []
+    if not runs:
+        return [(False, text)]
+
+    for i, run in enumerate(runs):
+        if not run[0] and run[2] < min_chars:
+            neighbours = runs[max(i - 1, 0):i] + runs[i + 1:i + 2]
+            if any(neighbour[0] for neighbour in neighbours):
+                run[0] = True
+
+    merged = []
+    for kind, lines, _ in runs:
+        if merged and merged[-1][0] == kind:
+            merged[-1][1].extend(lines)
+        else:
+            merged.append((kind, list(lines)))
+    return [(kind, "\n".join(lines)) for kind, lines in merged]
+
+
+def tokenize_paragraphs(text, get_vietnamese_tokenizer, cache=None, enabled=FAST_TOKENIZER_ENABLED):
+    """Return the words of normalized ``text`` line by line, Vietnamese lines memoized in ``cache`` if given."""
+    def vietnamese_tokenize(paragraph):
+        # The model is only loaded for paragraphs missing from the cache
+        return get_vietnamese_tokenizer()(paragraph)
+
+    tokens = []
+    for paragraph in text.split("\n"):
+        if enabled and not is_vietnamese(paragraph):
+            tokens.extend(paragraph.split())
+        elif paragraph and not paragraph.isspace():
+            tokens.extend(vietnamese_tokenize(paragraph) if cache is None
+                          else cache.tokenize(paragraph, vietnamese_tokenize))
+    return tokens
+
+
+def tokenize(text, get_vietnamese_tokenizer, enabled=FAST_TOKENIZER_ENABLED, cache=None,
+             paragraphs=TOKENIZE_PARAGRAPHS):
+    """Return the words of normalized ``text``.
+
+    ``get_vietnamese_tokenizer`` returns underthesea's tokenizer. It is only
+    called when the text has Vietnamese paragraphs, so other languages never
+    load the model. Pass ``cache`` to memoize the underthesea calls through a
+    :class:`token_cache.TokenCache`. ``paragraphs`` tokenizes paragraph by
+    paragraph; turned off, words may span a line break.
+    """
+    if enabled and not (_VIETNAMESE.search(text) or _SHARED.search(text)):
+        return text.split()
+    if paragraphs:
+        return tokenize_paragraphs(text, get_vietnamese_tokenizer, cache, enabled)
+
+    def vietnamese_tokenize(part):
+        if cache is None:
+            return get_vietnamese_tokenizer()(part)
+        return cache.tokenize(part, lambda uncached: get_vietnamese_tokenizer()(uncached))
+
+    if not enabled:
+        return list(vietnamese_tokenize(text))
+    tokens = []
+    for vietnamese, part in segments(text):
+        tokens.extend(vietnamese_tokenize(part) if vietnamese else part.split())
+    return tokens
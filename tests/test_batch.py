@@ -0,0 +1,54 @@
+import unittest
+from collections import Counter
+from fastapi.testclient import TestClient
+from src.app.main import app
+from src.pipeline import batch
+from src.pipeline import text_stats as ts
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.documents = [
+            ("a", "Xin chào mọi người. Đây là ví dụ về dự án nhỏ."),
+            ("b", "Học tập và phát triển. Học tập suốt đời."),
+            ("c", ""),
+            ("d", "Dự án nhỏ, học tập lớn."),
+        ]
+
+    def test_iter_batches_respects_limits(self):
+        batches = list(batch.iter_batches(self.documents, max_documents=2, max_chars=60))
+        self.assertEqual([doc for group in batches for doc in group], self.documents)
+        self.assertTrue(all(len(group) <= 2 for group in batches))
+        self.assertEqual(len(list(batch.iter_batches(self.documents, max_chars=1))), 4)
+
+    def test_analyze_documents_matches_single_analysis(self):
+        aggregate = Counter()
+        results = list(batch.analyze_documents(self.documents, aggregate, max_documents=2))
+        self.assertEqual([doc_id for doc_id, _ in results], ["a", "b", "c", "d"])
+        for (_, text), (_, counts) in zip(self.documents, results):
+            self.assertEqual(counts, Counter(ts.preprocessing(text)))
+        expected = Counter()
+        for _, text in self.documents:
+            expected.update(ts.preprocessing(text))
+        self.assertEqual(list(aggregate.items()), list(expected.items()))
+
+class TestBatchEndpoint(unittest.TestCase):
+    def test_duplicate_ids_are_rejected(self):
+        client = TestClient(app)
+        r = client.post("/analyses/batch", json={"documents": [{"id": 1, "text": "a"}, {"text": "b"}]})
+        self.assertEqual(r.status_code, 422)
+        r = client.post("/analyses/batch", json={"documents": [{"id": "x", "text": "a"}, {"id": "x", "text": "b"}]})
+        self.assertEqual(r.status_code, 422)
+        r = client.post("/analyses/batch", json={"documents": [{"id": "1", "text": "data"}, {"text": "data"}]})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([doc["id"] for doc in r.json()["data"]["documents"]], ["1", 1])
+
+    def test_ndjson_lines_are_compact(self):
+        client = TestClient(app)
+        body = '{"id": "a", "text": "dữ liệu"}\n{"id": "b", "text": "dữ liệu mới"}\n'.encode("utf-8")
+        r = client.post("/analyses/batch?aggregate=true", content=body,
+                        headers={"content-type": "application/x-ndjson"})
+        self.assertEqual(r.status_code, 200)
+        lines = r.content.splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(all(b": " not in line and b", " not in line for line in lines))
+        self.assertIn("dữ liệu".encode("utf-8"), lines[0])
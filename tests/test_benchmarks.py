@@ -0,0 +1,50 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+from benchmarks import corpora
+from benchmarks import run
+from benchmarks import suite
+
+class TestCorpora(unittest.TestCase):
+    def test_corpora_are_reproducible(self):
+        for language in corpora.LANGUAGES:
+            text = corpora.generate_corpus(language, "2KB")
+            self.assertEqual(text, corpora.generate_corpus(language, "2KB"))
+            self.assertNotEqual(text, corpora.generate_corpus(language, "2KB", seed=7))
+            self.assertLessEqual(len(text.encode("utf-8")), 2_000)
+            self.assertGreater(len(text.encode("utf-8")), 1_900)
+
+    def test_parse_size(self):
+        self.assertEqual(corpora.parse_size("1KB"), 1_000)
+        self.assertEqual(corpora.parse_size("2.5mb"), 2_500_000)
+        self.assertEqual(corpora.parse_size(512), 512)
+
+class TestSuite(unittest.TestCase):
+    def test_measure(self):
+        result = suite.measure(lambda: bytearray(100_000), size=1_000_000, repeat=2)
+        self.assertGreater(result["throughput_mb_s"], 0)
+        self.assertGreaterEqual(result["peak_bytes"], 100_000)
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        baseline = {"a": {"throughput_mb_s": 10.0}, "b": {"throughput_mb_s": 10.0}}
+        results = {"a": {"throughput_mb_s": 8.0}, "b": {"throughput_mb_s": 7.0}, "c": {"throughput_mb_s": 1.0}}
+        self.assertEqual(suite.compare(results, baseline, tolerance=0.25), [("b", 10.0, 7.0)])
+
+    def test_environment_changes(self):
+        current = suite.environment()
+        self.assertEqual(suite.environment_changes(current, dict(current)), [])
+        self.assertEqual(suite.environment_changes(current, {**current, "cpu_count": -1}), ["cpu_count"])
+
+class TestRun(unittest.TestCase):
+    def test_baseline_from_another_environment_is_not_compared(self):
+        slow = {"a": {"throughput_mb_s": 1.0}}
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = os.path.join(tmp, "baseline.json")
+            run.save_report({"environment": {**suite.environment(), "cpu_count": -1},
+                             "results": {"a": {"throughput_mb_s": 10.0}}}, baseline)
+            argv = ["--baseline", baseline, "--output", os.path.join(tmp, "results.json")]
+            with mock.patch.object(suite, "run_suite", return_value=slow):
+                run.main(argv)
+                with self.assertRaises(SystemExit):
+                    run.main(argv + ["--force"])
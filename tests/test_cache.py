@@ -0,0 +1,49 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+from fastapi.testclient import TestClient
+from src.app import main
+from src.app.cache import ResultCache
+from src.app.main import app
+from src.pipeline import text_stats as ts
+
+class TestResultCache(unittest.TestCase):
+    def test_key_ignores_case_and_punctuation(self):
+        key = ResultCache.make_key(ts.normalize("Xin chào!"), "v1")
+        self.assertEqual(key, ResultCache.make_key(ts.normalize("xin chào "), "v1"))
+        self.assertNotEqual(key, ResultCache.make_key(ts.normalize("xin chào "), "v2"))
+
+    def test_resubmission_in_other_case_hits(self):
+        client = TestClient(app)
+        with mock.patch.object(main, "result_cache", ResultCache(disk_dir=None)):
+            self.assertEqual(client.post("/analyses/text", json={"text": "Học tập, học nữa!"}).headers["X-Cache"],
+                             "MISS")
+            self.assertEqual(client.post("/analyses/text", json={"text": "HỌC TẬP; học nữa?"}).headers["X-Cache"],
+                             "HIT")
+
+    def test_lru_eviction_by_bytes(self):
+        cache = ResultCache(max_bytes=10, disk_dir=None)
+        cache.put("a", "A", size=4)
+        cache.put("b", "B", size=4)
+        self.assertEqual(cache.get("a"), "A")
+        cache.put("c", "C", size=4)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "A")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 1, 1))
+
+    def test_ttl_expiry(self):
+        cache = ResultCache(ttl=-1, disk_dir=None)
+        cache.put("a", "A", size=1)
+        self.assertIsNone(cache.get("a"))
+
+    def test_disk_tier_size_eviction(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ResultCache(disk_dir=tmpdir, disk_max_bytes=10)
+            old = cache.put_file("a", "csv", b"123456")
+            stat = os.stat(old)
+            os.utime(old, ns=(stat.st_atime_ns, stat.st_mtime_ns - 1_000_000_000))
+            cache.put_file("b", "csv", b"123456")
+            self.assertIsNone(cache.get_file("a", "csv"))
+            self.assertIsNotNone(cache.get_file("b", "csv"))
@@ -0,0 +1,131 @@
+import unittest
+import math
+import os
+import tempfile
+from unittest import mock
+from collections import Counter
+import numpy as np
+from fastapi.testclient import TestClient
+from src.app.main import app
+from src.config.constant import COUNTS_COLUMN, WORDS_COLUMN
+from src.pipeline import batch
+from src.pipeline.corpus import CorpusIndex
+from src.pipeline.collection import DocumentTermMatrix, keyness, log_likelihood, summary
+from src.pipeline.counting import FrequencyTable
+
+class TestDocumentTermMatrix(unittest.TestCase):
+    def setUp(self):
+        self.counts = [("a", Counter({"x": 3, "y": 1})), ("b", Counter({"y": 2, "z": 1})), ("c", Counter()),
+                       ("d", Counter({"x": 1, "w": 4}))]
+        self.matrix = DocumentTermMatrix.from_counts(self.counts)
+
+    def dense(self):
+        index = {word: i for i, word in enumerate(self.matrix.words)}
+        dense = np.zeros(self.matrix.shape)
+        for row, (_, counts) in enumerate(self.counts):
+            for word, count in counts.items():
+                dense[row, index[word]] = count
+        return dense
+
+    def test_layout_and_frequencies(self):
+        self.assertEqual(self.matrix.shape, (4, 4))
+        self.assertEqual(self.matrix.words.tolist(), ["x", "y", "z", "w"])
+        self.assertEqual(self.matrix.indptr.tolist(), [0, 2, 4, 4, 6])
+        dense = self.dense()
+        self.assertEqual(self.matrix.term_counts().tolist(), dense.sum(axis=0).tolist())
+        self.assertEqual(self.matrix.document_frequency().tolist(), (dense > 0).sum(axis=0).tolist())
+        self.assertEqual(self.matrix.document_lengths().tolist(), [4, 3, 0, 5])
+
+    def test_tfidf_matches_dense_computation(self):
+        dense = self.dense()
+        idf = np.log(5 / (1 + (dense > 0).sum(axis=0))) + 1
+        weights = dense * idf
+        norms = np.linalg.norm(weights, axis=1, keepdims=True)
+        expected = np.divide(weights, norms, out=np.zeros_like(weights), where=norms > 0)
+        tfidf = self.matrix.tfidf()
+        rows = self.matrix.row_ids()
+        np.testing.assert_allclose(tfidf, expected[rows, self.matrix.indices])
+        self.assertAlmostEqual(self.matrix.tfidf(sublinear=True)[0] / self.matrix.tfidf(sublinear=True)[1],
+                               (1 + math.log(3)) * idf[0] / idf[1])
+
+    def test_top_terms_per_document(self):
+        top = self.matrix.top_terms(self.matrix.tfidf(), 1)
+        self.assertEqual([doc_id for doc_id, _ in top], ["a", "b", "c", "d"])
+        self.assertEqual([list(terms) for _, terms in top], [["x"], ["y"], [], ["w"]])
+
+    def test_documents_match_batch_counts(self):
+        documents = [(0, "Hello data world, hello data."), (1, "Học tập giúp phát triển. Công nghệ giúp học tập.")]
+        matrix = DocumentTermMatrix.from_documents(documents)
+        total = Counter()
+        list(batch.analyze_documents(documents, total))
+        self.assertEqual(matrix.to_table().to_dict(), dict(total))
+
+class TestKeyness(unittest.TestCase):
+    def test_log_likelihood_matches_definition(self):
+        a, b, c, d = 30, 10, 1000, 2000
+        e1, e2 = c * (a + b) / (c + d), d * (a + b) / (c + d)
+        expected = 2 * (a * math.log(a / e1) + b * math.log(b / e2))
+        self.assertAlmostEqual(float(log_likelihood(a, b, c, d)), expected)
+        self.assertAlmostEqual(float(log_likelihood(b, a, d, c)), -expected)
+        self.assertGreater(float(log_likelihood(5, 0, 100, 100)), 0)
+
+    def test_vocabularies_are_joined(self):
+        target = FrequencyTable(["a", "b"], [8, 2])
+        reference = FrequencyTable(["c", "a"], [6, 4])
+        result = keyness(target, reference)
+        self.assertEqual(result[WORDS_COLUMN].tolist(), ["a", "b", "c"])
+        self.assertEqual(result[COUNTS_COLUMN].tolist(), [8, 2, 0])
+        self.assertEqual(result["reference_counts"].tolist(), [4, 0, 6])
+        self.assertEqual(np.sign(result["log_likelihood"]).tolist(), [1, 1, -1])
+
+    def test_summary_ranks_keywords(self):
+        matrix = DocumentTermMatrix.from_counts([(0, Counter({"a": 8, "b": 2}))])
+        data = summary(matrix, 1, FrequencyTable(["c", "a"], [6, 1]))
+        self.assertEqual(data["keyness"]["overused"][WORDS_COLUMN], ["a"])
+        self.assertEqual(data["keyness"]["underused"][WORDS_COLUMN], ["c"])
+        self.assertEqual(data["terms"][WORDS_COLUMN], ["a"])
+
+class TestCollectionEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        self.documents = [{"id": "vi", "text": "Học tập giúp phát triển. Công nghệ giúp học tập."},
+                          {"text": "Hello data world, hello data."}]
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.index = CorpusIndex(os.path.join(self.tmpdir.name, "corpora.sqlite3"))
+        patcher = mock.patch("src.app.main.get_corpus_index", return_value=self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    def test_collection_with_reference(self):
+        r = self.client.post("/analyses/collection", json={
+            "documents": self.documents, "top_n": 2, "reference": [{"text": "world world hello"}]})
+        self.assertEqual(r.status_code, 200)
+        data = r.json()["data"]
+        self.assertEqual(data["documents"], 2)
+        self.assertEqual([doc["id"] for doc in data["tfidf"]], ["vi", 1])
+        self.assertEqual(list(data["tfidf"][1]["terms"]), ["hello", "data"])
+        self.assertEqual(data["keyness"]["underused"][WORDS_COLUMN][0], "world")
+
+    def test_reference_corpus(self):
+        self.index.append_counts("news", Counter({"world": 5, "news": 3}))
+        r = self.client.post("/analyses/collection", json={"documents": self.documents, "reference_corpus": "news"})
+        self.assertEqual(r.status_code, 200)
+        keyness = r.json()["data"]["keyness"]
+        self.assertEqual(keyness["reference"], {"tokens": 8, "vocabulary": 2})
+        self.assertEqual(keyness["underused"][WORDS_COLUMN][:2], ["news", "world"])
+
+    def test_invalid_requests(self):
+        r = self.client.post("/analyses/collection", json={"documents": []})
+        self.assertEqual(r.status_code, 400)
+        r = self.client.post("/analyses/collection", json={
+            "documents": self.documents, "reference": [{"text": "x"}], "reference_corpus": "news"})
+        self.assertEqual(r.status_code, 400)
+        r = self.client.post("/analyses/collection", json={"documents": [{"id": 1, "text": "a"}, {"text": "b"}]})
+        self.assertEqual(r.status_code, 422)
+        r = self.client.post("/analyses/collection", json={
+            "documents": self.documents, "reference_corpus": "no-such-corpus-for-tests"})
+        self.assertEqual(r.status_code, 404)
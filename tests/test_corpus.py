@@ -0,0 +1,49 @@
+import unittest
+import os
+import tempfile
+from collections import Counter
+from src.pipeline import text_stats as ts
+from src.pipeline.corpus import CorpusIndex, check_name
+
+class TestCorpusIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.index = CorpusIndex(os.path.join(self.tmpdir.name, "corpora.sqlite3"))
+
+    def tearDown(self):
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    def test_append_accumulates_counts(self):
+        self.index.append_counts("news", Counter({"b": 2, "a": 1}))
+        stats = self.index.append_counts("news", Counter({"a": 2, "c": 1}), doc_id="2")
+        self.assertEqual((stats["documents"], stats["tokens"], stats["vocabulary"]), (2, 6, 3))
+        self.assertEqual(self.index.top("news", 2).to_dict(), {"a": 3, "b": 2})
+        self.assertEqual(self.index.lookup("news", "A"), 3)
+        self.assertEqual(self.index.lookup("news", "missing"), 0)
+        self.assertEqual(self.index.filter("news", min_count=2, max_count=2).to_dict(), {"b": 2})
+
+    def test_top_matches_statistics(self):
+        text = "Xin chào mọi người. Đây là ví dụ về dự án nhỏ. Xin chào, dự án lớn."
+        self.index.append_text("vi", text)
+        expected = ts.statistics(ts.preprocessing(text))
+        self.assertEqual(list(self.index.top("vi", len(expected)).items()), list(expected.items()))
+
+    def test_counts_returns_every_word(self):
+        self.index.append_counts("news", Counter({"b": 2, "a": 1}))
+        self.index.append_counts("news", Counter({"a": 2, "c": 1}))
+        self.assertEqual(self.index.counts("news").to_dict(), {"b": 2, "a": 3, "c": 1})
+        self.assertTrue(self.index.counts("missing").empty)
+
+    def test_corpora_are_independent(self):
+        self.index.append_counts("one", Counter({"a": 1}))
+        self.index.append_counts("two", Counter({"a": 5}))
+        self.assertEqual(self.index.names(), ["one", "two"])
+        self.assertTrue(self.index.delete("one"))
+        self.assertIsNone(self.index.stats("one"))
+        self.assertEqual(self.index.lookup("two", "a"), 5)
+
+    def test_check_name(self):
+        self.assertEqual(check_name("news-2024"), "news-2024")
+        with self.assertRaises(ValueError):
+            check_name("../etc")
@@ -0,0 +1,53 @@
+import unittest
+import pandas as pd
+from fastapi.testclient import TestClient
+from src.app.main import app
+from src.config.constant import CHART_MAX_TOP_N
+from src.config.constant import COUNTS_COLUMN, WORDS_COLUMN
+from src.pipeline.counting import FrequencyTable
+
+class TestFrequencyTable(unittest.TestCase):
+    def setUp(self):
+        self.tokens = ["học tập", "giáo dục", "ai", "giáo dục", "học tập", "ai", "học tập", "mới"]
+
+    def test_sorted_matches_value_counts(self):
+        table = FrequencyTable.from_tokens(self.tokens).sorted()
+        expected = pd.Series(self.tokens).value_counts()
+        self.assertEqual(table.to_dict(), expected.to_dict())
+        self.assertEqual(list(table.words), list(expected.index))
+
+    def test_top_k_keeps_tie_order(self):
+        table = FrequencyTable.from_tokens(self.tokens)
+        top = table.top_k(2)
+        self.assertEqual(list(top.words), ["học tập", "giáo dục"])
+        self.assertEqual(list(top.counts), [3, 2])
+        self.assertEqual(top.to_dict(), table.sorted().head(2).to_dict())
+
+    def test_select_pages_words_seen_min_count_times(self):
+        table = FrequencyTable.from_tokens(self.tokens)
+        ranked = list(table.sorted().words)
+        self.assertEqual(list(table.select(top_n=2, offset=1).words), ranked[1:3])
+        self.assertEqual(list(table.select(offset=1).words), ranked[1:])
+        self.assertEqual(table.select(min_count=2).to_dict(), {"học tập": 3, "giáo dục": 2, "ai": 2})
+        self.assertTrue(table.select(top_n=2, offset=10).empty)
+
+    def test_to_frame_columns(self):
+        df = FrequencyTable.from_tokens(self.tokens).sorted().to_frame()
+        self.assertEqual(list(df.columns), [WORDS_COLUMN, COUNTS_COLUMN])
+        self.assertEqual(df[COUNTS_COLUMN].sum(), len(self.tokens))
+
+    def test_empty_table(self):
+        table = FrequencyTable.from_tokens([])
+        self.assertTrue(table.empty)
+        self.assertEqual(table.top_k(5).to_dict(), {})
+
+class TestTableOptions(unittest.TestCase):
+    def test_top_n_is_bounded_for_charts_only(self):
+        client = TestClient(app)
+        text = " ".join(f"từ{i}" for i in range(CHART_MAX_TOP_N + 20))
+        top_n = CHART_MAX_TOP_N + 10
+        response = client.post("/analyses/text", json={"text": text, "top_n": top_n})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["data"][COUNTS_COLUMN]), top_n)
+        response = client.post("/analyses/text", json={"text": text, "top_n": top_n, "output_format": "png"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,57 @@
+import unittest
+import asyncio
+import threading
+from src.app.executor import AnalysisExecutor, QueueFullError
+
+class TestAnalysisExecutor(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.executor = AnalysisExecutor(max_workers=1, max_queue=1, retry_after=3)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    async def test_run_returns_result(self):
+        self.assertEqual(await self.executor.run(sum, [1, 2, 3]), 6)
+        stats = self.executor.stats()
+        self.assertEqual(stats["completed"], 1)
+        self.assertEqual(stats["queued"], 0)
+
+    async def test_rejects_when_queue_is_full(self):
+        release = threading.Event()
+        running = asyncio.ensure_future(self.executor.run(release.wait))
+        queued = asyncio.ensure_future(self.executor.run(release.wait))
+        await asyncio.sleep(0)
+
+        with self.assertRaises(QueueFullError) as ctx:
+            await self.executor.run(release.wait)
+        self.assertEqual(ctx.exception.retry_after, 3)
+        self.assertEqual(self.executor.stats()["rejected"], 1)
+
+        release.set()
+        await asyncio.gather(running, queued)
+        self.assertEqual(self.executor.stats()["completed"], 2)
+
+    async def test_cancelled_awaiter_keeps_its_slot_until_the_task_ends(self):
+        started, release = threading.Event(), threading.Event()
+
+        def work():
+            started.set()
+            release.wait()
+
+        self.addCleanup(release.set)
+        running = asyncio.ensure_future(self.executor.run(work))
+        await asyncio.to_thread(started.wait)
+        running.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await running
+        stats = self.executor.stats()
+        self.assertEqual((stats["running"], stats["queued"]), (1, 0))
+        queued = asyncio.ensure_future(self.executor.run(sum, [1]))
+        await asyncio.sleep(0)
+        with self.assertRaises(QueueFullError):
+            await self.executor.run(sum, [1])
+
+        release.set()
+        self.assertEqual(await queued, 1)
+        stats = self.executor.stats()
+        self.assertEqual((stats["running"], stats["queued"], stats["completed"]), (0, 0, 2))
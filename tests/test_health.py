@@ -0,0 +1,21 @@
+import unittest
+from src.app import health
+
+class TestWarmUp(unittest.TestCase):
+    def test_warm_up_records_steps(self):
+        state = health.warm_up(health.WarmupState())
+        self.assertTrue(state.ready, state.error)
+        self.assertGreater(state.cold_start_seconds, 0)
+        for step in ("nltk", "stopwords", "tokenizer", "rendering"):
+            self.assertIn(step, state.steps)
+
+    def test_failed_step_is_reported(self):
+        state = health.WarmupState()
+        original = health.get_stopword_index
+        health.get_stopword_index = lambda: (_ for _ in ()).throw(OSError("no data"))
+        try:
+            health.warm_up(state)
+        finally:
+            health.get_stopword_index = original
+        self.assertEqual(state.snapshot()["status"], "failed")
+        self.assertIn("stopwords", state.error)
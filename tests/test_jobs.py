@@ -0,0 +1,95 @@
+import unittest
+import json
+import os
+import tempfile
+import time
+from src.app import jobs
+from src.app.models import TableOptions
+from src.config.constant import COUNTS_COLUMN, WORDS_COLUMN
+from src.pipeline import streaming
+
+class TestJobs(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        self.text = "Xin chào mọi người. Đây là ví dụ về dự án nhỏ.\nDự án nhỏ, học tập lớn.\n"
+        self.managers = []
+
+    def tearDown(self):
+        for manager in self.managers:
+            manager.stop()
+        self.tmpdir.cleanup()
+
+    def manager(self, **kwargs):
+        manager = jobs.JobManager(root=self.root, **kwargs)
+        self.managers.append(manager)
+        return manager
+
+    def wait(self, manager, job_id, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = manager.get(job_id)
+            if job["status"] in jobs.FINISHED_STATES:
+                return job
+            time.sleep(0.05)
+        self.fail(f"Job {job_id} did not finish")
+
+    def test_job_exports_statistics(self):
+        manager = self.manager()
+        manager.start()
+        job = self.wait(manager, manager.submit(self.text, "sample.txt")["id"])
+        self.assertEqual(job["status"], jobs.SUCCEEDED)
+        self.assertEqual(job["progress"], 1.0)
+
+        with open(manager.result_path(job["id"], "json"), encoding="utf-8") as f:
+            counts = json.load(f)["data"][COUNTS_COLUMN]
+        self.assertEqual(counts, streaming.stream_statistics([self.text]).to_dict())
+        self.assertTrue(os.path.exists(manager.result_path(job["id"], "csv")))
+        self.assertTrue(manager.result_path(job["id"], "png").endswith(".png"))
+
+    def test_result_selection(self):
+        manager = self.manager()
+        manager.start()
+        job = self.wait(manager, manager.submit(self.text * 3)["id"])
+        word_stats = streaming.stream_statistics([self.text * 3])
+        expected = word_stats.select(top_n=2, offset=1)
+        path = manager.result_path(job["id"], "json", table=TableOptions(top_n=2, offset=1))
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["data"][COUNTS_COLUMN], expected.to_dict())
+        path = manager.result_path(job["id"], "json", table=TableOptions(top_n=2, offset=1, columnar=True))
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["data"][WORDS_COLUMN], expected.words.tolist())
+        path = manager.result_path(job["id"], "csv", table=TableOptions(min_count=3))
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(len(f.read().splitlines()) - 1, len(word_stats.filter(3)))
+
+    def test_queued_jobs_survive_restart(self):
+        job_id = self.manager().submit(self.text)["id"]
+        manager = self.manager()
+        manager.start()
+        self.assertEqual(self.wait(manager, job_id)["status"], jobs.SUCCEEDED)
+
+    def test_cancel_queued_job(self):
+        manager = self.manager()
+        job_id = manager.submit(self.text)["id"]
+        self.assertEqual(manager.cancel(job_id)["status"], jobs.CANCELLED)
+        manager.start()
+        manager.stop()
+        self.assertEqual(manager.get(job_id)["status"], jobs.CANCELLED)
+        self.assertIsNone(manager.result_path(job_id, "json"))
+
+    def test_invalid_utf8_fails_job(self):
+        manager = self.manager()
+        manager.start()
+        job = self.wait(manager, manager.submit(b"\xff\xfe invalid")["id"])
+        self.assertEqual(job["status"], jobs.FAILED)
+        self.assertIn("UTF-8", job["error"])
+
+    def test_cleanup_removes_expired_jobs(self):
+        manager = self.manager(ttl=60)
+        job_id = manager.submit(self.text)["id"]
+        manager.cancel(job_id)
+        self.assertEqual(manager.cleanup(), 0)
+        self.assertEqual(manager.cleanup(now=time.time() + 61), 1)
+        self.assertIsNone(manager.get(job_id))
+        self.assertFalse(os.path.exists(manager.job_dir(job_id)))
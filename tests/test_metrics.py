@@ -0,0 +1,50 @@
+import unittest
+from fastapi.testclient import TestClient
+from src.app.main import app
+from src.app.metrics import Histogram
+from src.pipeline import timing
+
+class TestTiming(unittest.TestCase):
+    def test_stages_accumulate_in_the_current_timer(self):
+        with timing.stage("noop"):
+            pass  # no timer installed: nothing is recorded
+        timer, token = timing.start()
+        try:
+            for _ in range(2):
+                with timing.stage("tokenize"):
+                    pass
+            timing.record("queue", 0.5)
+            timing.record_value("tokens", 3)
+        finally:
+            timing.reset(token)
+        self.assertIsNone(timing.current())
+        self.assertEqual(set(timer.stages), {"tokenize", "queue"})
+        self.assertEqual(timer.values, {"tokens": 3})
+        self.assertIn("queue;dur=500.0", timer.server_timing())
+        self.assertIn("total;dur=", timer.server_timing())
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_exposition(self):
+        histogram = Histogram("latency_seconds", "Latency.", (0.1, 1.0), ("route",))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value, "/a")
+        lines = list(histogram.render())
+        self.assertIn('latency_seconds_bucket{route="/a",le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{route="/a",le="1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{route="/a",le="+Inf"} 3', lines)
+        self.assertIn('latency_seconds_count{route="/a"} 3', lines)
+
+    def test_server_timing_and_metrics_endpoint(self):
+        client = TestClient(app)
+        response = client.post("/analyses/text", json={"text": "Đo thời gian từng bước xử lý.", "output_format": "json"})
+        self.assertEqual(response.status_code, 200)
+        stages = [part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")]
+        for stage in ("queue", "tokenize", "stopwords", "render", "total"):
+            self.assertIn(stage, stages)
+
+        metrics = client.get("/metrics")
+        self.assertEqual(metrics.status_code, 200)
+        self.assertIn('wordfreq_request_duration_seconds_count{method="POST",route="/analyses/text",status="200"}',
+                      metrics.text)
+        self.assertIn('wordfreq_stage_duration_seconds_count{stage="tokenize"}', metrics.text)
+        self.assertIn("wordfreq_cache_misses_total", metrics.text)
@@ -0,0 +1,124 @@
+import unittest
+import zlib
+from fastapi import FastAPI, File, UploadFile
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+from src.app.middleware import Compressor, CompressResponse, LimitUpload, MultipartHeaderScanner, negotiate_encoding
+
+def create_app(max_upload_size):
+    app = FastAPI()
+    app.add_middleware(LimitUpload, max_upload_size=max_upload_size,
+                       allowed_file_content_type=["text/plain"],
+                       path_file_content_types={"/binary": ["application/octet-stream"]},
+                       allowed_content_type_header=["multipart/form-data", "application/json"])
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    @app.post("/binary")
+    async def binary(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    @app.post("/echo")
+    async def echo(payload: dict):
+        return payload
+
+    return app
+
+def create_compressed_app():
+    app = FastAPI()
+    app.add_middleware(CompressResponse, min_size=100)
+
+    @app.get("/json")
+    async def json_body(size: int):
+        return Response(b"[" + b"1," * size + b"1]", media_type="application/json")
+
+    @app.get("/png")
+    async def png_body():
+        return Response(b"\x89PNG" * 100, media_type="image/png")
+
+    @app.get("/lines")
+    async def lines():
+        return StreamingResponse((f"{i}\n" for i in range(3)), media_type="application/x-ndjson")
+
+    return app
+
+class TestMultipartHeaderScanner(unittest.TestCase):
+    def test_finds_part_content_types_across_chunks(self):
+        body = (b"--xyz\r\nContent-Disposition: form-data; name=\"a\"\r\n\r\nvalue\r\n"
+                b"--xyz\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.txt\"\r\n"
+                b"Content-Type: text/plain; charset=utf-8\r\n\r\n" + b"x" * 1000 + b"\r\n--xyz--\r\n")
+        scanner = MultipartHeaderScanner(b"xyz")
+        for i in range(0, len(body), 7):
+            scanner.feed(body[i:i + 7])
+            self.assertLess(len(scanner.buffer), 200)
+        self.assertEqual(scanner.content_types, ["text/plain"])
+        self.assertTrue(scanner.finished)
+
+class TestLimitUpload(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(create_app(max_upload_size=1000))
+
+    def test_accepts_small_text_upload(self):
+        r = self.client.post("/upload", files={"file": ("a.txt", b"hello", "text/plain")})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json(), {"size": 5})
+
+    def test_rejects_disallowed_file_type(self):
+        r = self.client.post("/upload", files={"file": ("a.png", b"\x89PNG", "image/png")})
+        self.assertEqual(r.status_code, 415)
+
+    def test_binary_files_are_allowed_per_path(self):
+        files = {"file": ("a.bin", b"\x00\x01", "application/octet-stream")}
+        self.assertEqual(self.client.post("/upload", files=files).status_code, 415)
+        self.assertEqual(self.client.post("/binary", files=files).json(), {"size": 2})
+
+    def test_counts_streamed_bytes(self):
+        def chunks():
+            yield b'{"text": "'
+            for _ in range(20):
+                yield b"a" * 100
+            yield b'"}'
+        r = self.client.post("/echo", content=chunks(), headers={"Content-Type": "application/json"})
+        self.assertEqual(r.status_code, 413)
+
+    def test_rejects_declared_oversize(self):
+        r = self.client.post("/upload", files={"file": ("a.txt", b"x" * 2000, "text/plain")})
+        self.assertEqual(r.status_code, 413)
+
+    def test_requires_content_type(self):
+        r = self.client.post("/echo", content=b"{}")
+        self.assertEqual(r.status_code, 400)
+
+class TestCompressResponse(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(create_compressed_app())
+
+    def test_negotiates_by_quality(self):
+        self.assertEqual(negotiate_encoding("gzip, br", ("br", "gzip")), "br")
+        self.assertEqual(negotiate_encoding("br;q=0, gzip;q=0.5", ("br", "gzip")), "gzip")
+        self.assertEqual(negotiate_encoding("*", ("gzip",)), "gzip")
+        self.assertIsNone(negotiate_encoding("identity", ("br", "gzip")))
+
+    def test_compresses_large_json(self):
+        r = self.client.get("/json?size=1000", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(r.headers["content-encoding"], "gzip")
+        self.assertIn("Accept-Encoding", r.headers["vary"])
+        self.assertLess(int(r.headers["content-length"]), 2000)
+        self.assertEqual(len(r.json()), 1001)
+
+    def test_leaves_small_and_binary_bodies(self):
+        for path in ("/json?size=10", "/png"):
+            r = self.client.get(path, headers={"Accept-Encoding": "gzip"})
+            self.assertNotIn("content-encoding", r.headers)
+
+    def test_streams_are_flushed_per_chunk(self):
+        with self.client.stream("GET", "/lines", headers={"Accept-Encoding": "gzip"}) as r:
+            self.assertEqual(r.headers["content-encoding"], "gzip")
+            self.assertNotIn("content-length", r.headers)
+            self.assertEqual(r.read(), b"0\n1\n2\n")  # decoded by the client
+
+        compressor, decompressor = Compressor("gzip"), zlib.decompressobj(16 + zlib.MAX_WBITS)
+        for line in (b"0\n", b"1\n"):
+            self.assertEqual(decompressor.decompress(compressor.compress(line, final=False)), line)
@@ -0,0 +1,87 @@
+import unittest
+from collections import Counter
+import numpy as np
+from fastapi.testclient import TestClient
+from src.app.main import app
+from src.config.constant import NGRAM_COLLOCATION_TOP_N, NGRAM_SEPARATOR
+from src.pipeline import ngrams
+from src.pipeline import text_stats as ts
+
+class TestNgrams(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.tokens = [f"w{i}" for i in rng.zipf(1.5, 5_000)]
+
+    def expected(self, n):
+        return Counter(zip(*(self.tokens[i:] for i in range(n))))
+
+    def names(self, counter):
+        return {tuple(counter.words[i] for i in key): count for key, count in counter.counts.items()}
+
+    def test_chunked_counts_match_tuple_counting(self):
+        for n in (1, 2, 3, 5):
+            counter = ngrams.NgramCounter(n)
+            for start in range(0, len(self.tokens), 333):
+                counter.update(self.tokens[start:start + 333])
+            expected = self.expected(n)
+            self.assertEqual(list(self.names(counter).items()), list(expected.items()), n)
+            self.assertEqual(counter.total, len(self.tokens) - n + 1)
+
+    def test_unigrams_match_statistics(self):
+        tokens = ts.preprocessing("Xin chào mọi người. Đây là ví dụ về dự án nhỏ. Xin chào dự án.")
+        self.assertEqual(list(ts.statistics(tokens, n=1).items()),
+                         list(ngrams.ngram_statistics(tokens, 1).items()))
+
+    def test_table_joins_tokens(self):
+        table = ngrams.ngram_statistics(["dự án", "nhỏ", "dự án", "nhỏ"], 2)
+        self.assertEqual(table.to_dict(), {f"dự án{NGRAM_SEPARATOR}nhỏ": 2, f"nhỏ{NGRAM_SEPARATOR}dự án": 1})
+
+    def test_pmi_matches_definition(self):
+        counter = ngrams.NgramCounter(2)
+        counter.update(self.tokens)
+        unigrams = Counter(self.tokens)
+        total = len(self.tokens)
+        for (key, count), pmi in list(zip(counter.counts.items(), counter.pmi()))[:50]:
+            first, second = (counter.words[i] for i in key)
+            expected = np.log2((count / (total - 1)) / (unigrams[first] / total * unigrams[second] / total))
+            self.assertAlmostEqual(pmi, expected)
+
+    def test_collocations_rank_by_pmi(self):
+        counter = ngrams.NgramCounter(2)
+        counter.update(self.tokens)
+        collocations = counter.collocations(min_count=3, top_n=10)
+        pmi = dict(zip(counter.to_table(sort=False).words, counter.pmi()))
+        counts = counter.to_table().to_dict()
+        self.assertEqual(len(collocations), 10)
+        self.assertTrue(all(counts[name] >= 3 for name in collocations))
+        for name, value in collocations.items():
+            self.assertAlmostEqual(value, pmi[name])
+        self.assertEqual(list(collocations.values()), sorted(collocations.values(), reverse=True))
+        best = max((value for name, value in pmi.items() if counts[name] >= 3))
+        self.assertAlmostEqual(next(iter(collocations.values())), best)
+        self.assertEqual(len(counter.collocations()), NGRAM_COLLOCATION_TOP_N)
+
+    def test_pruning_bounds_memory(self):
+        counter = ngrams.NgramCounter(2, max_entries=200)
+        for start in range(0, len(self.tokens), 500):
+            counter.update(self.tokens[start:start + 500])
+        self.assertLessEqual(len(counter.counts), 200)
+        self.assertGreater(counter.pruned, 0)
+        expected = self.expected(2)
+        top, count = expected.most_common(1)[0]
+        tracked = self.names(counter)[top]
+        self.assertLessEqual(tracked, count)
+        self.assertGreaterEqual(tracked + counter.max_error, count)
+
+class TestNgramReport(unittest.TestCase):
+    def test_report_lists_collocations(self):
+        client = TestClient(app)
+        text = "Machine learning models. Deep learning models. Machine learning data.\n" * 3
+        data = client.post("/analyses/text", json={"text": text, "n": 2}).json()["data"]
+        self.assertEqual(set(data["collocations"]) - set(data["counts"]), set())
+        self.assertEqual(list(data["collocations"].values()), sorted(data["collocations"].values(), reverse=True))
+        self.assertAlmostEqual(data["collocations"][f"deep{NGRAM_SEPARATOR}learning"],
+                               data["pmi"][f"deep{NGRAM_SEPARATOR}learning"])
+        data = client.post("/analyses/text", json={"text": text, "n": 2, "columnar": True}).json()["data"]
+        self.assertEqual(len(data["words"]), len(data["pmi"]))
+        self.assertEqual(len(data["collocations"]["words"]), len(data["collocations"]["pmi"]))
@@ -0,0 +1,19 @@
+import unittest
+from collections import Counter
+from src.pipeline import parallel
+from src.pipeline import text_stats as ts
+
+class TestParallel(unittest.TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        parallel.shutdown_executor()
+
+    def test_parallel_counts_match_serial(self):
+        text = "Giáo dục là nền tảng của sự phát triển xã hội.\nHọc sinh truy cập tài liệu trực tuyến.\n" * 20
+        counts = parallel.parallel_counts(text, shard_size=200)
+        self.assertEqual(counts, Counter(ts.preprocessing(text)))
+
+    def test_word_statistics_serial_below_threshold(self):
+        text = "Học tập và phát triển. Học tập suốt đời."
+        table = parallel.word_statistics(text, min_chars=len(text) + 1)
+        self.assertEqual(table.to_dict(), ts.statistics(ts.preprocessing(text)).to_dict())
@@ -0,0 +1,75 @@
+import unittest
+import io
+from collections import Counter
+from fastapi.testclient import TestClient
+from src.app.main import app
+from src.config.constant import COUNTS_COLUMN, WORDS_COLUMN
+from src.pipeline import partials
+from src.pipeline.streaming import counts_to_table
+
+class TestPartials(unittest.TestCase):
+    def setUp(self):
+        self.shards = [["b", "a", "c", "a"], ["d", "c", "c", "e"], ["e", "a", "f", "b"]]
+
+    def partial(self, tokens, n=1, block_size=2):
+        buffer = io.BytesIO()
+        partials.write_partial(Counter(tokens), buffer, n=n, block_size=block_size)
+        buffer.seek(0)
+        return buffer
+
+    def test_round_trip(self):
+        tokens = self.shards[0]
+        buffer = self.partial(tokens)
+        self.assertEqual(partials.read_header(buffer), (1, 3, 4, 3))
+        self.assertEqual(list(partials.iter_entries(buffer)), [("a", 2, 1), ("b", 1, 0), ("c", 1, 2)])
+        buffer.seek(0)
+        table = partials.read_table(buffer)
+        self.assertEqual(list(table[WORDS_COLUMN]), ["a", "b", "c"])
+        self.assertEqual(list(table[COUNTS_COLUMN]), [2, 1, 1])
+
+    def test_merge_matches_counting_the_concatenation(self):
+        output = io.BytesIO()
+        writer = partials.merge_partials([self.partial(shard) for shard in self.shards], output, block_size=2)
+        self.assertEqual(writer.total, 12)
+        output.seek(0)
+        merged = partials.read_table(output)
+        expected = counts_to_table(Counter(sum(self.shards, [])))
+        self.assertEqual(list(merged[WORDS_COLUMN]), list(expected[WORDS_COLUMN]))
+        self.assertEqual(list(merged[COUNTS_COLUMN]), list(expected[COUNTS_COLUMN]))
+
+    def test_merge_is_associative(self):
+        left = io.BytesIO()
+        partials.merge_partials([self.partial(shard) for shard in self.shards[:2]], left)
+        left.seek(0)
+        nested, flat = io.BytesIO(), io.BytesIO()
+        partials.merge_partials([left, self.partial(self.shards[2])], nested)
+        partials.merge_partials([self.partial(shard) for shard in self.shards], flat)
+        self.assertEqual(nested.getvalue(), flat.getvalue())
+
+    def test_merge_rejects_mixed_ngram_sizes(self):
+        with self.assertRaises(ValueError):
+            partials.merge_partials([self.partial(["a b"], n=2), self.partial(["a"])], io.BytesIO())
+
+    def test_writer_requires_ascending_words(self):
+        writer = partials.PartialWriter(io.BytesIO())
+        writer.write("b", 1, 0)
+        with self.assertRaises(ValueError):
+            writer.write("a", 1, 1)
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            partials.read_header(io.BytesIO(b"word,count\n"))
+
+    def test_merge_endpoint(self):
+        client = TestClient(app)
+        files = [("files", (f"part{i}.wfp", self.partial(shard), "application/octet-stream"))
+                 for i, shard in enumerate(self.shards)]
+        response = client.post("/analyses/merge", files=files, data={"output_format": "json"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"][COUNTS_COLUMN], dict(Counter(sum(self.shards, [])).most_common()))
+
+        response = client.post("/analyses/merge", files=[("files", ("a.txt", b"plain text", "text/plain"))])
+        self.assertEqual(response.status_code, 400)
+        response = client.post("/analyses/file", files={"file": ("a.wfp", self.partial(self.shards[0]),
+                                                                  "application/octet-stream")})
+        self.assertEqual(response.status_code, 415)
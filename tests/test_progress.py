@@ -0,0 +1,96 @@
+import unittest
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from fastapi.testclient import TestClient
+from src.app.main import app
+from src.app.progress import RunningCounts, iter_text_units, progressive_results
+from src.config.constant import COUNTS_COLUMN
+from src.pipeline.counting import FrequencyTable
+
+async def aiter_list(items):
+    for item in items:
+        yield item
+
+def slow_count(unit):
+    time.sleep(0.01)
+    return Counter(unit), 1
+
+class TestProgressiveResults(unittest.IsolatedAsyncioTestCase):
+    async def test_slow_reader_gets_fewer_fresher_snapshots(self):
+        units = [["a", "b"], ["a"]] * 10
+        state = RunningCounts()
+        lines = []
+        async for line in progressive_results(units[0], aiter_list(units[1:]), slow_count, state, 1, 0.001):
+            lines.append(json.loads(line))
+            await asyncio.sleep(0.05)
+        snapshots, result = lines[:-1], lines[-1]
+        self.assertLess(len(snapshots), len(units) // 2)
+        self.assertEqual([s["documents"] for s in snapshots], sorted(s["documents"] for s in snapshots))
+        self.assertTrue(all(len(s[COUNTS_COLUMN]) <= 1 for s in snapshots))
+        self.assertEqual(result["type"], "result")
+        self.assertEqual(result[COUNTS_COLUMN], {"a": 20, "b": 10})
+        self.assertEqual((result["documents"], result["tokens"]), (20, 30))
+
+    async def test_result_line_is_built_off_the_event_loop(self):
+        threads = {}
+
+        class RecordingCounts(RunningCounts):
+            def line(self, kind, top_n=None):
+                threads[kind] = threading.get_ident()
+                return super().line(kind, top_n)
+
+        lines = [line async for line in progressive_results(["a"], aiter_list([["b"]]), slow_count,
+                                                            RecordingCounts(), 1, 10)]
+        self.assertEqual(json.loads(lines[-1])["type"], "result")
+        self.assertNotEqual(threads["result"], threading.get_ident())
+
+    def test_snapshot_ranks_like_frequency_table(self):
+        state = RunningCounts()
+        state.add(Counter(["c", "b", "a", "b", "a", "d"]))
+        expected = FrequencyTable.from_counter(state.counts).select(3).to_dict()
+        self.assertEqual(list(json.loads(state.line("snapshot", 3))[COUNTS_COLUMN].items()), list(expected.items()))
+
+    async def test_text_units_reject_invalid_utf8_mid_stream(self):
+        units = iter_text_units(aiter_list(["xin chào ".encode("utf-8")[:-2], b"\xff"]), "strict")
+        with self.assertRaisesRegex(UnicodeError, "byte 8"):
+            [unit async for unit in units]
+        units = iter_text_units(aiter_list(["chào".encode("utf-8")[:4], "chào".encode("utf-8")[4:]]), "strict")
+        self.assertEqual([unit async for unit in units], [["chào"]])
+
+class TestStreamEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        self.text = "Học tập giúp phát triển. Công nghệ giúp học tập.\nHello data world, hello data.\n" * 20
+
+    def stream(self, body, content_type, query=""):
+        r = self.client.post(f"/analyses/stream{query}", content=body, headers={"Content-Type": content_type})
+        self.assertEqual(r.status_code, 200)
+        return [json.loads(line) for line in r.text.splitlines()]
+
+    def test_result_matches_text_analysis(self):
+        def chunks():
+            data = self.text.encode("utf-8")
+            for i in range(0, len(data), 100):
+                yield data[i:i + 100]
+        result = self.stream(chunks(), "text/plain")[-1]
+        expected = self.client.post("/analyses/text", json={"text": self.text}).json()["data"][COUNTS_COLUMN]
+        self.assertEqual(result["type"], "result")
+        self.assertEqual(result[COUNTS_COLUMN], expected)
+        self.assertEqual(result["bytes"], len(self.text.encode("utf-8")))
+
+    def test_ndjson_documents(self):
+        body = "\n".join(json.dumps({"id": i, "text": self.text}) for i in range(3))
+        result = self.stream(body.encode("utf-8"), "application/x-ndjson")[-1]
+        self.assertEqual(result["documents"], 3)
+        self.assertEqual(result[COUNTS_COLUMN]["hello"], 120)
+
+    def test_invalid_input(self):
+        r = self.client.post("/analyses/stream", content=b"", headers={"Content-Type": "text/plain"})
+        self.assertEqual(r.status_code, 400)
+        r = self.client.post("/analyses/stream", content=b"ok \xff", headers={"Content-Type": "text/plain"})
+        self.assertEqual(r.status_code, 400)
+        lines = self.stream(b"ok \xff ok", "text/plain", "?errors=ignore")
+        self.assertEqual(lines[-1][COUNTS_COLUMN], {"ok": 2})
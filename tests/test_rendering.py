@@ -0,0 +1,29 @@
+import unittest
+import threading
+from src.pipeline import rendering
+from src.pipeline.counting import FrequencyTable
+
+class TestRendering(unittest.TestCase):
+    def setUp(self):
+        self.table = FrequencyTable.from_tokens(["học tập"] * 3 + ["giáo dục"] * 2 + ["ai"]).sorted()
+
+    def test_render_png_and_svg(self):
+        png = rendering.render_chart(self.table, top_n=2, output_format="png").getvalue()
+        self.assertTrue(png.startswith(b"\x89PNG"))
+        svg = rendering.render_chart(self.table, top_n=2, output_format="svg").getvalue()
+        self.assertIn(b"<svg", svg)
+
+    def test_template_is_reused_without_stale_bars(self):
+        rendering.render_chart(self.table, top_n=3)
+        template = rendering.get_template()
+        rendering.render_chart(self.table, top_n=2)
+        self.assertIs(rendering.get_template(), template)
+        self.assertEqual(len(template.bars), 2)
+        self.assertEqual([label.get_text() for label in template.axes.get_xticklabels()], ["học tập", "giáo dục"])
+
+    def test_templates_are_per_thread(self):
+        templates = []
+        thread = threading.Thread(target=lambda: templates.append(rendering.get_template()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(templates[0], rendering.get_template())
@@ -0,0 +1,88 @@
+import unittest
+import json
+import os
+import tempfile
+from collections import Counter
+from src.config.constant import RUN_MANIFEST_NAME
+from src.pipeline import partials
+from src.pipeline import runner
+from src.pipeline import text_stats as ts
+
+class TestRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.tmp.name, "input")
+        self.output_dir = os.path.join(self.tmp.name, "output")
+        os.makedirs(os.path.join(self.input_dir, "sub"))
+        self.texts = {
+            "a.txt": "Học tập giúp phát triển. Học tập mỗi ngày.",
+            "b.txt": "Công nghệ giúp giáo dục phát triển.",
+            os.path.join("sub", "c.txt"): "Giáo dục và công nghệ. Học tập.",
+        }
+        for name, text in self.texts.items():
+            self.write(name, text)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.input_dir, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def run_files(self, **kwargs):
+        lines = []
+        paths = runner.expand_inputs([self.input_dir])
+        result = runner.run_files(paths, self.output_dir, progress=lines.append, **kwargs)
+        return result, lines
+
+    def test_expand_inputs(self):
+        paths = runner.expand_inputs([os.path.join(self.input_dir, "b.txt"), self.input_dir])
+        names = [os.path.relpath(path, self.input_dir) for path in paths]
+        self.assertEqual(names, ["b.txt", "a.txt", os.path.join("sub", "c.txt")])
+        paths = runner.expand_inputs([os.path.join(self.input_dir, "*.txt")])
+        self.assertEqual(len(paths), 2)
+        with self.assertRaises(ValueError):
+            runner.expand_inputs([os.path.join(self.input_dir, "*.md")])
+
+    def test_outputs_and_aggregate(self):
+        result, lines = self.run_files(formats=["csv", "json"])
+        self.assertEqual((result["processed"], result["skipped"]), (3, 0))
+        self.assertEqual(len(lines), 3)
+
+        expected = Counter()
+        for name, text in self.texts.items():
+            counts = Counter(ts.preprocessing(text))
+            expected.update(counts)
+            with open(os.path.join(self.output_dir, "files", f"{name}.json"), encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["counts"], dict(counts))
+            self.assertTrue(os.path.exists(os.path.join(self.output_dir, "files", f"{name}.csv")))
+        with open(os.path.join(self.output_dir, "aggregate.wfp"), "rb") as f:
+            self.assertEqual(partials.read_table(f).to_dict(), dict(expected))
+        self.assertEqual(result["tokens"], sum(expected.values()))
+
+    def test_unchanged_files_are_skipped(self):
+        self.run_files()
+        result, _ = self.run_files()
+        self.assertEqual((result["processed"], result["skipped"]), (0, 3))
+
+        self.write("b.txt", "Công nghệ mới.")
+        result, _ = self.run_files()
+        self.assertEqual((result["processed"], result["skipped"]), (1, 2))
+        with open(os.path.join(self.output_dir, RUN_MANIFEST_NAME), encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)["files"]), 3)
+
+        # New formats or another n-gram size need a recount
+        result, _ = self.run_files(formats=["json"])
+        self.assertEqual(result["processed"], 3)
+        result, _ = self.run_files(formats=["json"], n=2)
+        self.assertEqual(result["processed"], 3)
+        result, _ = self.run_files(formats=["json"], force=True)
+        self.assertEqual(result["processed"], 3)
+
+    def test_failed_files_are_reported(self):
+        with open(os.path.join(self.input_dir, "bad.txt"), "wb") as f:
+            f.write(b"\xff\xfe invalid")
+        result, lines = self.run_files()
+        self.assertEqual(list(result["failed"]), [os.path.join(self.input_dir, "bad.txt")])
+        self.assertEqual(result["processed"], 3)
+        self.assertTrue(any("failed" in line for line in lines))
@@ -0,0 +1,57 @@
+import unittest
+import os
+import tempfile
+from collections import Counter
+from src.pipeline import sketch
+
+class TestSpaceSaving(unittest.TestCase):
+    def setUp(self):
+        # Zipf-like stream: word i occurs 200 // i times, plus a long tail of singletons
+        self.tokens = [f"w{i}" for i in range(1, 50) for _ in range(200 // i)]
+        self.tokens += [f"rare{i}" for i in range(500)]
+        self.exact = Counter(self.tokens)
+
+    def build(self, capacity, chunk_size=97):
+        summary = sketch.SpaceSaving(capacity)
+        for start in range(0, len(self.tokens), chunk_size):
+            summary.update(self.tokens[start:start + chunk_size])
+        return summary
+
+    def test_counts_are_bounded_overestimates(self):
+        summary = self.build(capacity=40)
+        self.assertEqual(len(summary), 40)
+        self.assertEqual(summary.total, len(self.tokens))
+        self.assertLessEqual(summary.max_error, summary.total / summary.capacity)
+        for word, count in summary.counts.items():
+            self.assertLessEqual(count - summary.errors[word], self.exact[word])
+            self.assertGreaterEqual(count, self.exact[word])
+
+    def test_heavy_hitters_are_found(self):
+        summary = self.build(capacity=40)
+        top = summary.top_k(5).words.tolist()
+        self.assertEqual(top, [word for word, _ in self.exact.most_common(5)])
+
+    def test_exact_below_capacity(self):
+        summary = self.build(capacity=len(self.exact))
+        self.assertEqual(summary.counts, dict(self.exact))
+        self.assertEqual(summary.max_error, 0)
+
+    def test_checkpoint_round_trip(self):
+        summary = self.build(capacity=40)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "summary.ssk")
+            summary.save(path)
+            restored = sketch.SpaceSaving.load(path)
+        self.assertEqual(restored.counts, summary.counts)
+        self.assertEqual(restored.errors, summary.errors)
+        self.assertEqual(restored.total, summary.total)
+
+        restored.update(["w1"] * 3)
+        summary.update(["w1"] * 3)
+        self.assertEqual(restored.counts, summary.counts)
+
+    def test_capacity_for_error(self):
+        self.assertEqual(sketch.capacity_for_error(0.01), 100)
+        self.assertEqual(sketch.capacity_for_error(1e-9, max_capacity=500), 500)
+        with self.assertRaises(ValueError):
+            sketch.capacity_for_error(0)
@@ -0,0 +1,56 @@
+import unittest
+import os
+import tempfile
+from src.pipeline.stopwords import StopwordIndex, StopwordTrie
+
+class TestStopwordIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.rootpath = self.tmpdir.name
+        self.filepath = os.path.join(self.rootpath, "vi_stopwords.txt")
+        with open(self.filepath, "w", encoding="utf-8") as f:
+            f.write("ai\nai ai\nbiết bao nhiêu\n\n")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_filter_removes_stopwords(self):
+        index = StopwordIndex(rootpath=self.rootpath, language=None)
+        tokens = ["ai", "học tập", "ai ai", "biết bao nhiêu", "giáo dục"]
+        self.assertEqual(index.filter(tokens), ["học tập", "giáo dục"])
+
+    def test_filter_removes_stopwords_split_into_syllables(self):
+        index = StopwordIndex(rootpath=self.rootpath, language=None)
+        tokens = ["biết", "bao", "nhiêu", "học", "biết", "bao", "ai", "ai"]
+        self.assertEqual(index.filter(tokens), ["học", "biết", "bao"])
+
+    def test_trie_matches_multi_syllable_entries(self):
+        index = StopwordIndex(rootpath=self.rootpath, language=None)
+        self.assertIn("biết bao nhiêu", index.trie)
+        self.assertNotIn("biết bao", index.trie)
+        self.assertEqual(index.trie.longest_match(["x", "biết", "bao", "nhiêu"], 1), 3)
+
+    def test_refresh_reloads_changed_files(self):
+        index = StopwordIndex(rootpath=self.rootpath, language=None, reload_interval=0)
+        version = index.version
+        snapshot = index._snapshot
+        self.assertFalse(index.refresh())
+
+        with open(self.filepath, "a", encoding="utf-8") as f:
+            f.write("giáo dục\n")
+        stat = os.stat(self.filepath)
+        os.utime(self.filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertTrue(index.refresh())
+        self.assertIn("giáo dục", index)
+        self.assertNotEqual(index.version, version)
+        # A reader holding the previous build still sees its words and version together
+        self.assertEqual(snapshot[2], version)
+        self.assertNotIn("giáo dục", snapshot[0])
+
+class TestStopwordTrie(unittest.TestCase):
+    def test_longest_match_prefers_longest_phrase(self):
+        trie = StopwordTrie(["biết bao", "biết bao nhiêu"])
+        self.assertEqual(trie.longest_match(["biết", "bao", "nhiêu", "x"]), 3)
+        self.assertEqual(trie.longest_match(["biết", "bao", "x"]), 2)
+        self.assertEqual(trie.longest_match(["x"]), 0)
@@ -0,0 +1,74 @@
+import unittest
+import io
+import os
+import tempfile
+from collections import Counter
+from src.config.constant import COUNTS_COLUMN, WORDS_COLUMN
+from src.pipeline import streaming
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.text = "Xin chào mọi người. Đây là ví dụ.\nDự án nhỏ! Xin chào " * 50
+
+    def test_split_text_keeps_words_whole(self):
+        chunks = list(streaming.split_text(self.text, chunk_size=40, max_chunk_size=160))
+        self.assertEqual("".join(chunks), self.text)
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks[:-1]:
+            self.assertTrue(chunk[-1].isspace(), repr(chunk))
+
+    def test_iter_chunks_matches_input(self):
+        chunks = list(streaming.iter_chunks(io.StringIO(self.text), chunk_size=64, max_chunk_size=256))
+        self.assertEqual("".join(chunks), self.text)
+        self.assertTrue(all(len(chunk) <= 256 for chunk in chunks))
+
+    def test_iter_chunks_bounds_unbroken_text(self):
+        text = "x" * 1000
+        chunks = list(streaming.iter_chunks(io.StringIO(text), chunk_size=100, max_chunk_size=300))
+        self.assertEqual("".join(chunks), text)
+        self.assertTrue(all(len(chunk) <= 300 for chunk in chunks))
+
+    def test_cut_chunks_respects_max_chunk_size(self):
+        buffer = "a" * 50 + " " + "b" * 5
+        chunks, rest = streaming.cut_chunks(buffer, chunk_size=10, max_chunk_size=20)
+        self.assertEqual("".join(chunks) + rest, buffer)
+        self.assertTrue(all(len(chunk) <= 20 for chunk in chunks))
+        chunks = list(streaming.rechunk([buffer[:30], buffer[30:]], chunk_size=10, max_chunk_size=20))
+        self.assertEqual("".join(chunks), buffer)
+        self.assertTrue(all(len(chunk) <= 20 for chunk in chunks))
+
+    def test_decode_blocks_completes_split_characters(self):
+        data = self.text.encode("utf-8")
+        blocks = list(streaming.decode_blocks(data, block_size=7))
+        self.assertEqual("".join(blocks), self.text)
+        self.assertGreater(len(blocks), 1)
+
+    def test_decode_blocks_error_policies(self):
+        data = "chào ".encode("utf-8") + b"\xff" + " bạn".encode("utf-8")
+        with self.assertRaisesRegex(UnicodeError, "byte 6"):
+            list(streaming.decode_blocks(data, "strict", block_size=4))
+        self.assertEqual("".join(streaming.decode_blocks(data, "replace", block_size=4)), "chào \ufffd bạn")
+        self.assertEqual("".join(streaming.decode_blocks(data, "ignore", block_size=4)), "chào  bạn")
+        # A truncated character at the end of the input is invalid too
+        with self.assertRaisesRegex(UnicodeError, "byte 2"):
+            list(streaming.decode_blocks("chà".encode("utf-8")[:-1], block_size=2))
+
+    def test_iter_mapped_chunks_matches_file_chunks(self):
+        with tempfile.TemporaryDirectory() as rootpath:
+            path = os.path.join(rootpath, "text.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.text)
+            mapped = list(streaming.iter_mapped_chunks(path, chunk_size=64, block_size=10))
+            self.assertEqual(mapped, list(streaming.iter_file_chunks("text.txt", rootpath, chunk_size=64)))
+            self.assertEqual("".join(mapped), self.text)
+
+    def test_find_boundary_prefers_paragraph(self):
+        text = "một câu. hai câu\nba câu. bốn"
+        self.assertEqual(streaming.find_boundary(text, len(text)), text.index("\n") + 1)
+        self.assertEqual(streaming.find_boundary("một câu. hai", 12), len("một câu. "))
+        self.assertEqual(streaming.find_boundary("abc", 3), 0)
+
+    def test_counts_to_table_orders_by_count(self):
+        table = streaming.counts_to_table(Counter(["b", "a", "a", "c", "b", "a"]))
+        self.assertEqual(list(table[WORDS_COLUMN]), ["a", "b", "c"])
+        self.assertEqual(list(table[COUNTS_COLUMN]), [3, 2, 1])
@@ -1,5 +1,7 @@
 import unittest
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 import src.pipeline.text_stats as ts
 
 class TestTextStats(unittest.TestCase):
@@ -12,3 +14,36 @@ class TestTextStats(unittest.TestCase):
     def test_import_data(self):
         data = ts.import_data(self.filename, self.rootpath)
         self.assertIsInstance(data, str)
+
+    def test_resolve_data_path_stays_in_allowed_dirs(self):
+        self.assertEqual(ts.resolve_data_path(self.filename, [self.rootpath]),
+                         os.path.realpath(os.path.join(self.rootpath, self.filename)))
+        for name in ("../README.md", os.path.abspath("README.md")):
+            with self.assertRaises(PermissionError):
+                ts.resolve_data_path(name, [self.rootpath])
+        with self.assertRaises(FileNotFoundError):
+            ts.resolve_data_path("missing.txt", [self.rootpath])
+
+    def test_iter_csv_matches_pandas(self):
+        table = ts.statistics(["xin chào", "a,b", "xin chào", 'say "hi"'])
+        expected = table.to_frame().to_csv(index=False).encode("utf-8-sig")
+        self.assertEqual(b"".join(ts.iter_csv(table, batch_rows=1)), expected)
+
+    def test_cleanup_output_dir_removes_expired_files(self):
+        with tempfile.TemporaryDirectory() as rootpath:
+            old = os.path.join(rootpath, "word_frequency_old.csv")
+            new = os.path.join(rootpath, "word_frequency_new.csv")
+            for path in (old, new):
+                with open(path, "w") as f:
+                    f.write("words,counts\n")
+            os.utime(old, (0, 0))
+
+            self.assertEqual(ts.cleanup_output_dir(rootpath, max_age=60), 1)
+            self.assertFalse(os.path.exists(old))
+            self.assertTrue(os.path.exists(new))
+
+    def test_preprocessing_is_thread_safe(self):
+        text = "Xin chào mọi người. Đây là ví dụ về dự án nhỏ."
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(ts.preprocessing, [text] * 8))
+        self.assertTrue(all(result == results[0] for result in results))
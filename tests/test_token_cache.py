@@ -0,0 +1,71 @@
+import unittest
+from src.pipeline import text_stats as ts
+from src.pipeline import tokenizer
+from src.pipeline.token_cache import TokenCache, process_budget, tokens_size
+
+def no_vietnamese_tokenizer():
+    raise AssertionError("underthesea should not be used")
+
+class CountingTokenizer:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return text.split()
+
+class TestTokenCache(unittest.TestCase):
+    def test_repeated_paragraphs_are_tokenized_once(self):
+        cache = TokenCache()
+        tokenize = CountingTokenizer()
+        for _ in range(3):
+            self.assertEqual(cache.tokenize("xin chào", tokenize), ("xin", "chào"))
+        self.assertEqual(tokenize.calls, ["xin chào"])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (2, 1, 1))
+        self.assertEqual(stats["bytes_saved"], 2 * len("xin chào".encode("utf-8")))
+
+    def test_lru_eviction_by_bytes(self):
+        size = tokens_size(("a0",))
+        cache = TokenCache(max_bytes=2 * size)
+        tokenize = CountingTokenizer()
+        cache.tokenize("a0", tokenize)
+        cache.tokenize("a1", tokenize)
+        cache.tokenize("a0", tokenize)  # a1 is now the least recently used
+        cache.tokenize("a2", tokenize)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        cache.tokenize("a0", tokenize)
+        self.assertEqual(tokenize.calls, ["a0", "a1", "a2"])
+
+    def test_cached_output_is_unchanged(self):
+        text = ts.normalize(ts.import_data("sample.txt", "data"))
+        self.assertGreater(text.count("\n"), 1)
+        expected = tokenizer.tokenize(text, ts.get_word_tokenizer)
+        cache = TokenCache()
+        self.assertEqual(tokenizer.tokenize(text, ts.get_word_tokenizer, cache=cache), expected)
+        self.assertEqual(tokenizer.tokenize(text, no_vietnamese_tokenizer, cache=cache), expected)
+        self.assertEqual(cache.stats()["hits"], cache.stats()["misses"])
+
+    def test_budget_is_split_between_processes(self):
+        self.assertEqual(process_budget(64, workers=1), 64)
+        self.assertEqual(process_budget(64, workers=3), 16)
+
+    def test_shared_paragraph_hits_across_documents(self):
+        signature = "Trân trọng cảm ơn quý khách đã sử dụng dịch vụ."
+        first = ts.normalize(f"Hôm nay trời đẹp.\n{signature}")
+        second = ts.normalize(f"Giá cả tăng cao trong tháng này.\n\n{signature}")
+        cache = TokenCache()
+        tokenizer.tokenize(first, ts.get_word_tokenizer, cache=cache)
+        tokens = tokenizer.tokenize(second, ts.get_word_tokenizer, cache=cache)
+        self.assertEqual(tokens, tokenizer.tokenize(second, ts.get_word_tokenizer))
+        self.assertEqual((cache.stats()["misses"], cache.stats()["hits"]), (3, 1))
+
+    def test_cached_tokenization_works_paragraph_by_paragraph(self):
+        text = ts.normalize("Học tập giúp phát triển.\nThe quick brown fox.\n\nHọc tập giúp phát triển.")
+        underthesea = ts.get_word_tokenizer()
+        cache = TokenCache()
+        tokens = tokenizer.tokenize(text, ts.get_word_tokenizer, cache=cache)
+        paragraph = underthesea("học tập giúp phát triển ")
+        self.assertEqual(tokens, [*paragraph, "the", "quick", "brown", "fox", *paragraph])
+        # Only the Vietnamese paragraph went through the cache, once tokenized and once hit
+        self.assertEqual((cache.stats()["misses"], cache.stats()["hits"]), (1, 1))
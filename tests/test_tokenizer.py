@@ -0,0 +1,45 @@
+import unittest
+from src.pipeline import text_stats as ts
+from src.pipeline import tokenizer
+
+def no_vietnamese_tokenizer():
+    raise AssertionError("underthesea should not be used")
+
+class TestTokenizer(unittest.TestCase):
+    def test_detects_vietnamese_script(self):
+        self.assertTrue(tokenizer.is_vietnamese("học tập"))
+        self.assertTrue(tokenizer.is_vietnamese("cà phê"))
+        self.assertTrue(tokenizer.is_vietnamese("ĐẠI HỌC"))
+        self.assertTrue(tokenizer.is_vietnamese("học"))  # decomposed accent
+        self.assertFalse(tokenizer.is_vietnamese("machine learning"))
+        self.assertFalse(tokenizer.is_vietnamese("café in zürich"))
+        self.assertFalse(tokenizer.is_vietnamese("привет мир"))
+
+    def test_other_languages_skip_underthesea(self):
+        text = ts.normalize("Machine learning and data science.\nZürich, München!")
+        self.assertEqual(tokenizer.tokenize(text, no_vietnamese_tokenizer),
+                         ["machine", "learning", "and", "data", "science", "zürich", "münchen"])
+
+    def test_vietnamese_output_is_unchanged(self):
+        text = ts.normalize(ts.import_data("sample.txt", "data"))
+        underthesea = ts.get_word_tokenizer()
+        self.assertEqual(tokenizer.tokenize(text, ts.get_word_tokenizer, paragraphs=False), underthesea(text))
+        self.assertEqual(tokenizer.tokenize(text, ts.get_word_tokenizer),
+                         [word for paragraph in text.split("\n") if paragraph.strip()
+                          for word in underthesea(paragraph)])
+
+    def test_words_do_not_span_paragraphs(self):
+        text = ts.normalize("Xã hội hiện đại\n\nTóm lại, học tập là chìa khóa.")
+        self.assertEqual(tokenizer.tokenize(text, ts.get_word_tokenizer)[:2], ["xã hội", "hiện đại"])
+
+    def test_mixed_documents_are_split_by_paragraph(self):
+        english = "the quick brown fox jumps over the lazy dog " * 10
+        text = f"{english}\nxin chào các bạn\n2024\nok\ncảm ơn\n{english}"
+        self.assertEqual(tokenizer.segments(text), [
+            (False, english),
+            (True, "xin chào các bạn\n2024\nok\ncảm ơn"),  # the short English line stays with its neighbours
+            (False, english),
+        ])
+        tokens = tokenizer.tokenize(text, ts.get_word_tokenizer)
+        self.assertEqual(tokens[:9], english.split()[:9])
+        self.assertIn("cảm ơn", tokens)